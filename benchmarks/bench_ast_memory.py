@@ -0,0 +1,64 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import oryon_lexer
+import oryon_parser
+
+def generate_source(functions):
+    out = []
+    for i in range(functions):
+        out.append(f"func f{i}(a, b) -> int")
+        out.append(f"    int x = a * {i} + b - (a + 3) * 2")
+        out.append(f"    list items = [x, a, b, \"s{i}\"]")
+        out.append("    if (x > 10 && a < b) ->")
+        out.append("        x = obj.method(items[0], x - 1).field")
+        out.append("    end")
+        out.append("    return x")
+        out.append("end")
+    return "\n".join(out)
+
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+            continue
+        if type(node).__module__ != "ast_nodes" or id(node) in seen:
+            continue
+        seen.add(id(node))
+        count += 1
+        for cls in type(node).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                stack.append(getattr(node, name, None))
+        stack.extend(getattr(node, "__dict__", {}).values())
+    return count
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    source = generate_source(functions)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tree = oryon_parser.Parser(oryon_lexer.Lexer(source).iter_tokens()).parse()
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = count_nodes(tree)
+    retained = after - before
+    print(f"functions        : {functions}")
+    print(f"AST nodes        : {nodes}")
+    print(f"retained bytes   : {retained:,}")
+    print(f"peak bytes       : {peak - before:,}")
+    print(f"bytes per node   : {retained / nodes:.1f}")
+
+if __name__ == "__main__":
+    main()
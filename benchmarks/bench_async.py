@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
+
+PROGRAMS = {
+    # N tasks in flight at once, each awaiting others from inside a loop.
+    "fanout": """
+async func ping(i) -> int
+    return i
+end
+async func worker(i) -> int
+    int total = 0
+    for (int j = 0; j < 10; j++) ->
+        total = total + await ping(j)
+    end
+    return total
+end
+list tasks = []
+for (int i = 0; i < N; i++) ->
+    tasks.add(worker(i))
+end
+int sum = 0
+for (t in tasks) ->
+    sum = sum + await t
+end
+output(sum)
+""",
+    # N tasks sleeping at once, so every wake-up goes through the timer
+    # heap.
+    "sleep": """
+async func napper(i) -> int
+    for (int j = 0; j < 5; j++) ->
+        await sleep(0)
+    end
+    return i
+end
+list tasks = []
+for (int i = 0; i < N; i++) ->
+    tasks.add(napper(i))
+end
+int sum = 0
+for (t in tasks) ->
+    sum = sum + await t
+end
+output(sum)
+""",
+    # Each task awaits the next one, N deep.
+    "chain": """
+async func depth(n) -> int
+    if (n == 0) ->
+        return 0
+    end
+    return await depth(n - 1) + 1
+end
+output(await depth(N))
+""",
+}
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench(engine, name, n):
+    tree = parse_source(PROGRAMS[name].replace("N", str(n)), optimizer=None)
+    devnull = open(os.devnull, "w")
+
+    def run():
+        interp = engine(optimize=False, jobs=1)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+
+    return best_of(3, run)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for engine in (Interpreter, ClosureInterpreter, VMInterpreter):
+        for name in PROGRAMS:
+            elapsed = bench(engine, name, n)
+            print(f"{engine.__name__:<18} {name:<6} {n:>6}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
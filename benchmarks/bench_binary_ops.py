@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+
+PROGRAMS = {
+    "int": """
+int total = 0
+for (int i = 0; i < N; i++) ->
+    total = total + i * 3 - i % 7
+end
+output(total)
+""",
+    "float": """
+float x = 0.5
+float acc = 0.0
+for (int i = 0; i < N; i++) ->
+    acc = acc + x * 1.5 - acc / 4.0
+end
+output(acc)
+""",
+    "str": """
+str s = ""
+for (int i = 0; i < N; i++) ->
+    if (s == "abcabc") ->
+        s = ""
+    end
+    s = s + "abc"
+end
+output(s)
+""",
+    # Flips the operand type of the same '+' every iteration, so the node
+    # keeps deoptimizing; this should cost about the same as before.
+    "mixed": """
+func add(a, b) -> any
+    return a + b
+end
+for (int i = 0; i < N; i++) ->
+    add(i, 1)
+    add(0.5, 1.5)
+end
+""",
+}
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench(name, n):
+    source = PROGRAMS[name].replace("N", str(n))
+    devnull = open(os.devnull, "w")
+
+    def run():
+        # Reparse every run so each starts from generic, unquickened nodes.
+        tree = parse_source(source, optimizer=None)
+        interp = Interpreter(optimize=False, jobs=1)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+
+    return best_of(3, run)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for name in PROGRAMS:
+        elapsed = bench(name, n)
+        print(f"{name:<6} {n:>7}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
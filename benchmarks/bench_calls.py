@@ -0,0 +1,161 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
+
+# Modules the programs import, written to a temporary directory.
+MODULES = {
+    # Export names that are also builtins, which the imports shadow.
+    "timing": """
+func sleep(ms) -> int
+    return ms + 1
+end
+""",
+    "ranges": """
+func range(n) -> int
+    return n * 2
+end
+""",
+}
+
+PROGRAMS = {
+    "fib": """
+func fib(n) -> int
+    if (n < 2) ->
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+output(fib($N))
+""",
+    "ackermann": """
+func ack(m, n) -> int
+    if (m == 0) ->
+        return n + 1
+    end
+    if (n == 0) ->
+        return ack(m - 1, 1)
+    end
+    return ack(m - 1, ack(m, n - 1))
+end
+int total = 0
+for (int i = 0; i < $N; i++) ->
+    total = total + ack(2, 6)
+end
+output(total)
+""",
+    "tailcall": """
+func count(n, acc) -> int
+    if (n == 0) ->
+        return acc
+    end
+    return count(n - 1, acc + 1)
+end
+int total = 0
+for (int i = 0; i < $N; i++) ->
+    total = total + count(100, 0)
+end
+output(total)
+""",
+    "method": """
+class Counter ->
+    int count = 0
+    func bump(n) -> int
+        this.count = this.count + n
+        return this.count
+    end
+end
+Counter c = Counter()
+for (int i = 0; i < $N; i++) ->
+    c.bump(1)
+end
+output(c.count)
+""",
+}
+
+PROGRAMS["imported"] = """
+import <timing> <sleep>
+int total = 0
+for (int i = 0; i < $N; i++) ->
+    total = total + sleep(i)
+end
+output(total)
+"""
+
+PROGRAMS["wildcard"] = """
+import <ranges> <*>
+int total = 0
+for (int i = 0; i < $N; i++) ->
+    total = total + range(i)
+end
+output(total)
+"""
+
+# What each program prints for a given N. "imported" and "wildcard" only
+# add up if sleep and range are the module's, not the builtins.
+EXPECTED = {
+    "fib": lambda n: fib(n),
+    "ackermann": lambda n: 15 * n,
+    "tailcall": lambda n: 100 * n,
+    "method": lambda n: n,
+    "imported": lambda n: n * (n + 1) // 2,
+    "wildcard": lambda n: n * (n - 1),
+}
+
+def fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def write_modules(module_dir):
+    for name, source in MODULES.items():
+        with open(os.path.join(module_dir, name + ".or"), "w") as f:
+            f.write(source)
+
+def bench(engine, name, n, module_dir):
+    tree = parse_source(PROGRAMS[name].replace("$N", str(n)), optimizer=None)
+    expected = f"{EXPECTED[name](n)}\n"
+
+    def run():
+        interp = engine(optimize=False, jobs=1)
+        interp.current_dir = module_dir
+        out = io.StringIO()
+        stdout, sys.stdout = sys.stdout, out
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+        assert out.getvalue() == expected, f"{engine.__name__} {name}: {out.getvalue()!r} != {expected!r}"
+
+    return best_of(3, run)
+
+def main():
+    sizes = {"fib": 20, "ackermann": 50, "tailcall": 200, "method": 20000, "imported": 20000, "wildcard": 20000}
+    if len(sys.argv) > 1:
+        sizes = {name: n * int(sys.argv[1]) // 100 for name, n in sizes.items()}
+    with tempfile.TemporaryDirectory() as module_dir:
+        write_modules(module_dir)
+        for engine in (Interpreter, ClosureInterpreter, VMInterpreter):
+            for name, n in sizes.items():
+                elapsed = bench(engine, name, n, module_dir)
+                print(f"{engine.__name__:<18} {name:<10} {n:>6}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
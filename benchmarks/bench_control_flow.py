@@ -0,0 +1,124 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
+
+PROGRAMS = {
+    # Every call leaves through a return nested in an if, the case that
+    # used to raise and catch an exception per call.
+    "return": """
+func sign(n) -> int
+    if (n < 0) ->
+        return -1
+    end
+    if (n == 0) ->
+        return 0
+    end
+    return 1
+end
+int total = 0
+for (int i = 0; i < $N; i++) ->
+    total = total + sign(i - 500)
+end
+output(total)
+""",
+    "break": """
+int hits = 0
+for (int i = 0; i < $N; i++) ->
+    while (true) ->
+        hits++
+        break
+    end
+end
+output(hits)
+""",
+    "continue": """
+int odd = 0
+for (int i = 0; i < $N; i++) ->
+    if (i % 2 == 0) ->
+        continue
+    end
+    odd++
+end
+output(odd)
+""",
+    # A switch inside for-in and while loops; cases that do not match must
+    # leave nothing behind on the VM stack.
+    "switch": """
+list xs = []
+for (int i = 0; i < $N; i++) ->
+    xs.add(i % 4)
+end
+int total = 0
+for (x in xs) ->
+    switch (x) ->
+        case 1:
+            total = total + 1
+        case 3:
+            total = total + 3
+        def:
+            total = total + 5
+    end
+end
+int k = 0
+while (k < $N) ->
+    switch (k % 3) ->
+        case 0:
+            total++
+        case 1:
+            break
+    end
+    k++
+end
+output(total)
+""",
+}
+
+# What each program prints for a given N.
+EXPECTED = {
+    "return": lambda n: sum((i > 500) - (i < 500) for i in range(n)),
+    "break": lambda n: n,
+    "continue": lambda n: n // 2,
+    "switch": lambda n: sum({1: 1, 3: 3}.get(i % 4, 5) for i in range(n)) + len(range(0, n, 3)),
+}
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench(engine, name, n):
+    tree = parse_source(PROGRAMS[name].replace("$N", str(n)), optimizer=None)
+    expected = f"{EXPECTED[name](n)}\n"
+
+    def run():
+        interp = engine(optimize=False, jobs=1)
+        out = io.StringIO()
+        stdout, sys.stdout = sys.stdout, out
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+        assert out.getvalue() == expected, f"{engine.__name__} {name}: {out.getvalue()!r} != {expected!r}"
+
+    return best_of(3, run)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for engine in (Interpreter, ClosureInterpreter, VMInterpreter):
+        for name in PROGRAMS:
+            elapsed = bench(engine, name, n)
+            print(f"{engine.__name__:<18} {name:<8} {n:>6}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
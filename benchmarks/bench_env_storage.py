@@ -0,0 +1,120 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from native import native_env
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+
+PROGRAM = """
+func churn(n) -> int
+    int a = 0
+    int b = 1
+    float f = 0.5
+    str s = "x"
+    for (int i = 0; i < n; i++) ->
+        a = i
+        b = a + 1
+        f = f + 1.0
+        s = "y"
+        int t = b
+        step(a, b)
+    end
+    return a + b
+end
+func step(x, y) -> int
+    return x
+end
+int total = 0
+for (int k = 0; k < ROUNDS; k++) ->
+    total = total + churn(1000)
+end
+output(total)
+"""
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_env_calls(count):
+    env = native_env.Environment()
+    env.define("x", 0, "int", False)
+
+    def define():
+        for i in range(count):
+            env.define("x", i, "int", False)
+
+    def assign():
+        for i in range(count):
+            env.assign("x", i)
+
+    def get():
+        for _ in range(count):
+            env.get("x", env)
+
+    key = sys.intern("x")
+
+    def define_key():
+        for i in range(count):
+            env.define_key(key, i, "int", False)
+
+    def assign_key():
+        for i in range(count):
+            env.assign_key(key, i)
+
+    def get_key():
+        for _ in range(count):
+            env.get_key(key, env)
+
+    calls = (("define", define), ("assign", assign), ("get", get),
+             ("define_key", define_key), ("assign_key", assign_key), ("get_key", get_key))
+    for name, fn in calls:
+        elapsed = best_of(5, fn)
+        print(f"{name:<16} : {elapsed / count * 1e9:8.1f} ns/op")
+
+def bench_binding_memory(count):
+    names = [f"v{i}" for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    env = native_env.Environment()
+    for i, name in enumerate(names):
+        env.define(name, i + 1000, "int", False)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"bytes per binding: {(after - before) / count:8.1f}")
+    return env
+
+def bench_program(engine, rounds):
+    tree = parse_source(PROGRAM.replace("ROUNDS", str(rounds)), optimizer=None)
+    devnull = open(os.devnull, "w")
+
+    def run():
+        interp = engine(optimize=False, jobs=1)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+
+    elapsed = best_of(3, run)
+    print(f"{engine.__name__:<17}: {elapsed:.3f}s ({rounds * 1000} loop iterations)")
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    bench_env_calls(200000)
+    bench_binding_memory(50000)
+    bench_program(Interpreter, rounds)
+    bench_program(ClosureInterpreter, rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+
+CLASS = """
+class Vec ->
+    float x = 0.0
+    float y = 0.0
+    float z = 0.0
+    private int hits = 0
+    func add(o) -> void
+        this.x = this.x + o.x
+        this.y = this.y + o.y
+        this.z += o.z
+        this.hits += 1
+    end
+end
+"""
+
+LOOP = CLASS + """
+Vec acc = Vec()
+Vec step = Vec()
+step.x = 1.0
+step.y = 2.0
+step.z = 3.0
+for (int i = 0; i < ROUNDS; i++) ->
+    acc.add(step)
+end
+output(acc.x, acc.y, acc.z)
+"""
+
+CONSTRUCT = CLASS + """
+class Vec4 inherits Vec ->
+    float w = 1.0
+    func init(x) -> void
+        this.x = x
+    end
+end
+for (int i = 0; i < ROUNDS; i++) ->
+    Vec v = Vec()
+    Vec4 u = Vec4(1.0)
+end
+"""
+
+ALLOC = CLASS + """
+list objs = []
+for (int i = 0; i < COUNT; i++) ->
+    objs.add(Vec())
+end
+"""
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_loop(engine, rounds):
+    tree = parse_source(LOOP.replace("ROUNDS", str(rounds)), optimizer=None)
+    devnull = open(os.devnull, "w")
+
+    def run():
+        interp = engine(optimize=False, jobs=1)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+
+    elapsed = best_of(3, run)
+    print(f"{engine.__name__:<18}: {elapsed:.3f}s ({rounds} calls, 11 field accesses each)")
+
+def bench_construct(engine, rounds):
+    tree = parse_source(CONSTRUCT.replace("ROUNDS", str(rounds)), optimizer=None)
+
+    def run():
+        engine(optimize=False, jobs=1).visit(tree)
+
+    elapsed = best_of(3, run)
+    print(f"{engine.__name__:<18}: {elapsed:.3f}s ({rounds * 2} objects)")
+
+def bench_instance_memory(count):
+    tree = parse_source(ALLOC.replace("COUNT", str(count)), optimizer=None)
+    interp = Interpreter(optimize=False, jobs=1)
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    interp.visit(tree)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"bytes per instance (4 fields): {(after - before) / count:8.1f}")
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bench_loop(Interpreter, rounds)
+    bench_loop(ClosureInterpreter, rounds)
+    bench_construct(Interpreter, rounds)
+    bench_construct(ClosureInterpreter, rounds)
+    bench_instance_memory(20000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
+
+SETUP = """
+list xs = []
+int k = 0
+while (k < N) ->
+    xs.add(k)
+    k++
+end
+str s = cast(xs, "str")
+"""
+
+PROGRAMS = {
+    "list": """
+int total = 0
+for (x in xs) ->
+    total = total + x
+end
+output(total)
+""",
+    "range": """
+int total = 0
+for (x in range(N)) ->
+    total = total + x
+end
+output(total)
+""",
+    "str": """
+int spaces = 0
+for (c in s) ->
+    if (c == " ") ->
+        spaces++
+    end
+end
+output(spaces)
+""",
+    # C-style loops of the counted shape: the body reads the counter, or
+    # only uses the loop to repeat itself.
+    "cfor": """
+int total = 0
+for (int i = 0; i < N; i++) ->
+    total = total + i
+end
+output(total)
+""",
+    "repeat": """
+int total = 0
+for (int i = 0; i < N; i++) ->
+    total++
+end
+output(total)
+""",
+}
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench(engine, name, n):
+    setup = parse_source(SETUP.replace("N", str(n)), optimizer=None)
+    tree = parse_source(PROGRAMS[name].replace("N", str(n)), optimizer=None)
+    devnull = open(os.devnull, "w")
+
+    def run():
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            interp.visit(tree)
+        finally:
+            sys.stdout = stdout
+
+    # Only the loop is timed; the list and string it walks are built once.
+    interp = engine(optimize=False, jobs=1)
+    interp.visit(setup)
+    return best_of(3, run)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for engine in (Interpreter, ClosureInterpreter, VMInterpreter):
+        for name in PROGRAMS:
+            elapsed = bench(engine, name, n)
+            print(f"{engine.__name__:<18} {name:<6} {n:>7}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import oryon_lexer
+import oryon_parser
+
+def generate_source(lines):
+    out = []
+    for i in range(lines):
+        out.append(
+            f"int v{i} = (a{i} + {i}) * b - c / 3 % 7 + -d ** 2 "
+            f"&& x{i} < y || z == {i} && !w in items | 1 << 2"
+        )
+    return "\n".join(out)
+
+def bench(source, repeat):
+    tokens = oryon_lexer.Lexer(source).tokenize()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        oryon_parser.Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(tokens), best
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    token_count, best = bench(generate_source(lines), repeat)
+    print(f"expression lines : {lines}")
+    print(f"tokens           : {token_count}")
+    print(f"best parse time  : {best:.4f} s")
+    print(f"tokens / second  : {token_count / best:,.0f}")
+
+if __name__ == "__main__":
+    main()
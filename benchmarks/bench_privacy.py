@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from native import native_env
+from oryon_interpreter import Interpreter, parse_source
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
+
+PROGRAM = """
+class Account ->
+    MODIFIER int balance = 0
+    MODIFIER int count = 0
+    func deposit(n) -> int
+        this.balance = this.balance + n
+        this.count += 1
+        return this.balance
+    end
+end
+Account a = Account()
+for (int i = 0; i < ROUNDS; i++) ->
+    a.deposit(i)
+end
+"""
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_descends_from(count, depth):
+    root = native_env.Environment()
+    scope = root.child()
+    scope.set_class_scope()
+    env = scope
+    for _ in range(depth):
+        env = env.child()
+
+    def check():
+        for _ in range(count):
+            env.descends_from(scope)
+
+    elapsed = best_of(5, check)
+    print(f"descends_from, {depth} levels deep: {elapsed / count * 1e9:8.1f} ns/op")
+
+def bench_program(engine, modifier, rounds):
+    source = PROGRAM.replace("MODIFIER", modifier).replace("ROUNDS", str(rounds))
+    tree = parse_source(source, optimizer=None)
+
+    def run():
+        engine(optimize=False, jobs=1).visit(tree)
+
+    elapsed = best_of(3, run)
+    label = modifier or "public"
+    print(f"{engine.__name__:<18} {label:<8}: {elapsed:.3f}s")
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bench_descends_from(200000, 2)
+    bench_descends_from(200000, 20)
+    for engine in (Interpreter, ClosureInterpreter, VMInterpreter):
+        bench_program(engine, "", rounds)
+        bench_program(engine, "private", rounds)
+
+if __name__ == "__main__":
+    main()
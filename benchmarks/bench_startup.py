@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "main.py")
+
+# Whole runs of main.py, so these go through run_deep and its worker
+# thread the way a real program does. Each entry is (source, expected
+# stdout).
+PROGRAMS = {
+    "hello": ("""
+output("hello")
+""", "hello\n"),
+    # signal.signal only works on the main thread, so the handler has to be
+    # installed from there while the program runs on the worker.
+    "signal": ("""
+import <#system>
+
+system.signalhandler(10, 1)
+output("handler ok")
+""", "handler ok\n"),
+}
+
+ENGINES = ("tree", "closure", "vm")
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench(engine, name, work_dir):
+    source, expected = PROGRAMS[name]
+    path = os.path.join(work_dir, name + ".or")
+    with open(path, "w") as f:
+        f.write(source)
+
+    def run():
+        result = subprocess.run([sys.executable, MAIN, "--no-cache", "--engine", engine, path],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, f"{engine} {name}: exit {result.returncode}\n{result.stderr}"
+        assert result.stdout == expected, f"{engine} {name}: {result.stdout!r} != {expected!r}"
+
+    return best_of(3, run)
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        for engine in ENGINES:
+            for name in PROGRAMS:
+                elapsed = bench(engine, name, work_dir)
+                print(f"{engine:<8} {name:<6}: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,153 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <structmember.h>
+#include "native_env_api.h"
+
+/* Every binding of an environment has an index into four parallel arrays:
+   the value, the id of its declared type, its privacy flag, and the
+   (value, vtype, is_private) tuple handed out by get(), which is only built
+   when someone asks for it and dropped whenever the value changes.
+
+   Names in the env's layout (name -> index, computed by the scope resolver
+   and shared by every env of the same scope) take the first nslots indices;
+   any other name gets the next free index through the env's own `names`
+   dict. A NULL value means the name is not defined yet, so lookups skip
+   this env.
+
+   The first ENV_INLINE_SLOTS bindings live in arrays inside the object, so
+   most function and block scopes never allocate storage of their own, and
+   freed envs are kept on a free list to be reused by the next scope.
+
+   Each env also records where it sits in the chain of native parents, so
+   the privacy checks can tell whether one env is nested in another without
+   walking the chain: `depth` counts its native ancestors, `root` is the
+   outermost one, and `scope` is the nearest env marked with
+   set_class_scope() (class bodies). `root` and `scope` are ancestors and
+   so are kept alive by `parent`, which cannot be reassigned.
+
+   `version` is bumped whenever a binding is defined or assigned, so callers
+   can tell whether anything they derived from an env is still current. */
+#define ENV_INLINE_SLOTS 8
+#define ENV_FREELIST_MAX 256
 
 typedef struct {
     PyObject_HEAD
-    PyObject *vars;  
     PyObject *parent;
+    PyObject *layout;
+    PyObject *names;
+    PyObject **values;
+    PyObject **entries;
+    int *types;
+    char *privs;
+    Py_ssize_t nslots;
+    Py_ssize_t size;
+    Py_ssize_t capacity;
+    Py_ssize_t depth;
+    PyObject *root;
+    PyObject *scope;
+    int native_chain;
+    unsigned long long version;
+    PyObject *inline_values[ENV_INLINE_SLOTS];
+    PyObject *inline_entries[ENV_INLINE_SLOTS];
+    int inline_types[ENV_INLINE_SLOTS];
+    char inline_privs[ENV_INLINE_SLOTS];
 } NativeEnvObject;
 
 static PyTypeObject NativeEnvType;
 
+static NativeEnvObject *env_freelist[ENV_FREELIST_MAX];
+static int env_freelist_size;
+static PyObject *this_key;
+
+/* Declared types are interned once into a table shared by all envs; id 0
+   stands for no declared type. type_matches caches, per id, the last Python
+   type assign() accepted, so the name comparison is skipped after that. */
+static PyObject *type_ids;
+static PyObject **type_names;
+static PyTypeObject **type_matches;
+static int ntypes;
+static int types_capacity;
+static int auto_type_id;
+
 static int
-is_env_descendant(PyObject *origin, PyObject *declaring) {
-    if (!origin || origin == Py_None || !declaring) return 0;
+type_id_of(PyObject *vtype) {
+    if (!vtype || vtype == Py_None) return 0;
+    if (!PyUnicode_Check(vtype)) {
+        PyErr_SetString(PyExc_TypeError, "vtype must be a str or None");
+        return -1;
+    }
+
+    PyObject *id = PyDict_GetItemWithError(type_ids, vtype);
+    if (id) return (int) PyLong_AsLong(id);
+    if (PyErr_Occurred()) return -1;
 
+    if (ntypes >= types_capacity) {
+        int capacity = types_capacity ? types_capacity * 2 : 32;
+        PyObject **names = PyMem_Realloc(type_names, capacity * sizeof(PyObject *));
+        if (!names) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        type_names = names;
+        PyTypeObject **matches = PyMem_Realloc(type_matches, capacity * sizeof(PyTypeObject *));
+        if (!matches) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        type_matches = matches;
+        types_capacity = capacity;
+    }
+
+    PyObject *name = vtype;
+    Py_INCREF(name);
+    PyUnicode_InternInPlace(&name);
+
+    PyObject *id_obj = PyLong_FromLong(ntypes);
+    if (!id_obj || PyDict_SetItem(type_ids, name, id_obj) < 0) {
+        Py_XDECREF(id_obj);
+        Py_DECREF(name);
+        return -1;
+    }
+    Py_DECREF(id_obj);
+
+    type_names[ntypes] = name;
+    type_matches[ntypes] = NULL;
+    return ntypes++;
+}
+
+/* 0 if a value of this type may be stored in a binding declared as `tid`. */
+static int
+type_mismatch(int tid, PyObject *value) {
+    if (tid == 0 || tid == auto_type_id) return 0;
+
+    PyTypeObject *tp = Py_TYPE(value);
+    if (type_matches[tid] == tp) return 0;
+
+    const char *expected = PyUnicode_AsUTF8(type_names[tid]);
+    if (!expected) {
+        PyErr_Clear();
+        return 1;
+    }
+    if (strcmp(expected, tp->tp_name) != 0) return 1;
+
+    Py_INCREF(tp);
+    Py_XSETREF(type_matches[tid], tp);
+    return 0;
+}
+
+static int
+check_type(int tid, PyObject *value, PyObject *key) {
+    if (!type_mismatch(tid, value)) return 0;
+    PyErr_Format(PyExc_TypeError,
+        "TypeError: cannot assign value of type '%s' to variable '%U' of type '%U'",
+        Py_TYPE(value)->tp_name, key, type_names[tid]);
+    return -1;
+}
+
+/* Chain walk for envs whose ancestry goes through parents that are not
+   native environments. */
+static int
+is_descendant_slow(PyObject *origin, PyObject *declaring) {
     PyObject *cur = origin;
     Py_INCREF(cur);
     while (cur && cur != Py_None) {
@@ -40,31 +174,317 @@ is_env_descendant(PyObject *origin, PyObject *declaring) {
 }
 
 static int
-NativeEnv_init(NativeEnvObject *self, PyObject *args, PyObject *kwds) {
-    static char *kwlist[] = {"parent", NULL};
-    PyObject *parent = Py_None;
+is_env_descendant(PyObject *origin, PyObject *declaring) {
+    if (!origin || origin == Py_None || !declaring) return 0;
+    if (origin == declaring) return 1;
+
+    if (!PyObject_TypeCheck(origin, &NativeEnvType) ||
+        !((NativeEnvObject *) origin)->native_chain)
+        return is_descendant_slow(origin, declaring);
+    if (!PyObject_TypeCheck(declaring, &NativeEnvType))
+        return 0;
+
+    NativeEnvObject *o = (NativeEnvObject *) origin;
+    NativeEnvObject *d = (NativeEnvObject *) declaring;
+    if (!d->native_chain || d->depth >= o->depth)
+        return 0;
+    if (d->depth == 0)
+        return o->root == declaring;
+    if (o->scope == declaring)
+        return 1;
+
+    /* Otherwise the ancestor at d's depth is the only candidate. */
+    Py_ssize_t steps = o->depth - d->depth;
+    while (steps--)
+        o = (NativeEnvObject *) o->parent;
+    return o == d;
+}
+
+static void
+use_inline_storage(NativeEnvObject *self) {
+    self->values = self->inline_values;
+    self->entries = self->inline_entries;
+    self->types = self->inline_types;
+    self->privs = self->inline_privs;
+    self->capacity = ENV_INLINE_SLOTS;
+}
+
+/* Each array is checked on its own: a failed grow_storage can leave some
+   of them moved to the heap and the rest still inline. */
+static void
+free_storage(NativeEnvObject *self) {
+    if (self->values != self->inline_values) PyMem_Free(self->values);
+    if (self->entries != self->inline_entries) PyMem_Free(self->entries);
+    if (self->types != self->inline_types) PyMem_Free(self->types);
+    if (self->privs != self->inline_privs) PyMem_Free(self->privs);
+}
+
+/* Moves the arrays to the heap the first time the inline ones fill up. */
+static void *
+resize_array(void *array, void *inline_array, Py_ssize_t old_size, Py_ssize_t size) {
+    if (array != inline_array)
+        return PyMem_Realloc(array, size);
+    void *heap = PyMem_Malloc(size);
+    if (heap)
+        memcpy(heap, inline_array, old_size);
+    return heap;
+}
+
+static int
+grow_storage(NativeEnvObject *self, Py_ssize_t capacity) {
+    if (capacity <= self->capacity)
+        return 0;
+    Py_ssize_t old = self->capacity;
+    PyObject **values = resize_array(self->values, self->inline_values,
+                                     old * sizeof(PyObject *), capacity * sizeof(PyObject *));
+    if (!values) goto nomem;
+    self->values = values;
+    PyObject **entries = resize_array(self->entries, self->inline_entries,
+                                      old * sizeof(PyObject *), capacity * sizeof(PyObject *));
+    if (!entries) goto nomem;
+    self->entries = entries;
+    int *types = resize_array(self->types, self->inline_types,
+                              old * sizeof(int), capacity * sizeof(int));
+    if (!types) goto nomem;
+    self->types = types;
+    char *privs = resize_array(self->privs, self->inline_privs, old, capacity);
+    if (!privs) goto nomem;
+    self->privs = privs;
+
+    for (Py_ssize_t i = self->capacity; i < capacity; i++) {
+        self->values[i] = NULL;
+        self->entries[i] = NULL;
+        self->types[i] = 0;
+        self->privs[i] = 0;
+    }
+    self->capacity = capacity;
+    return 0;
+
+nomem:
+    PyErr_NoMemory();
+    return -1;
+}
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &parent))
+/* Index of the binding for key in this env, or -1 if it has no place for
+   it. Never sets an error. */
+static Py_ssize_t
+find_index(NativeEnvObject *self, PyObject *key) {
+    PyObject *idx;
+    if (self->layout) {
+        idx = PyDict_GetItemWithError(self->layout, key);
+        if (idx) {
+            Py_ssize_t i = PyLong_AsSsize_t(idx);
+            if (i >= 0 && i < self->nslots) return i;
+        }
+        PyErr_Clear();
+    }
+    if (self->names) {
+        idx = PyDict_GetItemWithError(self->names, key);
+        if (idx) return PyLong_AsSsize_t(idx);
+        PyErr_Clear();
+    }
+    return -1;
+}
+
+static Py_ssize_t
+find_defined(NativeEnvObject *self, PyObject *key) {
+    Py_ssize_t i = find_index(self, key);
+    return (i >= 0 && self->values[i]) ? i : -1;
+}
+
+static Py_ssize_t
+add_index(NativeEnvObject *self, PyObject *key) {
+    Py_ssize_t i = find_index(self, key);
+    if (i >= 0) return i;
+
+    if (!self->names) {
+        self->names = PyDict_New();
+        if (!self->names) return -1;
+    }
+    if (self->size == self->capacity &&
+        grow_storage(self, self->capacity ? self->capacity * 2 : 8) < 0)
         return -1;
 
+    i = self->size;
+    PyObject *idx = PyLong_FromSsize_t(i);
+    if (!idx) return -1;
+    int res = PyDict_SetItem(self->names, key, idx);
+    Py_DECREF(idx);
+    if (res < 0) return -1;
+    self->size++;
+    return i;
+}
+
+static void
+set_value(NativeEnvObject *self, Py_ssize_t i, PyObject *value) {
+    self->version++;
+    Py_INCREF(value);
+    Py_XSETREF(self->values[i], value);
+    Py_CLEAR(self->entries[i]);
+}
+
+/* Borrowed (value, vtype, is_private) tuple for a defined binding. */
+static PyObject *
+entry_at(NativeEnvObject *self, Py_ssize_t i) {
+    if (!self->entries[i]) {
+        int tid = self->types[i];
+        self->entries[i] = PyTuple_Pack(3,
+            self->values[i],
+            tid ? type_names[tid] : Py_None,
+            self->privs[i] ? Py_True : Py_False);
+    }
+    return self->entries[i];
+}
+
+static NativeEnvObject *
+env_alloc(PyTypeObject *type) {
+    NativeEnvObject *self;
+    if (type == &NativeEnvType && env_freelist_size) {
+        self = env_freelist[--env_freelist_size];
+        PyObject_Init((PyObject *) self, type);
+    } else {
+        self = (NativeEnvObject *) type->tp_alloc(type, 0);
+        if (!self) return NULL;
+        use_inline_storage(self);
+    }
+    self->depth = 0;
+    self->root = (PyObject *) self;
+    self->scope = NULL;
+    self->native_chain = 1;
+    self->version = 0;
+    return self;
+}
+
+static void
+set_parent(NativeEnvObject *self, PyObject *parent) {
     Py_INCREF(parent);
     self->parent = parent;
+    if (PyObject_TypeCheck(parent, &NativeEnvType)) {
+        NativeEnvObject *p = (NativeEnvObject *) parent;
+        self->depth = p->depth + 1;
+        self->root = p->root;
+        self->scope = p->scope;
+        self->native_chain = p->native_chain;
+    } else {
+        self->depth = 0;
+        self->root = (PyObject *) self;
+        self->scope = NULL;
+        self->native_chain = parent == Py_None;
+    }
+}
 
-    self->vars = PyDict_New();
-    if (!self->vars) {
-        Py_DECREF(parent);
+static PyObject *
+NativeEnv_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
+    return (PyObject *) env_alloc(type);
+}
+
+static int
+set_layout(NativeEnvObject *self, PyObject *layout) {
+    if (!PyDict_Check(layout)) {
+        PyErr_SetString(PyExc_TypeError, "layout must be a dict or None");
+        return -1;
+    }
+    Py_ssize_t n = PyDict_GET_SIZE(layout);
+    if (grow_storage(self, n) < 0)
+        return -1;
+    self->nslots = n;
+    self->size = n;
+    Py_INCREF(layout);
+    self->layout = layout;
+    return 0;
+}
+
+static int
+NativeEnv_init(NativeEnvObject *self, PyObject *args, PyObject *kwds) {
+    static char *kwlist[] = {"parent", "layout", NULL};
+    PyObject *parent = Py_None;
+    PyObject *layout = Py_None;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO", kwlist, &parent, &layout))
+        return -1;
+
+    if (self->parent) {
+        PyErr_SetString(PyExc_RuntimeError, "Environment is already initialized");
         return -1;
     }
+    if (layout != Py_None && set_layout(self, layout) < 0)
+        return -1;
+
+    set_parent(self, parent);
     return 0;
 }
 
 static void
 NativeEnv_dealloc(NativeEnvObject *self) {
-    Py_XDECREF(self->vars);
-    Py_XDECREF(self->parent);
+    for (Py_ssize_t i = 0; i < self->size; i++) {
+        Py_CLEAR(self->values[i]);
+        Py_CLEAR(self->entries[i]);
+        self->types[i] = 0;
+        self->privs[i] = 0;
+    }
+    free_storage(self);
+    Py_CLEAR(self->names);
+    Py_CLEAR(self->layout);
+    Py_CLEAR(self->parent);
+
+    if (Py_IS_TYPE(self, &NativeEnvType) && env_freelist_size < ENV_FREELIST_MAX) {
+        /* The inline arrays still hold whatever they had when the env moved
+           to the heap, already released above through the heap copies. */
+        use_inline_storage(self);
+        memset(self->inline_values, 0, sizeof(self->inline_values));
+        memset(self->inline_entries, 0, sizeof(self->inline_entries));
+        memset(self->inline_types, 0, sizeof(self->inline_types));
+        memset(self->inline_privs, 0, sizeof(self->inline_privs));
+        self->nslots = 0;
+        self->size = 0;
+        env_freelist[env_freelist_size++] = self;
+        return;
+    }
     Py_TYPE(self)->tp_free((PyObject *) self);
 }
 
+static int
+define_key(NativeEnvObject *self, PyObject *key, PyObject *value, int tid, int is_private) {
+    Py_ssize_t i = add_index(self, key);
+    if (i < 0) return -1;
+    set_value(self, i, value);
+    self->types[i] = tid;
+    self->privs[i] = is_private ? 1 : 0;
+    return 0;
+}
+
+static Py_ssize_t
+api_bind(PyObject *env, PyObject *key) {
+    return add_index((NativeEnvObject *) env, key);
+}
+
+static void
+api_store(PyObject *env, Py_ssize_t i, PyObject *value, int tid) {
+    NativeEnvObject *self = (NativeEnvObject *) env;
+    set_value(self, i, value);
+    self->types[i] = tid;
+    self->privs[i] = 0;
+}
+
+static PyObject *
+api_load(PyObject *env, Py_ssize_t i) {
+    return ((NativeEnvObject *) env)->values[i];
+}
+
+static void
+api_set(PyObject *env, Py_ssize_t i, PyObject *value) {
+    set_value((NativeEnvObject *) env, i, value);
+}
+
+static NativeEnvAPI native_env_api = {
+    NULL,
+    api_bind,
+    api_store,
+    type_id_of,
+    api_load,
+    api_set,
+};
+
 static PyObject *
 NativeEnv_bind_this(NativeEnvObject *self, PyObject *args) {
     PyObject *this_obj = NULL;
@@ -76,28 +496,7 @@ NativeEnv_bind_this(NativeEnvObject *self, PyObject *args) {
         return NULL;
     }
 
-    PyObject *key = PyUnicode_FromString("this");
-    if (!key)
-        return NULL;
-
-    Py_INCREF(this_obj);
-    Py_INCREF(Py_None);
-    Py_INCREF(Py_False);
-    PyObject *entry = PyTuple_Pack(3, this_obj, Py_None, Py_False);
-    if (!entry) {
-        Py_DECREF(key);
-        Py_DECREF(this_obj);
-        Py_DECREF(Py_None);
-        Py_DECREF(Py_False);
-        return NULL;
-    }
-
-    int result = PyDict_SetItem(self->vars, key, entry);
-
-    Py_DECREF(entry);
-    Py_DECREF(key);
-
-    if (result < 0) {
+    if (define_key(self, this_key, this_obj, 0, 0) < 0) {
         PyErr_SetString(PyExc_RuntimeError, "Failed to set 'this' in environment vars");
         return NULL;
     }
@@ -109,131 +508,62 @@ static PyObject *
 NativeEnv_define(NativeEnvObject *self, PyObject *args) {
     const char *name;
     PyObject *value;
-    const char *vtype = NULL;
+    PyObject *vtype = Py_None;
     int is_private = 0;
 
-    if (!PyArg_ParseTuple(args, "sO|sp", &name, &value, &vtype, &is_private))
-        return NULL;
-
-    PyObject *v_obj = value;
-    Py_INCREF(v_obj);
-
-    PyObject *vtype_obj;
-    if (vtype) {
-        vtype_obj = PyUnicode_FromString(vtype);
-        if (!vtype_obj) {
-            Py_DECREF(v_obj);
-            return NULL;
-        }
-    } else {
-        vtype_obj = Py_None;
-        Py_INCREF(Py_None);
-    }
-
-    PyObject *priv_obj = is_private ? Py_True : Py_False;
-    Py_INCREF(priv_obj);
-
-    PyObject *entry = PyTuple_Pack(3, v_obj, vtype_obj, priv_obj);
-    if (!entry) {
-        Py_DECREF(v_obj);
-        Py_DECREF(vtype_obj);
-        Py_DECREF(priv_obj);
+    if (!PyArg_ParseTuple(args, "sO|Op", &name, &value, &vtype, &is_private))
         return NULL;
-    }
 
-    int ret = PyDict_SetItemString(self->vars, name, entry);
+    int tid = type_id_of(vtype);
+    if (tid < 0) return NULL;
 
-    Py_DECREF(entry);
-    Py_DECREF(v_obj);
-    Py_DECREF(vtype_obj);
-    Py_DECREF(priv_obj);
+    PyObject *key = PyUnicode_FromString(name);
+    if (!key) return NULL;
+    int ret = define_key(self, key, value, tid, is_private);
+    Py_DECREF(key);
 
     if (ret < 0) return NULL;
     Py_RETURN_NONE;
 }
 
 static PyObject *
-NativeEnv_get(NativeEnvObject *self, PyObject *args) {
-    const char *name;
-    PyObject *origin = Py_None;
-
-    if (!PyArg_ParseTuple(args, "s|O", &name, &origin))
-        return NULL;
-
-    PyObject *key = PyUnicode_FromString(name);
-    if (!key) return NULL;
+private_error(PyObject *key) {
+    PyErr_Format(PyExc_PermissionError, "AccessError: '%U' is private", key);
+    return NULL;
+}
 
-    PyObject *entry = PyDict_GetItem(self->vars, key);
-    if (entry) {
-        if (!PyTuple_Check(entry) || PyTuple_Size(entry) != 3) {
-            Py_INCREF(entry);
-            Py_DECREF(key);
+static PyObject *
+env_get(NativeEnvObject *self, PyObject *key, PyObject *origin) {
+    NativeEnvObject *env = self;
+    PyObject *parent = NULL;
+    while (1) {
+        Py_ssize_t i = find_defined(env, key);
+        if (i >= 0) {
+            if (env->privs[i]) {
+                if (!origin || origin == Py_None)
+                    return private_error(key);
+                if (!is_env_descendant(origin, (PyObject *) env))
+                    return private_error(key);
+            }
+            PyObject *entry = entry_at(env, i);
+            Py_XINCREF(entry);
             return entry;
         }
 
-        PyObject *is_priv = PyTuple_GetItem(entry, 2);
-        int private_flag = PyObject_IsTrue(is_priv);
-
-        if (private_flag) {
-            if (!origin || origin == Py_None) {
-                Py_DECREF(key);
-                PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                return NULL;
-            }
-            if (!is_env_descendant(origin, (PyObject *) self)) {
-                Py_DECREF(key);
-                PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                return NULL;
-            }
+        parent = env->parent;
+        if (!parent || parent == Py_None) {
+            parent = NULL;
+            break;
         }
-
-        Py_INCREF(entry);
-        Py_DECREF(key);
-        return entry;
+        if (!PyObject_TypeCheck(parent, &NativeEnvType))
+            break;
+        env = (NativeEnvObject *) parent;
     }
 
-    PyObject *parent = self->parent;
+    /* Parents that are not native environments: anything with a vars dict
+       or a get method. */
     if (parent) Py_INCREF(parent);
     while (parent && parent != Py_None) {
-        if (PyObject_TypeCheck(parent, &NativeEnvType)) {
-            NativeEnvObject *pobj = (NativeEnvObject *) parent;
-            PyObject *pv = PyDict_GetItem(pobj->vars, key);
-            if (pv) {
-                if (PyTuple_Check(pv) && PyTuple_Size(pv) == 3) {
-                    PyObject *is_priv = PyTuple_GetItem(pv, 2);
-                    int private_flag = PyObject_IsTrue(is_priv);
-                    if (private_flag) {
-                        if (!origin || origin == Py_None) {
-                            Py_DECREF(parent);
-                            Py_DECREF(key);
-                            PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                            return NULL;
-                        }
-                        if (!is_env_descendant(origin, (PyObject *) pobj)) {
-                            Py_DECREF(parent);
-                            Py_DECREF(key);
-                            PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                            return NULL;
-                        }
-                    }
-                    Py_INCREF(pv);
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return pv;
-                } else {
-                    Py_INCREF(pv);
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return pv;
-                }
-            }
-            PyObject *next_parent = pobj->parent;
-            if (next_parent) Py_INCREF(next_parent);
-            Py_DECREF(parent);
-            parent = next_parent;
-            continue;
-        }
-
         PyObject *pvars = PyObject_GetAttrString(parent, "vars");
         if (pvars && PyDict_Check(pvars)) {
             PyObject *pv = PyDict_GetItem(pvars, key);
@@ -242,33 +572,17 @@ NativeEnv_get(NativeEnvObject *self, PyObject *args) {
                     PyObject *is_priv = PyTuple_GetItem(pv, 2);
                     int private_flag = PyObject_IsTrue(is_priv);
                     if (private_flag) {
-                        if (!origin || origin == Py_None) {
-                            Py_DECREF(pvars);
-                            Py_DECREF(parent);
-                            Py_DECREF(key);
-                            PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                            return NULL;
-                        }
-                        if (!is_env_descendant(origin, parent)) {
+                        if (!origin || origin == Py_None || !is_env_descendant(origin, parent)) {
                             Py_DECREF(pvars);
                             Py_DECREF(parent);
-                            Py_DECREF(key);
-                            PyErr_Format(PyExc_PermissionError, "AccessError: '%s' is private", name);
-                            return NULL;
+                            return private_error(key);
                         }
                     }
-                    Py_INCREF(pv);
-                    Py_DECREF(pvars);
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return pv;
-                } else {
-                    Py_INCREF(pv);
-                    Py_DECREF(pvars);
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return pv;
                 }
+                Py_INCREF(pv);
+                Py_DECREF(pvars);
+                Py_DECREF(parent);
+                return pv;
             }
             Py_DECREF(pvars);
         } else {
@@ -277,15 +591,8 @@ NativeEnv_get(NativeEnvObject *self, PyObject *args) {
             if (get_m && PyCallable_Check(get_m)) {
                 PyObject *res = PyObject_CallFunctionObjArgs(get_m, key, NULL);
                 Py_DECREF(get_m);
-                if (res) {
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return res;
-                } else {
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return NULL;
-                }
+                Py_DECREF(parent);
+                return res;
             }
             Py_XDECREF(get_m);
             PyErr_Clear();
@@ -301,98 +608,37 @@ NativeEnv_get(NativeEnvObject *self, PyObject *args) {
         parent = next_parent;
     }
 
-    Py_DECREF(key);
-    PyErr_Format(PyExc_Exception, "Variable '%s' not defined", name);
+    PyErr_Format(PyExc_Exception, "Variable '%U' not defined", key);
     return NULL;
 }
 
 static PyObject *
-NativeEnv_assign(NativeEnvObject *self, PyObject *args) {
-    const char *name;
-    PyObject *value;
-    if (!PyArg_ParseTuple(args, "sO", &name, &value))
-        return NULL;
-
-    PyObject *key = PyUnicode_FromString(name);
-    if (!key)
-        return NULL;
-
-    PyObject *entry = PyDict_GetItem(self->vars, key);
-    if (entry) {
-        if (PyTuple_Check(entry) && PyTuple_Size(entry) == 3) {
-            PyObject *old_vtype = PyTuple_GetItem(entry, 1);
-            PyObject *old_priv = PyTuple_GetItem(entry, 2);
-
-            if (old_vtype != Py_None && PyUnicode_Check(old_vtype)) {
-                const char *expected_type_name = PyUnicode_AsUTF8(old_vtype);
-                if (!expected_type_name) {
-                    Py_DECREF(key);
-                    return NULL;
-                }
-
-                if (strcmp(expected_type_name, "auto") != 0) {
-                    const char *actual_type_name = Py_TYPE(value)->tp_name;
-                    if (strcmp(expected_type_name, actual_type_name) != 0) {
-                        Py_DECREF(key);
-                        PyErr_Format(PyExc_TypeError,
-                            "TypeError: cannot assign value of type '%s' to variable '%s' of type '%s'",
-                            actual_type_name, name, expected_type_name);
-                        return NULL;
-                    }
-                }
-            }
-
-            Py_INCREF(value);
-            Py_INCREF(old_vtype);
-            Py_INCREF(old_priv);
-
-            PyObject *new_entry = PyTuple_Pack(3, value, old_vtype, old_priv);
-            if (!new_entry) {
-                Py_DECREF(value);
-                Py_DECREF(old_vtype);
-                Py_DECREF(old_priv);
-                Py_DECREF(key);
-                return NULL;
-            }
-
-            int res = PyDict_SetItem(self->vars, key, new_entry);
-            Py_DECREF(new_entry);
-            Py_DECREF(key);
-
-            if (res < 0)
+env_assign(NativeEnvObject *self, PyObject *key, PyObject *value) {
+    NativeEnvObject *env = self;
+    PyObject *parent;
+    while (1) {
+        Py_ssize_t i = find_defined(env, key);
+        if (i >= 0) {
+            if (check_type(env->types[i], value, key) < 0)
                 return NULL;
-
-            Py_RETURN_NONE;
-        } else {
-            Py_INCREF(value);
-            if (PyDict_SetItem(self->vars, key, value) < 0) {
-                Py_DECREF(value);
-                Py_DECREF(key);
-                return NULL;
-            }
-            Py_DECREF(key);
+            set_value(env, i, value);
             Py_RETURN_NONE;
         }
-    }
 
-    PyObject *parent = self->parent;
-    if (parent && parent != Py_None) {
-        if (PyObject_TypeCheck(parent, &NativeEnvType)) {
-            NativeEnvObject *pobj = (NativeEnvObject *)parent;
-            PyObject *res = PyObject_CallMethod((PyObject *)pobj, "assign", "sO", name, value);
-            if (!res) {
-                Py_DECREF(key);
-                return NULL;
-            }
-            Py_DECREF(res);
-            Py_DECREF(key);
-            Py_RETURN_NONE;
+        parent = env->parent;
+        if (!parent || parent == Py_None) {
+            parent = NULL;
+            break;
         }
+        if (!PyObject_TypeCheck(parent, &NativeEnvType))
+            break;
+        env = (NativeEnvObject *) parent;
+    }
 
-        PyObject *res = PyObject_CallMethod(parent, "assign", "sO", name, value);
+    if (parent) {
+        PyObject *res = PyObject_CallMethod(parent, "assign", "OO", key, value);
         if (res) {
             Py_DECREF(res);
-            Py_DECREF(key);
             Py_RETURN_NONE;
         }
         PyErr_Clear();
@@ -400,6 +646,7 @@ NativeEnv_assign(NativeEnvObject *self, PyObject *args) {
         PyObject *pvars = PyObject_GetAttrString(parent, "vars");
         if (pvars && PyDict_Check(pvars)) {
             PyObject *old = PyDict_GetItem(pvars, key);
+            PyObject *new_entry;
             if (old && PyTuple_Check(old) && PyTuple_Size(old) == 3) {
                 PyObject *old_vtype = PyTuple_GetItem(old, 1);
                 PyObject *old_priv = PyTuple_GetItem(old, 2);
@@ -407,7 +654,6 @@ NativeEnv_assign(NativeEnvObject *self, PyObject *args) {
                 if (old_vtype != Py_None && PyUnicode_Check(old_vtype)) {
                     const char *expected_type_name = PyUnicode_AsUTF8(old_vtype);
                     if (!expected_type_name) {
-                        Py_DECREF(key);
                         Py_DECREF(pvars);
                         return NULL;
                     }
@@ -415,59 +661,81 @@ NativeEnv_assign(NativeEnvObject *self, PyObject *args) {
                     if (strcmp(expected_type_name, "auto") != 0) {
                         const char *actual_type_name = Py_TYPE(value)->tp_name;
                         if (strcmp(expected_type_name, actual_type_name) != 0) {
-                            Py_DECREF(key);
                             Py_DECREF(pvars);
                             PyErr_Format(PyExc_TypeError,
-                                "TypeError: cannot assign value of type '%s' to variable '%s' of type '%s'",
-                                actual_type_name, name, expected_type_name);
+                                "TypeError: cannot assign value of type '%s' to variable '%U' of type '%s'",
+                                actual_type_name, key, expected_type_name);
                             return NULL;
                         }
                     }
                 }
 
-                Py_INCREF(value);
-                Py_INCREF(old_vtype);
-                Py_INCREF(old_priv);
-
-                PyObject *new_entry = PyTuple_Pack(3, value, old_vtype, old_priv);
+                new_entry = PyTuple_Pack(3, value, old_vtype, old_priv);
                 if (!new_entry) {
-                    Py_DECREF(key);
-                    Py_DECREF(pvars);
-                    return NULL;
-                }
-
-                if (PyDict_SetItem(pvars, key, new_entry) < 0) {
-                    Py_DECREF(new_entry);
-                    Py_DECREF(key);
                     Py_DECREF(pvars);
                     return NULL;
                 }
-
-                Py_DECREF(new_entry);
-                Py_DECREF(pvars);
-                Py_DECREF(key);
-                Py_RETURN_NONE;
             } else {
-                Py_INCREF(value);
-                if (PyDict_SetItem(pvars, key, value) < 0) {
-                    Py_DECREF(value);
-                    Py_DECREF(pvars);
-                    Py_DECREF(key);
-                    return NULL;
-                }
-                Py_DECREF(pvars);
-                Py_DECREF(key);
-                Py_RETURN_NONE;
+                new_entry = value;
+                Py_INCREF(new_entry);
             }
+
+            int res = PyDict_SetItem(pvars, key, new_entry);
+            Py_DECREF(new_entry);
+            Py_DECREF(pvars);
+            if (res < 0)
+                return NULL;
+            Py_RETURN_NONE;
         }
         Py_XDECREF(pvars);
     }
 
-    Py_DECREF(key);
-    PyErr_Format(PyExc_Exception, "Variable '%s' not defined", name);
+    PyErr_Format(PyExc_Exception, "Variable '%U' not defined", key);
     return NULL;
 }
 
+static PyObject *
+env_has(NativeEnvObject *self, PyObject *key) {
+    PyObject *cur = (PyObject *) self;
+    while (cur && cur != Py_None && PyObject_TypeCheck(cur, &NativeEnvType)) {
+        NativeEnvObject *env = (NativeEnvObject *) cur;
+        if (find_defined(env, key) >= 0)
+            Py_RETURN_TRUE;
+        cur = env->parent;
+    }
+    Py_RETURN_FALSE;
+}
+
+static PyObject *
+NativeEnv_get(NativeEnvObject *self, PyObject *args) {
+    const char *name;
+    PyObject *origin = Py_None;
+
+    if (!PyArg_ParseTuple(args, "s|O", &name, &origin))
+        return NULL;
+
+    PyObject *key = PyUnicode_FromString(name);
+    if (!key) return NULL;
+    PyObject *res = env_get(self, key, origin);
+    Py_DECREF(key);
+    return res;
+}
+
+static PyObject *
+NativeEnv_assign(NativeEnvObject *self, PyObject *args) {
+    const char *name;
+    PyObject *value;
+    if (!PyArg_ParseTuple(args, "sO", &name, &value))
+        return NULL;
+
+    PyObject *key = PyUnicode_FromString(name);
+    if (!key)
+        return NULL;
+    PyObject *res = env_assign(self, key, value);
+    Py_DECREF(key);
+    return res;
+}
+
 static PyObject *
 NativeEnv_has(NativeEnvObject *self, PyObject *args) {
     const char *name;
@@ -477,64 +745,246 @@ NativeEnv_has(NativeEnvObject *self, PyObject *args) {
     PyObject *key = PyUnicode_FromString(name);
     if (!key)
         return NULL;
+    PyObject *res = env_has(self, key);
+    Py_DECREF(key);
+    return res;
+}
 
-    int contains = PyDict_Contains(self->vars, key);
-    if (contains == 1) {
-        Py_DECREF(key);
-        Py_RETURN_TRUE;
-    } else if (contains < 0) {
-        Py_DECREF(key);
+/* The *_key methods take the name as a str object, normally the interned
+   identifier held by the AST node, and use it as the lookup key as is, so
+   no string is created and its cached hash is reused. */
+static int
+check_key(PyObject *key) {
+    if (PyUnicode_CheckExact(key))
+        return 0;
+    PyErr_Format(PyExc_TypeError, "name must be a str, not %.100s", Py_TYPE(key)->tp_name);
+    return -1;
+}
+
+static PyObject *
+NativeEnv_get_key(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs < 1 || nargs > 2) {
+        PyErr_SetString(PyExc_TypeError, "get_key(name, origin_env=None) takes 1 or 2 arguments");
         return NULL;
     }
+    if (check_key(args[0]) < 0)
+        return NULL;
+    return env_get(self, args[0], nargs > 1 ? args[1] : Py_None);
+}
 
-    PyObject *parent = self->parent;
-    if (parent && parent != Py_None) {
-        Py_INCREF(parent);
-        while (parent && parent != Py_None) {
-            if (PyObject_TypeCheck(parent, &NativeEnvType)) {
-                NativeEnvObject *pobj = (NativeEnvObject *) parent;
-                int pcontains = PyDict_Contains(pobj->vars, key);
-                if (pcontains == 1) {
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    Py_RETURN_TRUE;
-                } else if (pcontains < 0) {
-                    Py_DECREF(parent);
-                    Py_DECREF(key);
-                    return NULL;
-                }
-                PyObject *next_parent = pobj->parent;
-                if (next_parent)
-                    Py_INCREF(next_parent);
-                Py_DECREF(parent);
-                parent = next_parent;
-            } else {
-                Py_DECREF(parent);
-                break;
-            }
-        }
+static PyObject *
+NativeEnv_define_key(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs < 2 || nargs > 4) {
+        PyErr_SetString(PyExc_TypeError, "define_key(name, value, vtype=None, is_private=False) takes 2 to 4 arguments");
+        return NULL;
     }
+    if (check_key(args[0]) < 0)
+        return NULL;
 
-    Py_DECREF(key);
-    Py_RETURN_FALSE;
+    int tid = type_id_of(nargs > 2 ? args[2] : Py_None);
+    if (tid < 0) return NULL;
+    int is_private = nargs > 3 ? PyObject_IsTrue(args[3]) : 0;
+    if (is_private < 0) return NULL;
+
+    if (define_key(self, args[0], args[1], tid, is_private) < 0)
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+NativeEnv_assign_key(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs != 2) {
+        PyErr_SetString(PyExc_TypeError, "assign_key(name, value) takes 2 arguments");
+        return NULL;
+    }
+    if (check_key(args[0]) < 0)
+        return NULL;
+    return env_assign(self, args[0], args[1]);
+}
+
+static PyObject *
+NativeEnv_has_key(NativeEnvObject *self, PyObject *key) {
+    if (check_key(key) < 0)
+        return NULL;
+    return env_has(self, key);
+}
+
+/* Finds the env `depth` parents up and checks that it was created with
+   `layout`; returns NULL (without an error set) when it was not, so the
+   caller can fall back to a lookup by name. */
+static NativeEnvObject *
+slot_env(NativeEnvObject *self, PyObject *const *args, Py_ssize_t *slot) {
+    Py_ssize_t depth = PyLong_AsSsize_t(args[0]);
+    Py_ssize_t i = PyLong_AsSsize_t(args[1]);
+    if ((depth == -1 || i == -1) && PyErr_Occurred()) {
+        PyErr_Clear();
+        return NULL;
+    }
+
+    NativeEnvObject *env = self;
+    while (depth-- > 0) {
+        PyObject *parent = env->parent;
+        if (!parent || !PyObject_TypeCheck(parent, &NativeEnvType))
+            return NULL;
+        env = (NativeEnvObject *) parent;
+    }
+    if (env->layout != args[2] || i < 0 || i >= env->nslots)
+        return NULL;
+    *slot = i;
+    return env;
+}
+
+static PyObject *
+NativeEnv_get_slot(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs != 3) {
+        PyErr_SetString(PyExc_TypeError, "get_slot(depth, slot, layout) takes 3 arguments");
+        return NULL;
+    }
+
+    Py_ssize_t i;
+    NativeEnvObject *env = slot_env(self, args, &i);
+
+    /* Private entries go through get() so its access rules still apply. */
+    if (!env || !env->values[i] || env->privs[i])
+        Py_RETURN_NONE;
+
+    PyObject *entry = entry_at(env, i);
+    Py_XINCREF(entry);
+    return entry;
+}
+
+/* Like get_slot, but returns the bare value when unwrapping the entry would
+   give the same thing (anything but None or a 3-tuple), so callers that only
+   need the value do not make the entry tuple be built. */
+static PyObject *
+NativeEnv_get_slot_value(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs != 3) {
+        PyErr_SetString(PyExc_TypeError, "get_slot_value(depth, slot, layout) takes 3 arguments");
+        return NULL;
+    }
+
+    Py_ssize_t i;
+    NativeEnvObject *env = slot_env(self, args, &i);
+    if (!env || !env->values[i] || env->privs[i])
+        Py_RETURN_NONE;
+
+    PyObject *value = env->values[i];
+    if (value == Py_None || (PyTuple_Check(value) && PyTuple_GET_SIZE(value) == 3))
+        value = entry_at(env, i);
+    Py_XINCREF(value);
+    return value;
+}
+
+static PyObject *
+NativeEnv_assign_slot(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs != 4) {
+        PyErr_SetString(PyExc_TypeError, "assign_slot(depth, slot, layout, value) takes 4 arguments");
+        return NULL;
+    }
+
+    Py_ssize_t i;
+    NativeEnvObject *env = slot_env(self, args, &i);
+    if (!env || !env->values[i])
+        Py_RETURN_FALSE;
+
+    /* A type mismatch is reported by assign(), which knows the name. */
+    PyObject *value = args[3];
+    if (type_mismatch(env->types[i], value))
+        Py_RETURN_FALSE;
+
+    set_value(env, i, value);
+    Py_RETURN_TRUE;
+}
+
+static PyObject *
+make_child(NativeEnvObject *self, PyObject *layout) {
+    NativeEnvObject *child = env_alloc(&NativeEnvType);
+    if (!child)
+        return NULL;
+    if (layout != Py_None && set_layout(child, layout) < 0) {
+        Py_DECREF(child);
+        return NULL;
+    }
+    set_parent(child, (PyObject *) self);
+    return (PyObject *) child;
+}
+
+/* Environment(parent=self, layout=layout) without the argument parsing,
+   for the interpreter's per-call and per-block scopes. */
+static PyObject *
+NativeEnv_child(NativeEnvObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (nargs > 1) {
+        PyErr_SetString(PyExc_TypeError, "child(layout=None) takes at most 1 argument");
+        return NULL;
+    }
+    return make_child(self, nargs ? args[0] : Py_None);
 }
 
 static PyObject *
 NativeEnv_new_child_env(NativeEnvObject *self, PyObject *Py_UNUSED(ignored)) {
-    PyObject *args = PyTuple_Pack(1, (PyObject *)self);
-    if (!args)
+    return make_child(self, Py_None);
+}
+
+static PyObject *
+NativeEnv_set_class_scope(NativeEnvObject *self, PyObject *Py_UNUSED(ignored)) {
+    if (self->scope == (PyObject *) self)
+        Py_RETURN_NONE;
+    if (self->depth == 0) {
+        PyErr_SetString(PyExc_ValueError, "a root environment cannot be a class scope");
         return NULL;
+    }
+    self->scope = (PyObject *) self;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+NativeEnv_descends_from(NativeEnvObject *self, PyObject *declaring) {
+    return PyBool_FromLong(is_env_descendant((PyObject *) self, declaring));
+}
 
-    PyObject *kwargs = NULL;
+static int
+add_entries(NativeEnvObject *self, PyObject *dict, PyObject *index) {
+    PyObject *name, *idx;
+    Py_ssize_t pos = 0;
+    while (PyDict_Next(index, &pos, &name, &idx)) {
+        Py_ssize_t i = PyLong_AsSsize_t(idx);
+        if (i < 0 || i >= self->size || !self->values[i]) {
+            PyErr_Clear();
+            continue;
+        }
+        if (index == self->layout && i >= self->nslots)
+            continue;
+        PyObject *entry = entry_at(self, i);
+        if (!entry || PyDict_SetItem(dict, name, entry) < 0)
+            return -1;
+    }
+    return 0;
+}
 
-    PyObject *child_env = PyObject_Call((PyObject *)&NativeEnvType, args, kwargs);
-    Py_DECREF(args);
-    return child_env;
+/* Snapshot of the defined names as a {name: (value, vtype, is_private)}
+   dict, for callers that iterate over an environment. */
+static PyObject *
+NativeEnv_get_vars(NativeEnvObject *self, void *closure) {
+    PyObject *dict = PyDict_New();
+    if (!dict) return NULL;
+    if ((self->layout && add_entries(self, dict, self->layout) < 0) ||
+        (self->names && add_entries(self, dict, self->names) < 0)) {
+        Py_DECREF(dict);
+        return NULL;
+    }
+    return dict;
 }
 
 static PyMemberDef NativeEnv_members[] = {
-    {"parent", T_OBJECT_EX, offsetof(NativeEnvObject, parent), 0, "parent environment"},
-    {"vars", T_OBJECT_EX, offsetof(NativeEnvObject, vars), 0, "variables dict"},
+    {"parent", T_OBJECT_EX, offsetof(NativeEnvObject, parent), READONLY, "parent environment"},
+    {"depth", T_PYSSIZET, offsetof(NativeEnvObject, depth), READONLY, "number of native ancestors"},
+    {"version", T_ULONGLONG, offsetof(NativeEnvObject, version), READONLY, "bumped whenever a binding is defined or assigned"},
+    {"layout", T_OBJECT, offsetof(NativeEnvObject, layout), READONLY, "slot layout or None"},
+    {NULL}
+};
+
+static PyGetSetDef NativeEnv_getset[] = {
+    {"vars", (getter) NativeEnv_get_vars, NULL, "variables dict (a snapshot)", NULL},
     {NULL}
 };
 
@@ -544,6 +994,16 @@ static PyMethodDef NativeEnv_methods[] = {
     {"assign", (PyCFunction) NativeEnv_assign, METH_VARARGS, "Assign variable: assign(name, value)"},
     {"bind_this", (PyCFunction) NativeEnv_bind_this, METH_VARARGS, "Bind 'this' to environment"},
     {"has", (PyCFunction) NativeEnv_has, METH_VARARGS, "Check if variable exists"},
+    {"get_key", (PyCFunction)(void(*)(void)) NativeEnv_get_key, METH_FASTCALL, "get() with the name passed as a str key: get_key(name, origin_env=None)"},
+    {"define_key", (PyCFunction)(void(*)(void)) NativeEnv_define_key, METH_FASTCALL, "define() with the name passed as a str key: define_key(name, value, vtype=None, is_private=False)"},
+    {"assign_key", (PyCFunction)(void(*)(void)) NativeEnv_assign_key, METH_FASTCALL, "assign() with the name passed as a str key: assign_key(name, value)"},
+    {"has_key", (PyCFunction) NativeEnv_has_key, METH_O, "has() with the name passed as a str key: has_key(name)"},
+    {"get_slot", (PyCFunction)(void(*)(void)) NativeEnv_get_slot, METH_FASTCALL, "Get variable by resolved slot: get_slot(depth, slot, layout), None if unresolved"},
+    {"get_slot_value", (PyCFunction)(void(*)(void)) NativeEnv_get_slot_value, METH_FASTCALL, "Value of a resolved slot for callers that unwrap it: get_slot_value(depth, slot, layout), None if unresolved"},
+    {"assign_slot", (PyCFunction)(void(*)(void)) NativeEnv_assign_slot, METH_FASTCALL, "Assign variable by resolved slot: assign_slot(depth, slot, layout, value), False if unresolved"},
+    {"child", (PyCFunction)(void(*)(void)) NativeEnv_child, METH_FASTCALL, "Create a child environment: child(layout=None)"},
+    {"set_class_scope", (PyCFunction) NativeEnv_set_class_scope, METH_NOARGS, "Mark this env as the class scope of every env created under it; call before creating children"},
+    {"descends_from", (PyCFunction) NativeEnv_descends_from, METH_O, "True if this env is env or nested in it: descends_from(env)"},
     {"new_child_env", (PyCFunction) NativeEnv_new_child_env, METH_NOARGS, "Create new child environment"},
     {NULL}
 };
@@ -557,9 +1017,10 @@ static PyTypeObject NativeEnvType = {
     .tp_doc = "Native Environment object",
     .tp_methods = NativeEnv_methods,
     .tp_members = NativeEnv_members,
+    .tp_getset = NativeEnv_getset,
     .tp_init = (initproc) NativeEnv_init,
     .tp_dealloc = (destructor) NativeEnv_dealloc,
-    .tp_new = PyType_GenericNew,
+    .tp_new = NativeEnv_new,
 };
 
 static PyModuleDef native_env_module = {
@@ -577,6 +1038,40 @@ PyInit_native_env(void) {
     if (PyType_Ready(&NativeEnvType) < 0)
         return NULL;
 
+    if (!this_key) {
+        this_key = PyUnicode_InternFromString("this");
+        if (!this_key)
+            return NULL;
+    }
+
+    if (!type_ids) {
+        type_ids = PyDict_New();
+        if (!type_ids)
+            return NULL;
+        PyObject *auto_name = PyUnicode_FromString("auto");
+        if (!auto_name)
+            return NULL;
+        ntypes = 1;  /* id 0: no declared type */
+        auto_type_id = type_id_of(auto_name);
+        Py_DECREF(auto_name);
+        if (auto_type_id < 0)
+            return NULL;
+        type_names[0] = NULL;
+        type_matches[0] = NULL;
+    }
+
+    if (!native_env_api.env_type) {
+        native_env_api.env_type = &NativeEnvType;
+        PyObject *capsule = PyCapsule_New(&native_env_api, NATIVE_ENV_API_NAME, NULL);
+        if (!capsule)
+            return NULL;
+        int res = PyDict_SetItemString(NativeEnvType.tp_dict, "_C_API", capsule);
+        Py_DECREF(capsule);
+        if (res < 0)
+            return NULL;
+        PyType_Modified(&NativeEnvType);
+    }
+
     m = PyModule_Create(&native_env_module);
     if (!m)
         return NULL;
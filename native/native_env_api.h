@@ -0,0 +1,27 @@
+#ifndef NATIVE_ENV_API_H
+#define NATIVE_ENV_API_H
+
+#include <Python.h>
+
+/* Functions native_env shares with the other extensions, published as a
+   capsule in Environment._C_API, so they can bind names without going
+   through the Python-level methods. */
+#define NATIVE_ENV_API_NAME "native_env.Environment._C_API"
+
+typedef struct {
+    PyTypeObject *env_type;
+    /* Index of the binding for key in env, made room for if env has none
+       yet; -1 with an exception set on failure. The index stays valid for
+       the env's lifetime. */
+    Py_ssize_t (*bind)(PyObject *env, PyObject *key);
+    /* Defines the binding at index i as a public value declared as tid. */
+    void (*store)(PyObject *env, Py_ssize_t i, PyObject *value, int tid);
+    /* Id of a declared type name, as define() would use; -1 on error. */
+    int (*type_id)(PyObject *vtype);
+    /* Borrowed value at index i, NULL if it is not defined. */
+    PyObject *(*load)(PyObject *env, Py_ssize_t i);
+    /* Replaces the value at index i without checking its declared type. */
+    void (*set)(PyObject *env, Py_ssize_t i, PyObject *value);
+} NativeEnvAPI;
+
+#endif
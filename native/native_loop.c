@@ -1,5 +1,48 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
+#include "native_env_api.h"
+
+/* Statements complete normally by returning anything but a Completion.
+   BREAK and CONTINUE are handled by the loop; any other Completion (a
+   return) ends the loop and is handed back to the caller. Statements are
+   passed to visit_method, or called with no arguments when it is None
+   (the closure engine's compiled statements). */
+enum { BODY_NEXT, BODY_BREAK, BODY_CONTINUE, BODY_EXIT };
+
+static PyObject *
+visit_node(PyObject *visit_method, PyObject *node) {
+    return visit_method == Py_None
+        ? PyObject_CallNoArgs(node)
+        : PyObject_CallOneArg(visit_method, node);
+}
+
+static int
+run_body(PyObject *body_list, PyObject *visit_method, PyObject *completion_type,
+         PyObject *break_signal, PyObject *continue_signal, PyObject **exit_signal) {
+    Py_ssize_t i, n = PyList_Size(body_list);
+    for (i = 0; i < n; i++) {
+        PyObject *stmt = PyList_GET_ITEM(body_list, i);
+        PyObject *res = visit_node(visit_method, stmt);
+        if (!res) {
+            *exit_signal = NULL;
+            return BODY_EXIT;
+        }
+        if ((PyObject *)Py_TYPE(res) == completion_type) {
+            if (res == break_signal) {
+                Py_DECREF(res);
+                return BODY_BREAK;
+            }
+            if (res == continue_signal) {
+                Py_DECREF(res);
+                return BODY_CONTINUE;
+            }
+            *exit_signal = res;
+            return BODY_EXIT;
+        }
+        Py_DECREF(res);
+    }
+    return BODY_NEXT;
+}
 
 static PyObject *
 native_while_loop(PyObject *self, PyObject *args) {
@@ -7,190 +50,505 @@ native_while_loop(PyObject *self, PyObject *args) {
     PyObject *cond_node;
     PyObject *body_list;
     PyObject *visit_method;
-    PyObject *break_exc;
-    PyObject *continue_exc;
+    PyObject *completion_type;
+    PyObject *break_signal;
+    PyObject *continue_signal;
+    PyObject *exit_signal;
 
-    if (!PyArg_ParseTuple(args, "OOOOOO", &visitor, &cond_node, &body_list, &break_exc, &continue_exc, &visit_method))
+    if (!PyArg_ParseTuple(args, "OOOOOOO", &visitor, &cond_node, &body_list, &completion_type, &break_signal, &continue_signal, &visit_method))
         return NULL;
 
     while (1) {
-        PyObject *cond_res = PyObject_CallFunctionObjArgs(visit_method, cond_node, NULL);
+        PyObject *cond_res = PyObject_CallOneArg(visit_method, cond_node);
         if (!cond_res) return NULL;
 
         int cond_truth = PyObject_IsTrue(cond_res);
         Py_DECREF(cond_res);
-        if (cond_truth <= 0) break;
+        if (cond_truth < 0) return NULL;
+        if (cond_truth == 0) break;
 
-        Py_ssize_t i, n = PyList_Size(body_list);
-        for (i = 0; i < n; i++) {
-            PyObject *stmt = PyList_GetItem(body_list, i);
-            PyObject *res = PyObject_CallFunctionObjArgs(visit_method, stmt, NULL);
-            if (!res) {
-                if (PyErr_ExceptionMatches(break_exc)) {
-                    PyErr_Clear();
-                    goto loop_break;
-                }
-                if (PyErr_ExceptionMatches(continue_exc)) {
-                    PyErr_Clear();
-                    goto loop_continue;
-                }
-                return NULL;
-            }
-            Py_DECREF(res);
+        switch (run_body(body_list, visit_method, completion_type, break_signal, continue_signal, &exit_signal)) {
+        case BODY_BREAK:
+            Py_RETURN_NONE;
+        case BODY_EXIT:
+            return exit_signal;
         }
-    loop_continue:
-        ;
     }
 
-loop_break:
     Py_RETURN_NONE;
 }
 
+/* The loop variable is written straight into its slot through native_env's
+   C API. Items of the common builtin types get their declared type from
+   item_types without calling back into Python; the ids are looked up once,
+   the first time a loop runs. */
+static const NativeEnvAPI *env_api;
+
+enum { ITEM_INT, ITEM_FLOAT, ITEM_BOOL, ITEM_STR, ITEM_LIST, ITEM_TUPLE, ITEM_MAP, ITEM_NULL, ITEM_KINDS };
+static const char *item_type_names[ITEM_KINDS] = {"int", "float", "bool", "str", "list", "tuple", "map", "null"};
+static int item_types[ITEM_KINDS];
+
+static const NativeEnvAPI *
+load_env_api(PyObject *env) {
+    PyObject *capsule = PyObject_GetAttrString((PyObject *) Py_TYPE(env), "_C_API");
+    if (!capsule) {
+        PyErr_Clear();
+        return NULL;
+    }
+    const NativeEnvAPI *api = PyCapsule_GetPointer(capsule, NATIVE_ENV_API_NAME);
+    Py_DECREF(capsule);
+    if (!api) return NULL;
+
+    for (int k = 0; k < ITEM_KINDS; k++) {
+        PyObject *name = PyUnicode_InternFromString(item_type_names[k]);
+        if (!name) return NULL;
+        item_types[k] = api->type_id(name);
+        Py_DECREF(name);
+        if (item_types[k] < 0) return NULL;
+    }
+    env_api = api;
+    return api;
+}
+
+/* The type id get_type_name would give item, or -1 if it has to be asked. */
+static int
+builtin_item_type(PyObject *item) {
+    PyTypeObject *tp = Py_TYPE(item);
+    if (tp == &PyLong_Type) return item_types[ITEM_INT];
+    if (tp == &PyFloat_Type) return item_types[ITEM_FLOAT];
+    if (tp == &PyUnicode_Type) return item_types[ITEM_STR];
+    if (tp == &PyBool_Type) return item_types[ITEM_BOOL];
+    if (tp == &PyList_Type) return item_types[ITEM_LIST];
+    if (tp == &PyDict_Type) return item_types[ITEM_MAP];
+    if (item == Py_None) return item_types[ITEM_NULL];
+    /* A 3-tuple reads as a (value, vtype, is_private) entry. */
+    if (tp == &PyTuple_Type && PyTuple_GET_SIZE(item) != 3) return item_types[ITEM_TUPLE];
+    return -1;
+}
+
+typedef struct {
+    PyObject *env;
+    PyObject *var_name;
+    PyObject *get_type_name;
+    const NativeEnvAPI *api;
+    Py_ssize_t slot;
+} LoopVar;
+
+static int
+bind_item(LoopVar *var, PyObject *item) {
+    PyObject *vtype;
+    int tid;
+
+    if (!var->api) {
+        vtype = PyObject_CallOneArg(var->get_type_name, item);
+        if (!vtype) return -1;
+        PyObject *res = PyObject_CallMethod(var->env, "define_key", "OOOO", var->var_name, item, vtype, Py_False);
+        Py_DECREF(vtype);
+        if (!res) return -1;
+        Py_DECREF(res);
+        return 0;
+    }
+
+    tid = builtin_item_type(item);
+    if (tid < 0) {
+        vtype = PyObject_CallOneArg(var->get_type_name, item);
+        if (!vtype) return -1;
+        tid = var->api->type_id(vtype);
+        Py_DECREF(vtype);
+        if (tid < 0) return -1;
+    }
+    if (var->slot < 0) {
+        var->slot = var->api->bind(var->env, var->var_name);
+        if (var->slot < 0) return -1;
+    }
+    var->api->store(var->env, var->slot, item, tid);
+    return 0;
+}
+
+/* Where the items come from: a list read by index (so it may grow while
+   the loop runs, as with Python's own list iterator), a range counted in C
+   without creating an iterator, or any other iterable. */
+typedef struct {
+    PyObject *list;
+    PyObject *iterator;
+    Py_ssize_t index;
+    Py_ssize_t left;
+    long long value;
+    long long step;
+} ItemSource;
+
+static int
+range_bound(PyObject *range, const char *attr, long long *out) {
+    PyObject *obj = PyObject_GetAttrString(range, attr);
+    if (!obj) return -1;
+    int overflow;
+    *out = PyLong_AsLongLongAndOverflow(obj, &overflow);
+    Py_DECREF(obj);
+    if (*out == -1 && PyErr_Occurred()) return -1;
+    return overflow ? 0 : 1;
+}
+
+/* 1 if src was set up, 0 if it must fall back to the iterator, -1 on error.
+   Only ranges whose start and stop both fit a long long are counted in C,
+   so every value in between fits as well. */
+static int
+open_range(ItemSource *src, PyObject *range) {
+    long long start, stop, step;
+    int ok;
+    if ((ok = range_bound(range, "start", &start)) <= 0 ||
+        (ok = range_bound(range, "stop", &stop)) <= 0 ||
+        (ok = range_bound(range, "step", &step)) <= 0)
+        return ok;
+    (void) stop;
+
+    Py_ssize_t n = PyObject_Size(range);
+    if (n < 0) {
+        if (!PyErr_ExceptionMatches(PyExc_OverflowError)) return -1;
+        PyErr_Clear();
+        return 0;
+    }
+    src->left = n;
+    src->value = start;
+    src->step = step;
+    return 1;
+}
+
+static int
+open_source(ItemSource *src, PyObject *iterable) {
+    memset(src, 0, sizeof(*src));
+    if (PyList_CheckExact(iterable)) {
+        Py_INCREF(iterable);
+        src->list = iterable;
+        return 0;
+    }
+    if (PyRange_Check(iterable)) {
+        int ok = open_range(src, iterable);
+        if (ok < 0) return -1;
+        if (ok) return 0;
+    }
+    src->iterator = PyObject_GetIter(iterable);
+    return src->iterator ? 0 : -1;
+}
+
+/* New reference to the next item, or NULL when done or on error. */
+static PyObject *
+next_item(ItemSource *src) {
+    if (src->list) {
+        if (src->index >= PyList_GET_SIZE(src->list)) return NULL;
+        PyObject *item = PyList_GET_ITEM(src->list, src->index++);
+        Py_INCREF(item);
+        return item;
+    }
+    if (src->iterator)
+        return PyIter_Next(src->iterator);
+    if (src->left <= 0) return NULL;
+    PyObject *item = PyLong_FromLongLong(src->value);
+    /* The last step is skipped so value never runs past stop. */
+    if (--src->left > 0) src->value += src->step;
+    return item;
+}
+
+static void
+close_source(ItemSource *src) {
+    Py_CLEAR(src->list);
+    Py_CLEAR(src->iterator);
+}
+
 static PyObject *
 native_for_loop(PyObject *self, PyObject *args) {
     PyObject *visitor;
-    PyObject *iterable_expr;
-    PyObject *var_name;
+    PyObject *iterable;
     PyObject *body_list;
-    PyObject *env;
-    PyObject *break_exc;
-    PyObject *continue_exc;
+    PyObject *completion_type;
+    PyObject *break_signal;
+    PyObject *continue_signal;
     PyObject *visit_method;
+    PyObject *exit_signal;
+    LoopVar var;
+    ItemSource src;
 
-    if (!PyArg_ParseTuple(args, "OOOOOOOO", &visitor, &iterable_expr, &var_name, &body_list, &env, &break_exc, &continue_exc, &visit_method))
+    if (!PyArg_ParseTuple(args, "OOUOOOOOOO", &visitor, &iterable, &var.var_name, &body_list, &var.env, &var.get_type_name, &completion_type, &break_signal, &continue_signal, &visit_method))
         return NULL;
 
-    PyObject *iterable = PyObject_CallFunctionObjArgs(visit_method, iterable_expr, NULL);
-    if (!iterable) return NULL;
-
-    if (!PyObject_HasAttrString(iterable, "__iter__")) {
-        Py_DECREF(iterable);
-        PyErr_SetString(PyExc_TypeError, "Object is not iterable");
-        return NULL;
+    var.api = env_api;
+    if (!var.api) {
+        var.api = load_env_api(var.env);
+        if (!var.api && PyErr_Occurred()) return NULL;
     }
+    if (var.api && !PyObject_TypeCheck(var.env, var.api->env_type))
+        var.api = NULL;
+    var.slot = -1;
 
-    PyObject *iterator = PyObject_GetIter(iterable);
-    Py_DECREF(iterable);
-    if (!iterator) return NULL;
+    if (open_source(&src, iterable) < 0) return NULL;
 
     while (1) {
-        PyObject *item = PyIter_Next(iterator);
+        PyObject *item = next_item(&src);
         if (!item) break;
 
-        PyObject *vars_dict = PyObject_GetAttrString(env, "vars");
-        if (vars_dict && PyDict_Check(vars_dict)) {
-            if (PyDict_SetItem(vars_dict, var_name, item) < 0) {
-                Py_DECREF(item);
-                Py_DECREF(vars_dict);
-                Py_DECREF(iterator);
-                return NULL;
-            }
-            Py_DECREF(vars_dict);
-        } else if (vars_dict) {
-            Py_DECREF(vars_dict);
-            PyObject *res = PyObject_CallMethod(env, "define", "sO", PyUnicode_AsUTF8(var_name), item);
-            if (!res) {
-                Py_DECREF(item);
-                Py_DECREF(iterator);
-                return NULL;
-            }
-            Py_DECREF(res);
+        int res = bind_item(&var, item);
+        Py_DECREF(item);
+        if (res < 0) {
+            close_source(&src);
+            return NULL;
         }
 
-        Py_DECREF(item);
+        switch (run_body(body_list, visit_method, completion_type, break_signal, continue_signal, &exit_signal)) {
+        case BODY_BREAK:
+            close_source(&src);
+            Py_RETURN_NONE;
+        case BODY_EXIT:
+            close_source(&src);
+            return exit_signal;
+        }
+    }
+    close_source(&src);
+    if (PyErr_Occurred()) return NULL;
+    Py_RETURN_NONE;
+}
+
+/* A loop of the shape `int i = a; i < b; i++` (any comparison, ++ or --)
+   is counted in a C long long. The scope resolver recognizes the shape and
+   describes it as a (name, op, bound, limit, step, reads) tuple: bound is
+   the expression for b, evaluated every iteration, or None when b is the
+   int literal limit; reads is false when the body never mentions i, in
+   which case the counter is only written back once the loop ends. When the
+   body does read i, it is stored before each iteration and reloaded
+   afterwards in case the body assigned it.
+
+   Whenever the counter stops being an int that fits (the body assigns
+   something else, b is not an int, i++ would overflow), it is written back
+   to the environment and the loop carries on in the generic path. */
+enum { TEST_LT, TEST_LE, TEST_GT, TEST_GE, TEST_NE };
+enum { COUNT_DONE, COUNT_RESUME_COND, COUNT_RESUME_INCREMENT };
+
+typedef struct {
+    PyObject *env;
+    const NativeEnvAPI *api;
+    Py_ssize_t slot;
+    int test;
+    PyObject *bound;
+    long long limit;
+    long long step;
+    long long value;
+    int reads;
+} Counter;
+
+/* 1 and *out set if obj (or the value of an entry tuple) is an int that
+   fits a long long, 0 otherwise. */
+static int
+counter_value(PyObject *obj, long long *out) {
+    if (PyTuple_CheckExact(obj) && PyTuple_GET_SIZE(obj) == 3)
+        obj = PyTuple_GET_ITEM(obj, 0);
+    if (!PyLong_CheckExact(obj)) return 0;
+    int overflow;
+    *out = PyLong_AsLongLongAndOverflow(obj, &overflow);
+    return !overflow;
+}
+
+/* 1 if the loop is of the counted shape and c is ready, 0 if it has to
+   run generically, -1 on error. Called after the init statement ran. */
+static int
+setup_counter(Counter *c, PyObject *desc, PyObject *env) {
+    PyObject *name;
+    const char *op;
+
+    if (desc == Py_None) return 0;
+    if (!env_api && !load_env_api(env)) return PyErr_Occurred() ? -1 : 0;
+    if (!PyObject_TypeCheck(env, env_api->env_type)) return 0;
+    if (!PyArg_ParseTuple(desc, "UsOLLp", &name, &op, &c->bound, &c->limit, &c->step, &c->reads)) {
+        if (!PyErr_ExceptionMatches(PyExc_OverflowError)) return -1;
+        PyErr_Clear();
+        return 0;
+    }
 
-        Py_ssize_t i, n = PyList_Size(body_list);
-        for (i = 0; i < n; i++) {
-            PyObject *stmt = PyList_GetItem(body_list, i);
-            PyObject *res = PyObject_CallFunctionObjArgs(visit_method, stmt, NULL);
+    if (!strcmp(op, "<")) c->test = TEST_LT;
+    else if (!strcmp(op, "<=")) c->test = TEST_LE;
+    else if (!strcmp(op, ">")) c->test = TEST_GT;
+    else if (!strcmp(op, ">=")) c->test = TEST_GE;
+    else if (!strcmp(op, "!=")) c->test = TEST_NE;
+    else return 0;
+    if (c->bound == Py_None) c->bound = NULL;
+
+    c->env = env;
+    c->api = env_api;
+    c->slot = env_api->bind(env, name);
+    if (c->slot < 0) return -1;
+    PyObject *value = env_api->load(env, c->slot);
+    return value && counter_value(value, &c->value);
+}
+
+static int
+store_counter(Counter *c) {
+    PyObject *value = PyLong_FromLongLong(c->value);
+    if (!value) return -1;
+    c->api->set(c->env, c->slot, value);
+    Py_DECREF(value);
+    return 0;
+}
+
+static int
+test_counter(int test, long long value, long long limit) {
+    switch (test) {
+    case TEST_LT: return value < limit;
+    case TEST_LE: return value <= limit;
+    case TEST_GT: return value > limit;
+    case TEST_GE: return value >= limit;
+    default: return value != limit;
+    }
+}
+
+/* Runs the loop while it can be counted in C. Returns COUNT_DONE with
+   *result set to what the loop returns (NULL on error), or where the
+   generic loop has to resume. */
+static int
+run_counter(Counter *c, PyObject *body_list, PyObject *completion_type, PyObject *break_signal,
+            PyObject *continue_signal, PyObject *visit_method, PyObject **result) {
+    PyObject *exit_signal;
+    long long limit = c->limit;
+    int resume;
+
+    while (1) {
+        if (c->bound) {
+            PyObject *res = visit_node(visit_method, c->bound);
             if (!res) {
-                if (PyErr_ExceptionMatches(break_exc)) {
-                    PyErr_Clear();
-                    goto loop_break;
-                }
-                if (PyErr_ExceptionMatches(continue_exc)) {
-                    PyErr_Clear();
-                    goto loop_continue;
-                }
-                Py_DECREF(iterator);
-                return NULL;
+                *result = NULL;
+                return COUNT_DONE;
             }
+            int ok = counter_value(res, &limit);
             Py_DECREF(res);
+            if (!ok) {
+                resume = COUNT_RESUME_COND;
+                break;
+            }
+        }
+        if (!test_counter(c->test, c->value, limit)) {
+            if (store_counter(c) < 0) {
+                *result = NULL;
+                return COUNT_DONE;
+            }
+            Py_INCREF(Py_None);
+            *result = Py_None;
+            return COUNT_DONE;
+        }
+
+        PyObject *current = NULL;
+        if (c->reads) {
+            current = PyLong_FromLongLong(c->value);
+            if (!current) {
+                *result = NULL;
+                return COUNT_DONE;
+            }
+            c->api->set(c->env, c->slot, current);
         }
-    loop_continue:
-        ;
+
+        switch (run_body(body_list, visit_method, completion_type, break_signal, continue_signal, &exit_signal)) {
+        case BODY_BREAK:
+            Py_XDECREF(current);
+            Py_INCREF(Py_None);
+            *result = Py_None;
+            return COUNT_DONE;
+        case BODY_EXIT:
+            Py_XDECREF(current);
+            *result = exit_signal;
+            return COUNT_DONE;
+        }
+
+        if (current) {
+            PyObject *now = c->api->load(c->env, c->slot);
+            int assigned = now != current;
+            Py_DECREF(current);
+            /* The body assigned i: go on from its new value, or leave the
+               value it stored for the generic increment to pick up. */
+            if (assigned && !(now && counter_value(now, &c->value)))
+                return COUNT_RESUME_INCREMENT;
+        }
+
+        if ((c->step > 0 && c->value > LLONG_MAX - c->step) ||
+            (c->step < 0 && c->value < LLONG_MIN - c->step)) {
+            resume = COUNT_RESUME_INCREMENT;
+            break;
+        }
+        c->value += c->step;
     }
-loop_break:
-    Py_DECREF(iterator);
-    Py_RETURN_NONE;
+
+    if (store_counter(c) < 0) {
+        *result = NULL;
+        return COUNT_DONE;
+    }
+    return resume;
 }
 
 static PyObject *
 native_c_style_for_loop(PyObject *self, PyObject *args) {
     PyObject *visitor;
+    PyObject *env;
     PyObject *init_stmt;
     PyObject *condition;
     PyObject *increment;
     PyObject *body_list;
-    PyObject *break_exc;
-    PyObject *continue_exc;
+    PyObject *counter;
+    PyObject *completion_type;
+    PyObject *break_signal;
+    PyObject *continue_signal;
     PyObject *visit_method;
+    PyObject *exit_signal;
+    int skip_to_increment = 0;
 
-    if (!PyArg_ParseTuple(args, "OOOOOOOO", &visitor, &init_stmt, &condition, &increment, &body_list, &break_exc, &continue_exc, &visit_method))
+    if (!PyArg_ParseTuple(args, "OOOOOOOOOOO", &visitor, &env, &init_stmt, &condition, &increment, &body_list, &counter, &completion_type, &break_signal, &continue_signal, &visit_method))
         return NULL;
 
     if (init_stmt != Py_None) {
-        PyObject *res = PyObject_CallFunctionObjArgs(visit_method, init_stmt, NULL);
+        PyObject *res = visit_node(visit_method, init_stmt);
         if (!res) return NULL;
         Py_DECREF(res);
     }
 
+    Counter c;
+    int counted = setup_counter(&c, counter, env);
+    if (counted < 0) return NULL;
+    if (counted) {
+        PyObject *result;
+        int resume = run_counter(&c, body_list, completion_type, break_signal, continue_signal, visit_method, &result);
+        if (resume == COUNT_DONE) return result;
+        skip_to_increment = resume == COUNT_RESUME_INCREMENT;
+    }
+
     while (1) {
-        if (condition != Py_None) {
-            PyObject *cond_result = PyObject_CallFunctionObjArgs(visit_method, condition, NULL);
-            if (!cond_result) return NULL;
+        if (!skip_to_increment) {
+            if (condition != Py_None) {
+                PyObject *cond_result = visit_node(visit_method, condition);
+                if (!cond_result) return NULL;
 
-            PyObject *cond_value = cond_result;
-            if (PyTuple_Check(cond_result) && PyTuple_Size(cond_result) == 3) {
-                cond_value = PyTuple_GetItem(cond_result, 0);
-            }
+                PyObject *cond_value = cond_result;
+                if (PyTuple_Check(cond_result) && PyTuple_Size(cond_result) == 3) {
+                    cond_value = PyTuple_GetItem(cond_result, 0);
+                }
 
-            int is_true = PyObject_IsTrue(cond_value);
-            Py_DECREF(cond_result);
+                int is_true = PyObject_IsTrue(cond_value);
+                Py_DECREF(cond_result);
 
-            if (is_true <= 0) {
-                if (is_true < 0) return NULL;
-                break;
+                if (is_true <= 0) {
+                    if (is_true < 0) return NULL;
+                    break;
+                }
             }
-        }
 
-        Py_ssize_t i, n = PyList_Size(body_list);
-        for (i = 0; i < n; i++) {
-            PyObject *stmt = PyList_GetItem(body_list, i);
-            PyObject *res = PyObject_CallFunctionObjArgs(visit_method, stmt, NULL);
-            if (!res) {
-                if (PyErr_ExceptionMatches(break_exc)) {
-                    PyErr_Clear();
-                    goto loop_break;
-                }
-                if (PyErr_ExceptionMatches(continue_exc)) {
-                    PyErr_Clear();
-                    goto loop_continue;
-                }
-                return NULL;
+            switch (run_body(body_list, visit_method, completion_type, break_signal, continue_signal, &exit_signal)) {
+            case BODY_BREAK:
+                Py_RETURN_NONE;
+            case BODY_EXIT:
+                return exit_signal;
             }
-            Py_DECREF(res);
         }
+        skip_to_increment = 0;
 
-    loop_continue:
         if (increment != Py_None) {
-            PyObject *res = PyObject_CallFunctionObjArgs(visit_method, increment, NULL);
+            PyObject *res = visit_node(visit_method, increment);
             if (!res) return NULL;
             Py_DECREF(res);
         }
     }
 
-loop_break:
     Py_RETURN_NONE;
 }
 
@@ -6,7 +6,7 @@ sysconfig.get_config_vars()['CC'] = 'gcc'
 
 setup(
     ext_modules=[
-        Extension("native_loop", ["native/native_loop.c"]),
-        Extension("native_env", ["native/native_env.c"])
+        Extension("native_loop", ["native/native_loop.c"], depends=["native/native_env_api.h"]),
+        Extension("native_env", ["native/native_env.c"], depends=["native/native_env_api.h"])
     ]
 )
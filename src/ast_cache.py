@@ -0,0 +1,69 @@
+import hashlib
+import os
+import pickle
+
+CACHE_DIRNAME = "__orcache__"
+CACHE_SUFFIX = ".orc"
+
+# Bump whenever the layout of the node classes in ast_nodes changes, so trees
+# pickled by an older build are never loaded into a newer one.
+FORMAT_VERSION = 9
+
+class ASTCache:
+    def __init__(self, version, cache_dir=None, enabled=True):
+        self.version = version
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+
+    def source_digest(self, source):
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def cache_path(self, source_path, tag=None):
+        source_path = os.path.abspath(source_path)
+        base_name = os.path.splitext(os.path.basename(source_path))[0]
+        if tag:
+            base_name = f"{base_name}.{tag}"
+
+        if self.cache_dir:
+            path_digest = hashlib.sha1(source_path.encode("utf-8")).hexdigest()[:16]
+            return os.path.join(self.cache_dir, f"{base_name}-{path_digest}{CACHE_SUFFIX}")
+
+        return os.path.join(os.path.dirname(source_path), CACHE_DIRNAME, base_name + CACHE_SUFFIX)
+
+    def _header(self, source):
+        return {
+            "version": self.version,
+            "format": FORMAT_VERSION,
+            "digest": self.source_digest(source),
+        }
+
+    def load(self, source_path, source, tag=None):
+        if not self.enabled:
+            return None
+
+        try:
+            with open(self.cache_path(source_path, tag), "rb") as f:
+                header = pickle.load(f)
+                if header != self._header(source):
+                    return None
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def store(self, source_path, source, tree, tag=None):
+        if not self.enabled:
+            return
+
+        path = self.cache_path(source_path, tag)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self._header(source), f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(tree, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
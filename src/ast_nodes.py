@@ -1,21 +1,40 @@
-class Program:
+class Node:
+    __slots__ = ('line', 'col')
+
+def node_span(node):
+    line = getattr(node, 'line', None)
+    if line is None:
+        return None
+    return line, node.col
+
+class Program(Node):
+    __slots__ = ('statements',)
+
     def __init__(self, statements):
         self.statements = statements
 
-class VarAssign:
+class VarAssign(Node):
+    __slots__ = ('vtype', 'name', 'value', 'private', 'is_class_field')
+
     def __init__(self, vtype, name, value, private):
         self.vtype = vtype
         self.name = name
         self.value = value
         self.private = private
+        self.is_class_field = False
+
+class VarSet(Node):
+    __slots__ = ('name', 'value', 'op', 'depth', 'slot', 'layout')
 
-class VarSet:
     def __init__(self, name, value, op='='):
         self.name = name
         self.value = value
         self.op = op
+        self.slot = None
+
+class FuncDef(Node):
+    __slots__ = ('name', 'params', 'body', 'return_type', 'private', 'is_async', 'is_class_method', 'layout')
 
-class FuncDef:
     def __init__(self, name, params, body, return_type, private=False, is_async=False):
         self.name = name
         self.params = params
@@ -23,129 +42,211 @@ class FuncDef:
         self.return_type = return_type
         self.private = private
         self.is_async = is_async
+        self.is_class_method = False
+        self.layout = None
+
+class LazyBody(Node):
+    __slots__ = ('tokens', 'statements', 'layout')
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.statements = None
+        self.layout = None
+
+class IfBlock(Node):
+    __slots__ = ('cond', 'body', 'elseif_blocks', 'else_block')
 
-class IfBlock:
     def __init__(self, cond, body, elseif_blocks, else_block):
         self.cond = cond
         self.body = body
         self.elseif_blocks = elseif_blocks
         self.else_block = else_block
 
-class FuncCall:
+class FuncCall(Node):
+    __slots__ = ('name', 'args')
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
 
-class BinaryOp:
+class BinaryOp(Node):
+    __slots__ = ('left', 'op', 'right', 'hits')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
+        # Generic executions so far; see oryon_quicken.
+        self.hits = 0
+
+class UnaryOp(Node):
+    __slots__ = ('op', 'expr')
 
-class UnaryOp:
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
 
-class Literal:
+class Literal(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
-class Var:
+class Var(Node):
+    __slots__ = ('name', 'depth', 'slot', 'layout')
+
     def __init__(self, name):
         self.name = name
+        self.slot = None
+
+class ExprStmt(Node):
+    __slots__ = ('expr',)
 
-class ExprStmt:
     def __init__(self, expr):
         self.expr = expr
 
-class ReturnNode:
-    def __init__(self, value):
-        self.value = value
+class ReturnNode(Node):
+    __slots__ = ('value', 'tail')
 
-class ReturnSignal(Exception):
     def __init__(self, value):
         self.value = value
+        # Set by ScopeResolver: the value is a call that can run as a tail
+        # call, outside any try statement of the function.
+        self.tail = False
+
+class Completion:
+    # Returned by a statement, in place of its usual result, when it ends
+    # the blocks around it early. BREAK and CONTINUE are shared; a return
+    # carries the returned entry in value. Loops, switches and function
+    # calls consume the kinds they handle and hand the rest back up.
+    __slots__ = ('kind', 'value')
+
+    def __init__(self, kind, value=None):
+        self.kind = kind
+        self.value = value
+
+    def __repr__(self):
+        return f"Completion({self.kind})"
+
+BREAK = Completion('break')
+CONTINUE = Completion('continue')
+
+class SwitchNode(Node):
+    __slots__ = ('expr', 'cases', 'default_case')
 
-class SwitchNode:
     def __init__(self, expr, cases, default_case):
         self.expr = expr
         self.cases = cases
         self.default_case = default_case
 
-class Break:
-    pass
+class Break(Node):
+    __slots__ = ()
 
-class BreakSignal(Exception):
-    pass
+class ListLiteral(Node):
+    __slots__ = ('items',)
 
-class ListLiteral:
     def __init__(self, items):
         self.items = items
 
-class TupleLiteral:
+class TupleLiteral(Node):
+    __slots__ = ('items',)
+
     def __init__(self, items):
         self.items = items
 
-class DictLiteral:
+class DictLiteral(Node):
+    __slots__ = ('pairs',)
+
     def __init__(self, pairs):
         self.pairs = pairs
 
-class IndexAccess():
+class ConstCollection(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+class IndexAccess(Node):
+    __slots__ = ('collection', 'index')
+
     def __init__(self, collection, index):
         self.collection = collection
         self.index = index
 
-class MethodCall():
+class MethodCall(Node):
+    __slots__ = ('receiver', 'method_name', 'args', 'cache_class', 'cache_method')
+
     def __init__(self, receiver, method_name, args):
         self.receiver = receiver
         self.method_name = method_name
         self.args = args
+        self.cache_class = None
+
+class VarSetExpr(Node):
+    __slots__ = ('target_expr', 'value', 'op', 'shape', 'index', 'next_shape')
 
-class VarSetExpr:
     def __init__(self, target_expr, value, op):
         self.target_expr = target_expr
         self.value = value
         self.op = op
+        self.shape = None
+
+class LambdaFunc(Node):
+    __slots__ = ('params', 'body', 'return_type', 'is_async', 'layout')
 
-class LambdaFunc():
     def __init__(self, params, body, return_type=None, is_async=False):
         self.params = params
         self.body = body
         self.return_type = return_type
         self.is_async = is_async
+        self.layout = None
+
+class WhileNode(Node):
+    __slots__ = ('cond', 'body')
 
-class WhileNode:
     def __init__(self, condition, body):
         self.cond = condition
         self.body = body
 
-class ForNode:
+class ForNode(Node):
+    __slots__ = ('var_name', 'iterable_expr', 'body')
+
     def __init__(self, var_name, iterable_expr, body):
         self.var_name = var_name
         self.iterable_expr = iterable_expr
         self.body = body
 
-class CStyleForNode:
+class CStyleForNode(Node):
+    __slots__ = ('init_stmt', 'condition', 'increment', 'body', 'layout', 'counter')
+
     def __init__(self, init_stmt, condition, increment, body):
         self.init_stmt = init_stmt
         self.condition = condition
         self.increment = increment
         self.body = body
+        self.layout = None
+        self.counter = None
+
+class ClassDef(Node):
+    __slots__ = ('name', 'body', 'private', 'superclass')
 
-class ClassDef:
     def __init__(self, name, body, private, superclass=None):
         self.name = name
         self.body = body
         self.private = private
         self.superclass = superclass
 
-class PropertyAccess:
+class PropertyAccess(Node):
+    __slots__ = ('obj', 'property_name', 'shape', 'index')
+
     def __init__(self, obj, property_name):
         self.obj = obj
         self.property_name = property_name
+        self.shape = None
+
+class Assign(Node):
+    __slots__ = ('target', 'value')
 
-class Assign:
     def __init__(self, target, value):
         self.target = target
         self.value = value
@@ -155,8 +256,14 @@ class ClassValue:
         self.class_def = class_def
         self.closure_env = closure_env
         self.superclass = superclass_val
+        # name -> (function, declaring ClassValue, is_private), inherited
+        # methods included; filled in by Interpreter.visit_ClassDef.
+        self.methods = {}
+        self.template = None
+
+class TryCatchNode(Node):
+    __slots__ = ('try_block', 'catch_error', 'catch_type', 'catch_block', 'finally_block', 'catchonly_block')
 
-class TryCatchNode:
     def __init__(self, try_block, catch_error, catch_type, catch_block, finally_block, catchonly_block):
         self.try_block = try_block
         self.catch_error = catch_error
@@ -165,7 +272,9 @@ class TryCatchNode:
         self.finally_block = finally_block
         self.catchonly_block = catchonly_block
 
-class ThrowNode:
+class ThrowNode(Node):
+    __slots__ = ('expr', 'exception_type')
+
     def __init__(self, expr, err_type):
         self.expr = expr
         self.exception_type = err_type
@@ -185,7 +294,9 @@ class ThrowSignal(Exception):
         else:
             return str(self.value)
 
-class ImportNode:
+class ImportNode(Node):
+    __slots__ = ('path', 'symbols', 'type')
+
     def __init__(self, path, symbols=None, itype=0):
         self.path = path
         self.symbols = symbols or []
@@ -193,19 +304,20 @@ class ImportNode:
     def __repr__(self):
         return f"ImportNode(path={self.path!r}, symbols={self.symbols!r})"
     
-class InterpolatedString:
+class InterpolatedString(Node):
+    __slots__ = ('parts',)
+
     def __init__(self, parts):
         self.parts = parts
     def __repr__(self):
         return f"InterpolatedString({self.parts})"
 
-class ContinueNode:
-    pass
+class ContinueNode(Node):
+    __slots__ = ()
 
-class ContinueSignal(Exception):
-    pass
+class AwaitExpr(Node):
+    __slots__ = ('expr',)
 
-class AwaitExpr():
     def __init__(self, expr):
         self.expr = expr
 
@@ -1,9 +1,15 @@
 from collections import deque
+import heapq
+import itertools
+import os
+import selectors
+import time
 
 class Future:
     def __init__(self):
         self.done = False
         self.result = None
+        self.error = None
         self.waiters = []
     
     def __repr__(self):
@@ -17,6 +23,19 @@ class Future:
         for w in self.waiters:
             w(self)
 
+    def set_exception(self, error):
+        if self.done:
+            return
+        self.done = True
+        self.error = error
+        for w in self.waiters:
+            w(self)
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
     def add_waiter(self, waiter):
         if self.done:
             waiter(self)
@@ -37,23 +56,269 @@ class Task:
             else:
                 yielded = self.frame.run(value)
             if isinstance(yielded, Future):
-                yielded.add_waiter(lambda fut: self.loop.ready.append(self))
+                yielded.add_waiter(self.wake)
             else:
                 self.loop.ready.append(self)
         except StopIteration as stop:
             self.future.set_result(stop.value)
+        except Exception as error:
+            # The error goes to whoever awaits the task. If nobody does yet,
+            # it also stops the loop, so it is not lost.
+            waited = bool(self.future.waiters)
+            self.future.set_exception(error)
+            if not waited:
+                raise
+
+    def wake(self, fut):
+        self.loop.ready.append(self)
+
+class Timer:
+    # A callback the loop runs at a monotonic time, and again every interval
+    # seconds after that if interval is set, until cancelled.
+    def __init__(self, when, callback, interval=None):
+        self.when = when
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"timer '{hex(id(self))}'"
+
+    def cancel(self):
+        self.cancelled = True
 
 class EventLoop:
+    # Runs ready tasks in order. When none is ready, the loop blocks in the
+    # OS until the next timer is due or a file descriptor some future waits
+    # on is ready, whichever comes first.
     def __init__(self):
         self.ready = deque()
+        self.selector = None
+        # Heap of (when, seq, timer); seq keeps timers due at the same time
+        # in the order they were set.
+        self.timers = []
+        self.timer_seq = itertools.count()
+        # fd -> [writes in progress, whether fd was blocking before them].
+        self.writing = {}
 
     def create_task(self, frame):
         task = Task(frame, self)
         return task.future
 
     def run(self):
-        while self.ready:
-            task = self.ready.popleft()
-            task.step()
+        while self.run_once():
+            pass
+
+    def run_until(self, future):
+        # Runs tasks until future is done, for code that waits on it without
+        # being a task itself.
+        future.add_waiter(_watch)
+        while not future.done:
+            if not self.run_once():
+                raise Exception("await can never finish: no task is left to run")
+        return future.outcome()
+
+    def run_once(self):
+        # Fires the timers that are due, or else runs one ready task, or else
+        # waits for a timer or file descriptor. False once there is nothing
+        # left to wait for.
+        timers = self.timers
+        while timers and timers[0][2].cancelled:
+            heapq.heappop(timers)
+        if timers and timers[0][0] <= time.monotonic():
+            self.fire_timers()
+            return True
+        if self.ready:
+            self.ready.popleft().step()
+            return True
+        if timers:
+            timeout = max(0.0, timers[0][0] - time.monotonic())
+        elif self.waiting_io():
+            timeout = None
+        else:
+            return False
+        if self.waiting_io():
+            self.poll(timeout)
+        elif timeout:
+            time.sleep(timeout)
+        return True
+
+    def call_later(self, delay, callback, interval=None):
+        timer = Timer(time.monotonic() + delay, callback, interval)
+        self.schedule(timer)
+        return timer
+
+    def schedule(self, timer):
+        heapq.heappush(self.timers, (timer.when, next(self.timer_seq), timer))
+
+    def fire_timers(self):
+        # Timers set again while firing, intervals included, wait for the
+        # next round, so a zero interval cannot keep the loop here.
+        now = time.monotonic()
+        due = []
+        while self.timers and self.timers[0][0] <= now:
+            due.append(heapq.heappop(self.timers)[2])
+        for timer in due:
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                timer.when = max(timer.when + timer.interval, now)
+                self.schedule(timer)
+            timer.callback()
+
+    def sleep(self, delay):
+        # A future that is done delay seconds from now.
+        fut = Future()
+        self.call_later(delay, lambda: fut.set_result(None))
+        return fut
+
+    def waiting_io(self):
+        return self.selector is not None and bool(self.selector.get_map())
+
+    def wait_fd(self, fd, event):
+        # A future that is done, with fd as its result, once fd is ready for
+        # event (selectors.EVENT_READ or EVENT_WRITE).
+        fut = Future()
+        if self.selector is None:
+            self.selector = selectors.DefaultSelector()
+        try:
+            key = self.selector.get_key(fd)
+        except KeyError:
+            self.selector.register(fd, event, {event: [fut]})
+        else:
+            key.data.setdefault(event, []).append(fut)
+            self.selector.modify(fd, key.events | event, key.data)
+        return fut
+
+    def poll(self, timeout=None):
+        for key, events in self.selector.select(timeout):
+            waiting = key.data
+            for event in (selectors.EVENT_READ, selectors.EVENT_WRITE):
+                if events & event:
+                    for fut in waiting.pop(event, ()):
+                        fut.set_result(key.fd)
+            if waiting:
+                self.selector.modify(key.fileobj, events_of(waiting), waiting)
+            else:
+                self.selector.unregister(key.fileobj)
+
+    def read(self, fd, size):
+        # A future of the next bytes fd has, at most size of them; empty at
+        # the end of input.
+        result = Future()
+
+        def readable(_):
+            try:
+                result.set_result(os.read(fd, size))
+            except BlockingIOError:
+                self.wait_fd(fd, selectors.EVENT_READ).add_waiter(readable)
+            except OSError as error:
+                result.set_exception(error)
+
+        self.wait_fd(fd, selectors.EVENT_READ).add_waiter(readable)
+        return result
+
+    def read_all(self, fd):
+        # A future of everything fd has until the end of input.
+        result = Future()
+        chunks = []
+
+        def received(chunk):
+            if chunk.error is not None:
+                result.set_exception(chunk.error)
+            elif chunk.result:
+                chunks.append(chunk.result)
+                self.read(fd, 65536).add_waiter(received)
+            else:
+                result.set_result(b"".join(chunks))
+
+        self.read(fd, 65536).add_waiter(received)
+        return result
+
+    def write(self, fd, data):
+        # A future of len(data), done once all of data is written to fd. fd
+        # is non-blocking while writes to it are in progress, so a full pipe
+        # waits in the loop instead; the last one to finish restores it.
+        result = Future()
+        view = memoryview(data)
+        writing = self.writing.get(fd)
+        if writing is None:
+            writing = self.writing[fd] = [0, os.get_blocking(fd)]
+            os.set_blocking(fd, False)
+        writing[0] += 1
+
+        def finish():
+            writing[0] -= 1
+            if writing[0] == 0:
+                del self.writing[fd]
+                try:
+                    os.set_blocking(fd, writing[1])
+                except OSError:
+                    pass
+
+        def writable(_):
+            nonlocal view
+            try:
+                while view:
+                    view = view[os.write(fd, view):]
+            except BlockingIOError:
+                self.wait_fd(fd, selectors.EVENT_WRITE).add_waiter(writable)
+            except OSError as error:
+                finish()
+                result.set_exception(error)
+            else:
+                finish()
+                result.set_result(len(data))
+
+        self.wait_fd(fd, selectors.EVENT_WRITE).add_waiter(writable)
+        return result
+
+def gather(futures):
+    # A future of the results of futures, in order, done once all of them
+    # are; the first error fails it.
+    result = Future()
+    values = [None] * len(futures)
+    pending = len(futures)
+
+    def collect(i, fut):
+        nonlocal pending
+        if fut.error is not None:
+            result.set_exception(fut.error)
+            return
+        values[i] = fut.result
+        pending -= 1
+        if pending == 0:
+            result.set_result(values)
+
+    if not futures:
+        result.set_result(values)
+    for i, fut in enumerate(futures):
+        fut.add_waiter(lambda fut, i=i: collect(i, fut))
+    return result
+
+def then(future, fn):
+    # A future of fn(result of future); an error in either fails it.
+    result = Future()
+
+    def done(fut):
+        if fut.error is not None:
+            result.set_exception(fut.error)
+            return
+        try:
+            result.set_result(fn(fut.result))
+        except Exception as error:
+            result.set_exception(error)
+
+    future.add_waiter(done)
+    return result
+
+def events_of(waiting):
+    events = 0
+    for event in waiting:
+        events |= event
+    return events
+
+def _watch(fut):
+    pass
 
 loop = EventLoop()
\ No newline at end of file
@@ -0,0 +1,457 @@
+import functools
+import operator
+from ast_nodes import *
+from native import native_loop
+from oryon_interpreter import Interpreter, FunctionValue, ClassInstance
+from oryon_quicken import QuickBinaryOp
+
+_BINARY_FUNCS = {
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '**': operator.pow,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '&': operator.and_,
+    '|': operator.or_,
+    '^': operator.xor,
+    '<<': operator.lshift,
+    '>>': operator.rshift,
+}
+
+_COMPOUND_FUNCS = {
+    '+=': operator.add,
+    '-=': operator.sub,
+    '*=': operator.mul,
+    '/=': operator.truediv,
+    '%=': operator.mod,
+}
+
+def _unwrap(v):
+    return v[0] if isinstance(v, tuple) and len(v) == 3 else v
+
+class ClosureInterpreter(Interpreter):
+    """Interpreter that compiles every node, on first visit, into a Python
+    closure with its children already compiled, instead of looking up a
+    visit_* method by name each time the node is evaluated.
+
+    Nodes without a compile_* method are bound to their visit_* method, so
+    the two engines share one implementation of everything that is not on
+    the hot path. Compiled closures are named visit_* and take ``node`` as a
+    default argument so error_span still finds the failing node.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compiled = {}
+
+    def visit(self, node):
+        code = self.compiled.get(node)
+        if code is None:
+            code = self.compile(node)
+        return code()
+
+    def compile(self, node):
+        code = self.compiled.get(node)
+        if code is not None:
+            return code
+        name = node.__class__.__name__
+        if isinstance(node, QuickBinaryOp):
+            # Specialized by a tree-walking run; the closure for the generic
+            # node already binds its operator.
+            name = 'BinaryOp'
+        builder = getattr(self, 'compile_' + name, None)
+        if builder is not None:
+            code = builder(node)
+        else:
+            code = functools.partial(getattr(self, 'visit_' + name, self.no_visit_method), node)
+        self.compiled[node] = code
+        return code
+
+    def compile_block(self, stmts):
+        return [self.compile(stmt) for stmt in stmts]
+
+    def compile_Program(self, node):
+        body = [self.compile(stmt) for stmt in node.statements if stmt is not None]
+
+        def visit_program(node=node):
+            for code in body:
+                signal = code()
+                if type(signal) is Completion:
+                    return signal
+        return visit_program
+
+    def compile_Literal(self, node):
+        value = node.value
+
+        def visit_literal(node=node):
+            return value
+        return visit_literal
+
+    def compile_ConstCollection(self, node):
+        copy = node.value.copy
+        return copy
+
+    def compile_Var(self, node):
+        interp = self
+        name = node.name
+
+        if node.slot is not None:
+            depth, slot, layout = node.depth, node.slot, node.layout
+
+            def visit_var(node=node):
+                env = interp.env
+                entry = env.get_slot(depth, slot, layout)
+                if entry is not None:
+                    return entry
+                try:
+                    return env.get_key(name, env)
+                except Exception:
+                    raise Exception(f"{node.name} not found")
+            return visit_var
+
+        def visit_var(node=node):
+            env = interp.env
+            try:
+                return env.get_key(name, env)
+            except Exception:
+                raise Exception(f"{node.name} not found")
+        return visit_var
+
+    def compile_operand(self, node):
+        # For children whose result is unwrapped straight away: a slotted Var
+        # then reads the bare value and no entry tuple has to be built.
+        if not (isinstance(node, Var) and node.slot is not None):
+            return self.compile(node)
+
+        interp = self
+        name = node.name
+        depth, slot, layout = node.depth, node.slot, node.layout
+
+        def visit_var(node=node):
+            env = interp.env
+            value = env.get_slot_value(depth, slot, layout)
+            if value is not None:
+                return value
+            try:
+                return env.get_key(name, env)
+            except Exception:
+                raise Exception(f"{node.name} not found")
+        return visit_var
+
+    def compile_ExprStmt(self, node):
+        expr = self.compile(node.expr)
+
+        def visit_exprstmt(node=node):
+            return expr()
+        return visit_exprstmt
+
+    def compile_BinaryOp(self, node):
+        left = self.compile_operand(node.left)
+        right = self.compile_operand(node.right)
+        op = node.op
+
+        if op == '+':
+            def visit_binary(node=node):
+                l = _unwrap(left())
+                r = _unwrap(right())
+                if l is None or r is None:
+                    raise Exception(f"RuntimeError: Cannot perform '{node.op}' on null value")
+                if isinstance(l, str) or isinstance(r, str):
+                    if isinstance(l, str) and isinstance(r, str):
+                        return l + r
+                    raise Exception(f"TypeError: Cannot add {type(l).__name__} and {type(r).__name__}")
+                if isinstance(l, float) or isinstance(r, float):
+                    return float(l + r)
+                return l + r
+            return visit_binary
+
+        if op == '&&':
+            func = lambda l, r: bool(l) and bool(r)
+        elif op == '||':
+            func = lambda l, r: bool(l) or bool(r)
+        elif op == '===':
+            func = lambda l, r: (l == r) and (type(l) == type(r))
+        elif op == 'in':
+            func = lambda l, r: l in r
+        else:
+            func = _BINARY_FUNCS.get(op)
+
+        def visit_binary(node=node):
+            l = _unwrap(left())
+            r = _unwrap(right())
+            if l is None or r is None:
+                raise Exception(f"RuntimeError: Cannot perform '{node.op}' on null value")
+            if func is None:
+                raise Exception(f"Unknown binary operator {node.op}")
+            return func(l, r)
+        return visit_binary
+
+    def compile_UnaryOp(self, node):
+        expr = self.compile_operand(node.expr)
+        op = node.op
+
+        if op == '-':
+            func = operator.neg
+        elif op == '+':
+            func = operator.pos
+        elif op == '!':
+            func = operator.not_
+        else:
+            func = None
+
+        def visit_unary(node=node):
+            value = _unwrap(expr())
+            if func is None:
+                raise Exception(f"Unknown unary operator {node.op}")
+            return func(value)
+        return visit_unary
+
+    def compile_VarSet(self, node):
+        interp = self
+        value = self.compile_operand(node.value)
+        name = node.name
+        op = node.op
+        func = _COMPOUND_FUNCS.get(op)
+
+        if node.slot is not None:
+            return self.compile_slot_store(node, node, value, func)
+
+        def visit_varset(node=node):
+            val = _unwrap(value())
+            env = interp.env
+            if op == "=":
+                env.assign_key(name, val)
+            else:
+                current_val = _unwrap(env.get_key(name))
+                if func is None:
+                    raise Exception(f"Unknown assignment operator '{node.op}'")
+                env.assign_key(name, func(current_val, val))
+        return visit_varset
+
+    def compile_VarSetExpr(self, node):
+        if isinstance(node.target_expr, PropertyAccess):
+            return self.compile_property_store(node)
+        if not isinstance(node.target_expr, Var):
+            return functools.partial(self.visit_VarSetExpr, node)
+
+        interp = self
+        value = self.compile_operand(node.value)
+        name = node.target_expr.name
+        op = node.op
+        func = _COMPOUND_FUNCS.get(op)
+
+        if node.target_expr.slot is not None:
+            return self.compile_slot_store(node, node.target_expr, value, func)
+
+        def visit_varsetexpr(node=node):
+            val = _unwrap(value())
+            env = interp.env
+            if op == "=":
+                env.assign_key(name, val)
+            else:
+                current_val = _unwrap(env.get_key(name))
+                if func is None:
+                    raise Exception(f"Unknown assignment operator '{node.op}'")
+                env.assign_key(name, func(current_val, val))
+        return visit_varsetexpr
+
+    def compile_slot_store(self, node, target, value, func):
+        # Assignment to a name the resolver gave a slot; target is the Var
+        # or VarSet carrying it.
+        interp = self
+        name = target.name
+        op = node.op
+        depth, slot, layout = target.depth, target.slot, target.layout
+
+        def visit_varset(node=node):
+            val = _unwrap(value())
+            env = interp.env
+            if op == "=":
+                if not env.assign_slot(depth, slot, layout, val):
+                    env.assign_key(name, val)
+            else:
+                current = env.get_slot(depth, slot, layout)
+                if current is None:
+                    current = env.get_key(name)
+                if func is None:
+                    raise Exception(f"Unknown assignment operator '{node.op}'")
+                result = func(_unwrap(current), val)
+                if not env.assign_slot(depth, slot, layout, result):
+                    env.assign_key(name, result)
+        return visit_varset
+
+    def compile_property_store(self, node):
+        value = self.compile_operand(node.value)
+        obj_code = self.compile_operand(node.target_expr.obj)
+        set_property = self.set_property
+        plain = node.op == "="
+
+        # Hits in the inline cache set_property fills in are handled here;
+        # everything else, including errors, goes through set_property.
+        def visit_setproperty(node=node):
+            val = _unwrap(value())
+            obj = _unwrap(obj_code())
+            if plain and isinstance(obj, ClassInstance) and obj.shape is node.shape and node.next_shape is None:
+                obj.values[node.index] = val
+            else:
+                set_property(node, obj, val)
+        return visit_setproperty
+
+    def compile_PropertyAccess(self, node):
+        interp = self
+        obj_code = self.compile_operand(node.obj)
+        get_property = self.get_property
+
+        def visit_property(node=node):
+            obj = _unwrap(obj_code())
+            if isinstance(obj, ClassInstance):
+                shape = obj.shape
+                if shape is node.shape:
+                    decl_env = shape.decl_envs[node.index]
+                    if decl_env is None or interp.env.descends_from(decl_env):
+                        return obj.values[node.index]
+            return get_property(node, obj)
+        return visit_property
+
+    def compile_IndexAccess(self, node):
+        collection = self.compile_operand(node.collection)
+        index = self.compile_operand(node.index)
+
+        def visit_index(node=node):
+            coll = _unwrap(collection())
+            idx = _unwrap(index())
+            try:
+                return coll[idx]
+            except Exception as e:
+                raise Exception(f"Indexing error: {e}")
+        return visit_index
+
+    def compile_IfBlock(self, node):
+        branches = [(self.compile_operand(node.cond), [self.compile(s) for s in node.body if s is not None])]
+        for cond, body in node.elseif_blocks:
+            branches.append((self.compile_operand(cond), [self.compile(s) for s in body if s is not None]))
+        else_body = [self.compile(s) for s in node.else_block if s is not None] if node.else_block else None
+
+        def visit_if(node=node):
+            for cond, body in branches:
+                if _unwrap(cond()):
+                    for code in body:
+                        signal = code()
+                        if type(signal) is Completion:
+                            return signal
+                    return None
+            if else_body:
+                for code in else_body:
+                    signal = code()
+                    if type(signal) is Completion:
+                        return signal
+        return visit_if
+
+    def compile_WhileNode(self, node):
+        cond = self.compile(node.cond)
+        body = self.compile_block(node.body)
+
+        def visit_while(node=node):
+            while cond():
+                for code in body:
+                    signal = code()
+                    if type(signal) is Completion:
+                        if signal is CONTINUE:
+                            break
+                        if signal is BREAK:
+                            return None
+                        return signal
+        return visit_while
+
+    def compile_ForNode(self, node):
+        interp = self
+        iterable_expr = self.compile_operand(node.iterable_expr)
+        body = self.compile_block(node.body)
+        var_name = node.var_name
+
+        def visit_for(node=node):
+            iterable = _unwrap(iterable_expr())
+
+            if not hasattr(iterable, "__iter__"):
+                raise Exception(f"TypeError: '{type(iterable).__name__}' object is not iterable")
+
+            return native_loop.native_for_loop(interp, iterable, var_name, body, interp.env, interp.get_type_name,
+                                               Completion, BREAK, CONTINUE, None)
+        return visit_for
+
+    def compile_CStyleForNode(self, node):
+        interp = self
+        init = self.compile(node.init_stmt) if node.init_stmt is not None else None
+        condition = self.compile_operand(node.condition) if node.condition is not None else None
+        increment = self.compile(node.increment) if node.increment is not None else None
+        body = self.compile_block(node.body)
+        layout = node.layout
+        counter = node.counter
+        if counter is not None and counter[2] is not None:
+            counter = counter[:2] + (self.compile_operand(counter[2]),) + counter[3:]
+
+        def visit_cfor(node=node):
+            interp.push_scope(layout)
+            try:
+                return native_loop.native_c_style_for_loop(interp, interp.env, init, condition, increment, body, counter,
+                                                           Completion, BREAK, CONTINUE, None)
+            finally:
+                interp.pop_scope()
+        return visit_cfor
+
+    def compile_FuncCall(self, node):
+        interp = self
+        classes = self.classes
+        name = node.name
+        args = self.compile_block(node.args)
+        visit_class_call = self.visit_FuncCall
+
+        def visit_call(node=node):
+            if name in classes:
+                return visit_class_call(node)
+
+            env = interp.env
+            func = env.get_key(name, env)
+            if isinstance(func, tuple):
+                func = func[0]
+
+            values = [arg() for arg in args]
+
+            if isinstance(func, FunctionValue):
+                return func.call(interp, values)
+
+            if callable(func):
+                return func(*[_unwrap(v) for v in values])
+
+            raise Exception(f"'{node.name}' is not a function")
+        return visit_call
+
+    def compile_ReturnNode(self, node):
+        signal_return = self.signal_return
+        if node.value is None:
+            def visit_return(node=node):
+                return signal_return((None, "null", False))
+            return visit_return
+
+        value = self.compile(node.value)
+        if node.tail:
+            tail_call = self.tail_call
+            call = node.value
+
+            def visit_return(node=node):
+                signal = tail_call(call)
+                if signal is not None:
+                    return signal
+                return signal_return(value())
+            return visit_return
+
+        def visit_return(node=node):
+            return signal_return(value())
+        return visit_return
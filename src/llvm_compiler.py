@@ -4,6 +4,7 @@ from llvmlite import ir, binding
 from ast_nodes import *
 import oryon_lexer
 import oryon_parser
+from oryon_optimizer import ASTOptimizer
 
 class CompilerError(Exception):
     pass
@@ -118,15 +119,16 @@ class LLVMCompiler:
         self.string_literals[value] = str_ptr
         return str_ptr
     
-    def compile_file(self, filepath):
+    def compile_file(self, filepath, optimize=True):
         """Main entry point - compile a file"""
         self.current_dir = os.path.dirname(os.path.abspath(filepath))
         source_code = self.read_file(filepath)
         
         lexer = oryon_lexer.Lexer(source_code)
-        tokens = lexer.tokenize()
-        parser = oryon_parser.Parser(tokens)
+        parser = oryon_parser.Parser(lexer.iter_tokens())
         ast = parser.parse()
+        if optimize:
+            ast = ASTOptimizer(fold_collections=False, machine_ints=True).optimize(ast)
         
         self.visit(ast)
         
@@ -1,8 +1,12 @@
 import sys
 import os
 import argparse
-from oryon_interpreter import Interpreter
+import multiprocessing
+from oryon_interpreter import Interpreter, error_span, run_deep
+from closure_engine import ClosureInterpreter
+from oryon_vm import VMInterpreter
 from ast_nodes import ThrowSignal
+from ast_cache import ASTCache
 import time
 
 try:
@@ -16,6 +20,11 @@ _ALLOWED_EXTENSIONS = ['.or', '.oryon']
 _LANG_NAME = "Oryon"
 _COPYRIGHT_YEAR = "2025-2026"
 _COPYRIGHT_HOLDER = "Rustamov Humoyun Mirzo"
+_ENGINES = {
+    "tree": Interpreter,
+    "closure": ClosureInterpreter,
+    "vm": VMInterpreter,
+}
 
 try:
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -97,12 +106,17 @@ def print_help():
     print("  -h, --help              → Show this help message and exit")
     print("  -v, --version           → Show version information and exit")
     print("  --license               → Show license information and exit")
+    print("  --no-cache              → Do not read or write the parsed-AST cache")
+    print("  --cache-dir DIR         → Store the parsed-AST cache in DIR instead of __orcache__")
+    print("  --opt LEVEL             → Optimization level 0-3 (default: 3)")
+    print("  --no-optimize           → Disable optimizations (same as --opt 0)")
+    print("  -j, --jobs N            → Parse imported modules with N processes (default: CPU count)")
+    print("  --engine NAME           → Interpreter engine: tree, closure or vm (default: tree)")
+    print("  --vm                    → Run on the bytecode VM (same as --engine vm)")
     print()
     if LLVM_AVAILABLE:
         print("Compilation options:")
         print("  --compile               → Use LLVM compiler instead of interpreter")
-        print("  --opt LEVEL             → Optimization level 0-3 (default: 3)")
-        print("  --no-optimize           → Disable optimizations (same as --opt 0)")
         print("  -o, --output PATH       → Output directory for compiled files")
         print("  --ll                    → Generate LLVM IR (.ll) file")
         print("  --obj                   → Generate object (.o) file")
@@ -132,8 +146,15 @@ def print_perf(stats):
             print(f"{k:<15}: {v}")
     print("==========================")
 
+def format_runtime_error(e):
+    span = error_span(e)
+    if span is None:
+        return f"Runtime error: {e}"
+    return f"Runtime error: {e} (Line {span[0]}, Column {span[1]})"
+
 def run_file(filename, compile_mode=False, opt_level=3, output_dir=None, 
-             gen_ll=False, gen_obj=False, gen_asm=False, execute=True, perf=False):
+             gen_ll=False, gen_obj=False, gen_asm=False, execute=True, perf=False,
+             use_cache=True, cache_dir=None, jobs=None, engine="tree"):
     
     if not os.path.isfile(filename):
         print(f"Error: File '{filename}' not found.")
@@ -159,8 +180,9 @@ def run_file(filename, compile_mode=False, opt_level=3, output_dir=None,
         start_wall = time.perf_counter()
         start_cpu = time.process_time()
 
-        interpreter = Interpreter()
-        interpreter.interpret_file(filename)
+        interpreter = _ENGINES[engine](ast_cache=ASTCache(_VERSION, cache_dir, use_cache),
+                                       optimize=(opt_level > 0), jobs=jobs)
+        run_deep(interpreter.interpret_file, filename)
 
         end_wall = time.perf_counter()
         end_cpu = time.process_time()
@@ -172,7 +194,7 @@ def run_file(filename, compile_mode=False, opt_level=3, output_dir=None,
                 "CPU time": end_cpu - start_cpu
             })
     except Exception as e:
-        print(f"Runtime error: {e}")
+        print(format_runtime_error(e))
         sys.exit(5)
 
 def compile_file(filename, opt_level=3, output_dir=None, gen_ll=False, 
@@ -186,7 +208,7 @@ def compile_file(filename, opt_level=3, output_dir=None, gen_ll=False,
         
         print(f"Compiling {filename}...")
         compile_start = time.perf_counter()
-        compiler.compile_file(filename)
+        compiler.compile_file(filename, optimize=(opt_level > 0))
         compile_end = time.perf_counter()
         
         if output_dir is None:
@@ -267,17 +289,17 @@ def run_file_repl(filename, compile_mode=False, opt_level=3):
         
         try:
             compiler = LLVMCompiler()
-            compiler.compile_file(filename)
+            compiler.compile_file(filename, optimize=(opt_level > 0))
             result = compiler.execute(optimize=(opt_level > 0), opt_level=opt_level)
             print(f"Program exited with code: {result}")
         except Exception as e:
             print(f"Compilation error: {e}")
     else:
         try:
-            interpreter = Interpreter()
-            interpreter.interpret_file(filename)
+            interpreter = Interpreter(ast_cache=ASTCache(_VERSION), optimize=(opt_level > 0))
+            run_deep(interpreter.interpret_file, filename)
         except Exception as e:
-            print(f"Runtime error: {e}")
+            print(format_runtime_error(e))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -300,14 +322,24 @@ Examples:
                        help='Show license information')
     parser.add_argument('--perf', action='store_true',
                     help='Show performance statistics after execution')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not read or write the parsed-AST cache')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                       help='Directory for the parsed-AST cache (default: __orcache__ next to each source file)')
+    parser.add_argument('--opt', type=int, default=3, choices=[0, 1, 2, 3],
+                       help='Optimization level (0-3, default: 3)')
+    parser.add_argument('--no-optimize', action='store_true',
+                       help='Disable optimizations (same as --opt 0)')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                       help='Number of processes used to parse imported modules (default: CPU count)')
+    parser.add_argument('--engine', choices=sorted(_ENGINES), default='tree',
+                       help='Interpreter engine (default: tree)')
+    parser.add_argument('--vm', action='store_true',
+                       help='Run on the bytecode VM (same as --engine vm)')
     
     if LLVM_AVAILABLE:
         parser.add_argument('--compile', action='store_true',
                            help='Use LLVM compiler instead of interpreter')
-        parser.add_argument('--opt', type=int, default=3, choices=[0, 1, 2, 3],
-                           help='Optimization level (0-3, default: 3)')
-        parser.add_argument('--no-optimize', action='store_true',
-                           help='Disable optimizations (same as --opt 0)')
         parser.add_argument('-o', '--output', metavar='PATH',
                            help='Output directory for compiled files')
         parser.add_argument('--ll', action='store_true',
@@ -334,7 +366,7 @@ Examples:
         return 0
     
     compile_mode = False
-    opt_level = 3
+    opt_level = 0 if args.no_optimize else args.opt
     output_dir = None
     gen_ll = False
     gen_obj = False
@@ -344,7 +376,6 @@ Examples:
     
     if LLVM_AVAILABLE and args.compile:
         compile_mode = True
-        opt_level = 0 if args.no_optimize else args.opt
         output_dir = args.output
         gen_ll = args.ll
         gen_obj = args.obj
@@ -353,7 +384,9 @@ Examples:
     
     try:
         run_file(args.file, compile_mode, opt_level, output_dir, 
-                gen_ll, gen_obj, gen_asm, execute, perf)
+                gen_ll, gen_obj, gen_asm, execute, perf,
+                use_cache=not args.no_cache, cache_dir=args.cache_dir, jobs=args.jobs,
+                engine="vm" if args.vm else args.engine)
         return 0
     except KeyboardInterrupt:
         print("\nInterrupted by user. Exiting.")
@@ -367,4 +400,5 @@ Examples:
         return 2
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,270 @@
+from ast_nodes import *
+import async_runtime
+
+# Nodes whose children run later or elsewhere, so an await inside them does
+# not suspend the statement that holds them.
+OPAQUE = (FuncDef, LambdaFunc, ClassDef, LazyBody)
+
+# Operands evaluated before a sibling that awaits. They are evaluated ahead
+# of the await, as they would be without suspension, so code that runs
+# while the task waits cannot change what they see.
+EAGER = {BinaryOp: ('left',), IndexAccess: ('collection',), MethodCall: ('receiver',)}
+
+class AwaitedValue(Node):
+    # Stands in for an await in a lowered statement: the value it produced,
+    # read from Interpreter.awaited when the statement runs.
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+def node_slots(cls):
+    for klass in cls.__mro__:
+        yield from getattr(klass, '__slots__', ())
+
+def clone(node):
+    copy = object.__new__(type(node))
+    for slot in node_slots(type(node)):
+        if hasattr(node, slot):
+            setattr(copy, slot, getattr(node, slot))
+    return copy
+
+class AsyncRunner:
+    """Runs the bodies of async functions as generators.
+
+    Statements that do not await run through the interpreter as usual.
+    Blocks that do are walked here, and the remaining statements are
+    lowered once into a plan: the operands of each await, evaluated in
+    order, and a copy of the statement that reads the awaited values. An
+    await on an unfinished future yields it, and the generator resumes
+    from there when the event loop wakes its task.
+    """
+
+    def __init__(self, interpreter):
+        self.interp = interpreter
+        self.suspending = {}
+        self.plans = {}
+
+    def suspends(self, value):
+        if isinstance(value, Node):
+            found = self.suspending.get(value)
+            if found is None:
+                if isinstance(value, AwaitExpr):
+                    found = True
+                elif isinstance(value, OPAQUE):
+                    found = False
+                else:
+                    found = any(self.suspends(getattr(value, slot, None)) for slot in node_slots(type(value)))
+                self.suspending[value] = found
+            return found
+        if isinstance(value, (list, tuple)):
+            return any(self.suspends(item) for item in value)
+        return False
+
+    def run(self, func):
+        interp = self.interp
+        for stmt in func.body:
+            if stmt is None:
+                continue
+            if self.suspends(stmt):
+                result = yield from self.visit(stmt)
+            else:
+                result = interp.visit(stmt)
+            if type(result) is Completion:
+                return interp.unwrap(func.returned(result))
+            if isinstance(result, async_runtime.Future) and not result.done:
+                yield result
+        return None
+
+    def visit(self, node):
+        if not self.suspends(node):
+            return self.interp.visit(node)
+        method = getattr(self, 'visit_' + type(node).__name__, None)
+        if method is None:
+            return (yield from self.execute(node))
+        return (yield from method(node))
+
+    def exec_block(self, stmts):
+        if not self.suspends(stmts):
+            return self.interp.exec_block(stmts)
+        for stmt in stmts:
+            if stmt is not None:
+                signal = yield from self.visit(stmt)
+                if type(signal) is Completion:
+                    return signal
+        return None
+
+    def execute(self, node):
+        plan = self.plans.get(node)
+        if plan is None:
+            steps = []
+            plan = self.plans[node] = (steps, self.lower(node, steps))
+        steps, lowered = plan
+        values = []
+        for expr, await_node in steps:
+            value = self.visit_with(expr, values)
+            if await_node is not None:
+                value = yield from self.visit_await(await_node, value)
+            values.append(value)
+        return self.visit_with(lowered, values)
+
+    def visit_with(self, node, values):
+        interp = self.interp
+        prev = interp.awaited
+        interp.awaited = values
+        try:
+            return interp.visit(node)
+        finally:
+            interp.awaited = prev
+
+    def visit_await(self, node, value):
+        fut = self.interp.unwrap(value)
+        if not isinstance(fut, async_runtime.Future):
+            raise Exception("'await' can only be used on async values")
+        if not fut.done:
+            yield fut
+        return fut.outcome()
+
+    def lower(self, value, steps):
+        # Copies value with every await replaced by an AwaitedValue, adding
+        # the steps that produce them.
+        if isinstance(value, (list, tuple)):
+            last = max((i for i, item in enumerate(value) if self.suspends(item)), default=-1)
+            items = [self.hoist(item, steps) if i < last else self.lower(item, steps)
+                     for i, item in enumerate(value)]
+            return items if isinstance(value, list) else tuple(items)
+        if not isinstance(value, Node) or not self.suspends(value):
+            return value
+        if isinstance(value, AwaitExpr):
+            steps.append((self.lower(value.expr, steps), value))
+            return self.placeholder(value, steps)
+        copy = clone(value)
+        for slot in EAGER.get(type(value), ()):
+            setattr(copy, slot, self.hoist(getattr(value, slot), steps))
+        for slot in node_slots(type(value)):
+            if hasattr(copy, slot):
+                setattr(copy, slot, self.lower(getattr(copy, slot), steps))
+        return copy
+
+    def hoist(self, value, steps):
+        if self.suspends(value):
+            return self.lower(value, steps)
+        if not isinstance(value, Node) or isinstance(value, (Literal, AwaitedValue)):
+            return value
+        steps.append((value, None))
+        return self.placeholder(value, steps)
+
+    def placeholder(self, node, steps):
+        placeholder = AwaitedValue(len(steps) - 1)
+        if hasattr(node, 'line'):
+            placeholder.line = node.line
+            placeholder.col = getattr(node, 'col', None)
+        return placeholder
+
+    def visit_IfBlock(self, node):
+        unwrap = self.interp.unwrap
+        if unwrap((yield from self.visit(node.cond))):
+            return (yield from self.exec_block(node.body))
+        for cond, body in node.elseif_blocks:
+            if unwrap((yield from self.visit(cond))):
+                return (yield from self.exec_block(body))
+        if node.else_block:
+            return (yield from self.exec_block(node.else_block))
+        return None
+
+    def visit_SwitchNode(self, node):
+        unwrap = self.interp.unwrap
+        switch_value = unwrap((yield from self.visit(node.expr)))
+        signal = None
+        for case_expr, body in node.cases:
+            if switch_value == unwrap((yield from self.visit(case_expr))):
+                signal = yield from self.exec_block(body)
+                break
+        else:
+            if node.default_case:
+                signal = yield from self.exec_block(node.default_case)
+        if signal is BREAK:
+            return None
+        return signal
+
+    def visit_WhileNode(self, node):
+        unwrap = self.interp.unwrap
+        while unwrap((yield from self.visit(node.cond))):
+            signal = yield from self.exec_block(node.body)
+            if type(signal) is Completion and signal is not CONTINUE:
+                return None if signal is BREAK else signal
+        return None
+
+    def visit_ForNode(self, node):
+        interp = self.interp
+        iterable = interp.unwrap((yield from self.visit(node.iterable_expr)))
+        if not hasattr(iterable, "__iter__"):
+            raise Exception(f"TypeError: '{type(iterable).__name__}' object is not iterable")
+        for item in iterable:
+            interp.env.define_key(node.var_name, item, interp.get_type_name(item), False)
+            signal = yield from self.exec_block(node.body)
+            if type(signal) is Completion and signal is not CONTINUE:
+                return None if signal is BREAK else signal
+        return None
+
+    def visit_CStyleForNode(self, node):
+        return (yield from self.in_scope(node.layout, self.c_style_loop(node)))
+
+    def c_style_loop(self, node):
+        unwrap = self.interp.unwrap
+        if node.init_stmt is not None:
+            yield from self.visit(node.init_stmt)
+        while node.condition is None or unwrap((yield from self.visit(node.condition))):
+            signal = yield from self.exec_block(node.body)
+            if type(signal) is Completion and signal is not CONTINUE:
+                return None if signal is BREAK else signal
+            if node.increment is not None:
+                yield from self.visit(node.increment)
+        return None
+
+    def in_scope(self, layout, body):
+        # Runs the generator body in a scope of its own. A task that is
+        # closed while suspended leaves the env alone, since it then belongs
+        # to whatever code is running.
+        interp = self.interp
+        interp.push_scope(layout)
+        try:
+            signal = yield from body
+        except GeneratorExit:
+            raise
+        except BaseException:
+            interp.pop_scope()
+            raise
+        interp.pop_scope()
+        return signal
+
+    def visit_TryCatchNode(self, node):
+        if not node.finally_block:
+            return (yield from self.try_catch(node))
+        try:
+            signal = yield from self.try_catch(node)
+        except GeneratorExit:
+            raise
+        except BaseException:
+            final = yield from self.exec_block(node.finally_block)
+            if final is not None:
+                return final
+            raise
+        final = yield from self.exec_block(node.finally_block)
+        return signal if final is None else final
+
+    def try_catch(self, node):
+        try:
+            return (yield from self.exec_block(node.try_block))
+        except Exception as err:
+            handler = self.interp.catch_handler(node, err)
+            if handler is None:
+                raise
+            block, names = handler
+            return (yield from self.in_scope(None, self.catch_block(block, names)))
+
+    def catch_block(self, block, names):
+        env = self.interp.env
+        for name, value in names:
+            env.define(name, value, "str", False)
+        return (yield from self.exec_block(block))
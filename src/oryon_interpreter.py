@@ -3,9 +3,19 @@ from native import native_env, native_loop
 import os
 import oryon_parser
 import oryon_lexer
+from oryon_optimizer import ASTOptimizer
+from oryon_resolver import ScopeResolver, mentions_name
+from oryon_quicken import QUICKEN_AFTER, quicken, deoptimize
+from oryon_async import AsyncRunner
+import standard_lib
 from standard_lib import StdModule
 import async_runtime
 import types
+import sys
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 #std
 from std import global_std
@@ -17,57 +27,163 @@ import std.std_memory
 import std.std_ffi
 import std.std_fs
 
+# Below these sizes, starting worker processes costs more than parsing the
+# pending modules in-process.
+_PARALLEL_MIN_MODULES = 2
+_PARALLEL_MIN_BYTES = 64 * 1024
+
+# Errors for a break or continue that reaches the end of a function body
+# or module without meeting a loop.
+_OUTSIDE_LOOP = {
+    'break': "'break' is only valid inside loop constructs.",
+    'continue': "'continue' is only valid inside loop constructs",
+}
+
+_RETURN_TYPES = {
+    int: "int",
+    str: "str",
+    float: "float",
+    bool: "bool",
+    type(None): "null",
+    list: "list",
+    tuple: "tuple",
+    dict: "map",
+}
+
+# Programs run by run_deep get a thread with this much stack and this
+# recursion limit. Each level of non-tail Oryon recursion takes 5-10 Python
+# frames, so the default limit of 1000 allows only about 150 levels. A
+# level needs well under 512 bytes of C stack per frame, even when it
+# recurses through native loops.
+DEEP_STACK_SIZE = 512 * 1024 * 1024
+DEEP_RECURSION_LIMIT = 400000
+
+def run_deep(fn, *args):
+    # Calls fn(*args) on a thread with a deep stack and returns its result,
+    # re-raising anything it raises. Tail calls never need the extra depth.
+    # Called from the main thread, it serves standard_lib.on_main_thread
+    # until fn returns.
+    outcome = {}
+    calls = queue.Queue()
+
+    def target():
+        try:
+            outcome['value'] = fn(*args)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            calls.put(None)
+
+    prev_size = threading.stack_size()
+    prev_limit = sys.getrecursionlimit()
+    prev_calls = standard_lib.main_calls
+    serve = threading.current_thread() is threading.main_thread()
+    try:
+        threading.stack_size(DEEP_STACK_SIZE)
+        thread = threading.Thread(target=target, daemon=True)
+        sys.setrecursionlimit(DEEP_RECURSION_LIMIT)
+        if serve:
+            standard_lib.main_calls = calls
+        thread.start()
+    except (RuntimeError, ValueError):
+        # No room for the big stack; run at the normal depth instead.
+        standard_lib.main_calls = prev_calls
+        threading.stack_size(prev_size)
+        sys.setrecursionlimit(prev_limit)
+        return fn(*args)
+    try:
+        if serve:
+            for call in iter(calls.get, None):
+                call()
+        thread.join()
+    finally:
+        standard_lib.main_calls = prev_calls
+        threading.stack_size(prev_size)
+        sys.setrecursionlimit(prev_limit)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
+
+def parse_source(source_code, lazy=False, optimizer=None):
+    lexer = oryon_lexer.Lexer(source_code)
+    parser = oryon_parser.Parser(lexer.iter_tokens(), lazy_bodies=lazy)
+    ast = parser.parse()
+    if optimizer is not None:
+        ast = optimizer.optimize(ast)
+    return ScopeResolver().resolve(ast)
+
+def parse_module(path, ast_cache, tag, optimize):
+    # Runs in a worker process during Interpreter.preload_imports.
+    with open(path, 'r', encoding='utf-8') as f:
+        source_code = f.read()
+    ast = parse_source(source_code, True, ASTOptimizer() if optimize else None)
+    if ast_cache is not None:
+        ast_cache.store(path, source_code, ast, tag)
+    return ast
+
+def error_span(exc):
+    while exc is not None:
+        if isinstance(exc, oryon_parser.ParserError):
+            return None
+        span = None
+        tb = exc.__traceback__
+        while tb is not None:
+            frame = tb.tb_frame
+            if frame.f_code.co_name.startswith("visit"):
+                local_vars = frame.f_locals
+                node = local_vars.get("node")
+                code = local_vars.get("code")
+                if node is None and hasattr(code, "node_at"):
+                    # A VMInterpreter.visit_code frame.
+                    node = code.node_at(local_vars["pc"])
+                if isinstance(node, Node):
+                    span = node_span(node) or span
+            tb = tb.tb_next
+        if span is not None:
+            return span
+        exc = exc.__context__
+    return None
+
 class AsyncFrame:
+    # A call of an async function, run as an event loop task. The body is a
+    # generator from AsyncRunner that yields at each await that has to wait;
+    # the frame keeps the env it had there and restores it on resume.
     def __init__(self, interpreter, func_value, args):
         self.interpreter = interpreter
         self.func = func_value
-        self.args = args
-        self.pc = 0
-        self.env = None
+        self.env = func_value.closure_env.child(func_value.layout)
+        self.body = interpreter.async_runner.run(func_value)
         self.finished = False
 
-    def run(self, send_value=None):
-        if self.env is None:
-            self.env = native_env.Environment(parent=self.func.closure_env)
-
-            for name, arg in zip(self.func.params, self.args):
-                unwrapped_value = self.interpreter.unwrap(arg)
-                if isinstance(arg, tuple) and len(arg) == 3:
-                    arg_type = arg[1]
-                else:
-                    arg_type = self.interpreter.get_type_name(unwrapped_value)
-                
-                self.env.define(name, unwrapped_value, arg_type, False)
+        for name, arg in zip(func_value.params, args):
+            unwrapped_value = interpreter.unwrap(arg)
+            if isinstance(arg, tuple) and len(arg) == 3:
+                arg_type = arg[1]
+            else:
+                arg_type = interpreter.get_type_name(unwrapped_value)
 
-        prev_env = self.interpreter.env
-        prev_rt = self.interpreter.current_return_type
+            self.env.define_key(name, unwrapped_value, arg_type, False)
 
-        self.interpreter.env = self.env
-        self.interpreter.current_return_type = self.func.return_type
+    def run(self, send_value=None):
+        interpreter = self.interpreter
+        prev_env = interpreter.env
+        prev_rt = interpreter.current_return_type
+        prev_async = interpreter.in_async
 
-        prev_async = self.interpreter.in_async
-        self.interpreter.in_async = True
+        interpreter.env = self.env
+        interpreter.current_return_type = self.func.return_type
+        interpreter.in_async = True
 
         try:
-            while self.pc < len(self.func.body):
-                stmt = self.func.body[self.pc]
-                self.pc += 1
-                result = self.interpreter.visit(stmt)
-
-                if isinstance(result, async_runtime.Future):
-                    return result
-
-        except ReturnSignal as ret:
+            return self.body.send(None)
+        except BaseException:
             self.finished = True
-            raise StopIteration(self.interpreter.unwrap(ret.value))
-
+            raise
         finally:
-            self.interpreter.env = prev_env
-            self.interpreter.current_return_type = prev_rt
-            self.interpreter.in_async = prev_async
-
-        self.finished = True
-        raise StopIteration(None)
+            self.env = interpreter.env
+            interpreter.env = prev_env
+            interpreter.current_return_type = prev_rt
+            interpreter.in_async = prev_async
 
     def __iter__(self):
         return self
@@ -106,12 +222,18 @@ class ModuleNamespace:
         return f"module '{mname}'"
 
 class FunctionValue:
-    def __init__(self, params, body, closure_env, return_type, is_async=False):
+    def __init__(self, params, body, closure_env, return_type, is_async=False, layout=None):
         self.params = params
         self.body = body
         self.closure_env = closure_env
         self.return_type = return_type
         self.is_async = is_async
+        self.layout = layout
+        # 'this' is a keyword, so it is only ever bound by bind() and by
+        # call() before the body runs; whether a function sees one is
+        # fixed once its closure env exists.
+        self.has_this = closure_env.has_key("this")
+        self.uses_super = None
 
     @property
     def args(self):
@@ -158,48 +280,106 @@ class FunctionValue:
     def _unwrap(self, v, target=0):
         return v[target] if self._is_entry(v) else v
 
+    def materialize(self, interpreter):
+        if isinstance(self.body, LazyBody):
+            lazy = self.body
+            self.body = interpreter.materialize_body(lazy, self.params)
+            self.layout = lazy.layout
+
     def call(self, interpreter, args):
+        self.materialize(interpreter)
+
         if self.is_async:
             frame = AsyncFrame(interpreter, self, args)
             return async_runtime.loop.create_task(frame)
         
-        local_env = native_env.Environment(parent=self.closure_env)
-        try:
-            this_entry = self.closure_env.get("this", local_env)
+        return self.run(interpreter, self.new_env(), args)
+
+    def new_env(self):
+        local_env = self.closure_env.child(self.layout)
+        if self.has_this:
+            this_entry = self.closure_env.get_key("this", local_env)
             if isinstance(this_entry, tuple) and len(this_entry) == 3:
                 this_obj = this_entry[0]
             else:
                 this_obj = this_entry
-            local_env.define("this", this_obj, "this", False)
-        except Exception:
-            pass
+            local_env.define_key("this", this_obj, "this", False)
+        return local_env
 
-        for name, value in zip(self.params, args):
-            if isinstance(value, FunctionValue):
-                local_env.define(name, value, "function", False)
-            else:
-                local_env.define(name, self._unwrap(value), self._unwrap(value, 1) if isinstance(self._unwrap(value, 1), str) else self._get_type_name(value), False)
+    def call_method(self, interpreter, instance, class_val, args):
+        # Same as bind(instance, class_val).call(interpreter, args), with
+        # 'this' and 'super' defined in the call's own env instead of a
+        # bound env in between.
+        self.materialize(interpreter)
 
+        if self.is_async:
+            return self.bind(instance, class_val).call(interpreter, args)
+
+        local_env = self.closure_env.child(self.layout)
+        local_env.define_key("this", instance, "this", False)
+        if class_val is not None and class_val.superclass:
+            if self.uses_super is None:
+                self.uses_super = mentions_name(self.body, "super")
+            if self.uses_super:
+                local_env.define_key("super", SuperProxy(instance, class_val.superclass), "super", False)
+        return self.run(interpreter, local_env, args)
+
+    def run(self, interpreter, local_env, args):
         prev_env = interpreter.env
         prev_return = interpreter.current_return_type
-
-        interpreter.env = local_env
-        interpreter.current_return_type = self.return_type
-        try:
-            for stmt in self.body:
-                interpreter.visit(stmt)
-        except ReturnSignal as ret:
-            interpreter.env = prev_env
-            interpreter.current_return_type = prev_return
-            return self._unwrap(ret.value)
+        visit = interpreter.visit
+        func = self
+        # Return types of the callers whose frames were reused by tail
+        # calls; their checks run on the final value, as they would have.
+        elided = None
+
+        while True:
+            func.bind_args(local_env, args)
+            interpreter.env = local_env
+            interpreter.current_return_type = func.return_type
+            signal = None
+            for stmt in func.body:
+                result = visit(stmt)
+                if type(result) is Completion:
+                    signal = result
+                    break
+            if signal is None or signal.kind != 'tail':
+                break
+            if elided is None:
+                elided = {}
+            elided[func.return_type] = None
+            func, args = signal.value
+            func.materialize(interpreter)
+            local_env = func.new_env()
+
+        value = None if signal is None else func._unwrap(func.returned(signal))
+        if elided is not None:
+            for return_type in reversed(elided):
+                interpreter.current_return_type = return_type
+                interpreter.signal_return(value)
 
         interpreter.env = prev_env
         interpreter.current_return_type = prev_return
+        return value
 
-        return None
+    def bind_args(self, local_env, args):
+        define = local_env.define_key
+        for name, value in zip(self.params, args):
+            if isinstance(value, FunctionValue):
+                define(name, value, "function", False)
+            elif isinstance(value, tuple) and len(value) == 3:
+                vtype = value[1]
+                define(name, value[0], vtype if isinstance(vtype, str) else self._get_type_name(value), False)
+            else:
+                define(name, value, value if isinstance(value, str) else self._get_type_name(value), False)
+
+    def returned(self, signal):
+        if signal.kind != 'return':
+            raise Exception(_OUTSIDE_LOOP[signal.kind])
+        return signal.value
     
     def bind(self, instance, class_val=None):
-        env = native_env.Environment(parent=self.closure_env)
+        env = self.closure_env.child()
         env.bind_this(instance)
         if class_val and getattr(class_val, "superclass", None):
             env.define(
@@ -212,7 +392,9 @@ class FunctionValue:
             self.params,
             self.body,
             env,
-            self.return_type
+            self.return_type,
+            is_async=self.is_async,
+            layout=self.layout
         )
     
     def __repr__(self):
@@ -223,18 +405,95 @@ class SuperProxy:
         self.instance = instance
         self.superclass = superclass
 
+class Shape:
+    """The field layout shared by instances with the same fields.
+
+    Maps each field name to its index in ClassInstance.values. decl_envs
+    holds the declaring class env of private fields and None for public
+    ones. Adding a field moves an instance to a child shape, and children
+    are cached, so instances of one class end up sharing a single shape.
+    """
+    __slots__ = ('names', 'index', 'decl_envs', 'transitions')
+
+    def __init__(self, names=(), decl_envs=()):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.decl_envs = decl_envs
+        self.transitions = {}
+
+    def add(self, name, decl_env):
+        key = (name, decl_env)
+        shape = self.transitions.get(key)
+        if shape is None:
+            shape = Shape(self.names + (name,), self.decl_envs + (decl_env,))
+            self.transitions[key] = shape
+        return shape
+
+EMPTY_SHAPE = Shape()
+
+class InstanceTemplate:
+    """Shape, default field values and init of a class's new instances.
+
+    Built from the class envs of the class and its superclasses, and
+    rebuilt once any of those envs has been assigned to since.
+    """
+    __slots__ = ('envs', 'versions', 'shape', 'values', 'init')
+
+    # init is not defined by the class and must be looked up per instance.
+    LOOKUP = object()
+
+    def __init__(self, class_val, shape, values, init):
+        envs = []
+        while class_val is not None:
+            envs.append(class_val.closure_env)
+            class_val = class_val.superclass
+        self.envs = tuple(envs)
+        self.versions = tuple(env.version for env in envs)
+        self.shape = shape
+        self.values = tuple(values)
+        self.init = init
+
+    def is_current(self):
+        for env, version in zip(self.envs, self.versions):
+            if env.version != version:
+                return False
+        return True
+
 class ClassInstance:
-    def __init__(self, class_def):
-        self.class_def = class_def
-        self.fields = {}
+    __slots__ = ('class_def', 'class_val', 'shape', 'values')
+
+    def __init__(self, class_val):
+        self.class_def = class_val.class_def
+        self.class_val = class_val
+        self.shape = EMPTY_SHAPE
+        self.values = []
+
+    def load_fields(self, fields):
+        # fields: {name: (value, is_private, declaring env)}
+        shape = self.shape
+        values = self.values
+        for name, (value, is_priv, decl_env) in fields.items():
+            shape = shape.add(name, decl_env if is_priv else None)
+            values.append(value)
+        self.shape = shape
+
+    @property
+    def fields(self):
+        shape = self.shape
+        return {name: (self.values[i], shape.decl_envs[i] is not None, shape.decl_envs[i])
+                for i, name in enumerate(shape.names)}
 
 class Interpreter:
-    def __init__(self):
+    def __init__(self, ast_cache=None, optimize=True, jobs=None):
         self.global_env = native_env.Environment()
         self.global_env.define("input", lambda *args: input(*args), "function", False)
         self.global_env.define("output", lambda *args: print(*args), "function", False)
         self.global_env.define("type", lambda x: self.get_type_name(x), "function", False)
         self.global_env.define("kindof", lambda v,t: self.instance_of(v,t), "function", False)
+        self.global_env.define("sleep", lambda ms: async_runtime.loop.sleep(ms / 1000), "function", False)
+        self.global_env.define("setTimeout", lambda f,ms: self.set_timer(f, ms, False), "function", False)
+        self.global_env.define("setInterval", lambda f,ms: self.set_timer(f, ms, True), "function", False)
+        self.global_env.define("clearTimer", lambda timer: timer.cancel(), "function", False)
         for i in global_std.functions:
             self.global_env.define(i[0], i[1], i[2], i[3])
         self.env = self.global_env
@@ -244,6 +503,13 @@ class Interpreter:
         self.imported_modules = {}
         self.currently_importing = set()
         self.in_async = False
+        self.async_runner = AsyncRunner(self)
+        self.awaited = None
+        self.ast_cache = ast_cache
+        self.optimizer = ASTOptimizer() if optimize else None
+        self.jobs = (os.cpu_count() or 1) if jobs is None else jobs
+        self.preloaded_asts = {}
+        self.visitors = {}
 
     def is_entry(self, v):
         return isinstance(v, tuple) and len(v) == 3
@@ -251,8 +517,18 @@ class Interpreter:
     def unwrap(self, v, target=0):
         return v[target] if self.is_entry(v) else v
 
-    def push_scope(self):
-        self.env = native_env.Environment(parent=self.env)
+    def set_timer(self, callback, ms, repeat):
+        if isinstance(callback, FunctionValue):
+            run = lambda: callback.call(self, [])
+        elif callable(callback):
+            run = callback
+        else:
+            raise Exception(f"TypeError: timer callback must be a function, not '{self.get_type_name(callback)}'")
+        delay = ms / 1000
+        return async_runtime.loop.call_later(delay, run, delay if repeat else None)
+
+    def push_scope(self, layout=None):
+        self.env = self.env.child(layout)
 
     def instance_of(self, value, ttype):
         actual = self.get_type_name(value)
@@ -393,25 +669,38 @@ class Interpreter:
         self.env = self.env.parent
 
     def visit(self, node):
-        method_name = 'visit_' + node.__class__.__name__
-        method = getattr(self, method_name, self.no_visit_method)
+        method = self.visitors.get(node.__class__)
+        if method is None:
+            method = self.visitor_for(node.__class__)
         return method(node)
 
+    def visitor_for(self, cls):
+        # Quickened nodes subclass the node they specialize, so fall back
+        # along the MRO to the nearest class with a visitor.
+        method = self.no_visit_method
+        for klass in cls.__mro__:
+            found = getattr(self, 'visit_' + klass.__name__, None)
+            if found is not None:
+                method = found
+                break
+        self.visitors[cls] = method
+        return method
+
     def no_visit_method(self, node):
         raise Exception(f'No visit_{node.__class__.__name__} method')
     
-    def _is_env_descendant(self, origin_env, declaring_env):
-        cur = origin_env
-        while cur and cur is not None:
-            if cur is declaring_env:
-                return True
-            cur = getattr(cur, "parent", None)
-        return False
-
     def visit_Program(self, node):
-        for stmt in node.statements:
+        return self.exec_block(node.statements)
+
+    def exec_block(self, stmts):
+        # Runs stmts in order, stopping at the first one that completes
+        # abruptly and returning its Completion.
+        for stmt in stmts:
             if stmt is not None:
-                self.visit(stmt)
+                signal = self.visit(stmt)
+                if type(signal) is Completion:
+                    return signal
+        return None
 
     def _is_subclass_or_same(self, sub_class_val, super_class_val):
         current = sub_class_val
@@ -428,11 +717,11 @@ class Interpreter:
         name = node.name
 
         if vtype == "auto":
-            self.env.define(name, val, vtype, node.private)
+            self.env.define_key(name, val, vtype, node.private)
             return
 
         if val is None:
-            self.env.define(node.name, None, vtype, node.private)
+            self.env.define_key(name, None, vtype, node.private)
             return
 
         if vtype in self.classes:
@@ -444,7 +733,7 @@ class Interpreter:
                         f"TypeError: Cannot assign instance of '{value_class_val.class_def.name}' "
                         f"to variable '{name}' of type '{declared_class_val.class_def.name}'"
                     )
-                self.env.define(name, val, vtype, node.private)
+                self.env.define_key(name, val, vtype, node.private)
                 return
             else:
                 raise Exception(f"Expected instance of class '{vtype}' for variable '{name}'")
@@ -455,7 +744,7 @@ class Interpreter:
                 if isinstance(type_obj, tuple):
                     type_obj = type_obj[0]
                 if isinstance(type_obj, type) and isinstance(val, type_obj):
-                    self.env.define(name, val, vtype, node.private)
+                    self.env.define_key(name, val, vtype, node.private)
                     return
                 elif isinstance(type_obj, type):
                     raise Exception(
@@ -550,7 +839,7 @@ class Interpreter:
         else:
             raise Exception(f"TypeError: The type '{vtype}' could not be found")
         
-        self.env.define(node.name, val, node.vtype, node.private)
+        self.env.define_key(node.name, val, node.vtype, node.private)
 
     def visit_VarSet(self, node):
         val_entry = self.visit(node.value)
@@ -560,25 +849,74 @@ class Interpreter:
 
         try:
             if op == "=":
-                self.env.assign(name, val)
+                self.assign_resolved(node, val)
             else:
-                current_entry = self.env.get(name)
+                current_entry = self.get_resolved(node)
                 current_val = self.unwrap(current_entry)
                 if op == "+=":
-                    self.env.assign(name, current_val + val)
+                    self.assign_resolved(node, current_val + val)
                 elif op == "-=":
-                    self.env.assign(name, current_val - val)
+                    self.assign_resolved(node, current_val - val)
                 elif op == "*=":
-                    self.env.assign(name, current_val * val)
+                    self.assign_resolved(node, current_val * val)
                 elif op == "/=":
-                    self.env.assign(name, current_val / val)
+                    self.assign_resolved(node, current_val / val)
                 elif op == "%=":
-                    self.env.assign(name, current_val % val)
+                    self.assign_resolved(node, current_val % val)
                 else:
                     raise Exception(f"Unknown assignment operator '{op}'")
         except Exception as e:
             raise e
     
+    def set_property(self, node, obj, val):
+        # node is the VarSetExpr whose target is the PropertyAccess.
+        prop = node.target_expr.property_name
+        op = node.op
+
+        if not isinstance(obj, ClassInstance):
+            raise Exception(f"Cannot assign property '{prop}' on non-class instance {obj}")
+
+        # node caches the shape it last saw, the field's index in it and,
+        # when the assignment added the field, the shape it moved to.
+        shape = obj.shape
+        if node.shape is shape:
+            index = node.index
+            next_shape = node.next_shape
+        else:
+            index = shape.index.get(prop)
+            next_shape = None
+            if index is None:
+                if op != "=":
+                    raise Exception(f"Property '{prop}' is not set on the object for compound assignment")
+                index = len(shape.names)
+                next_shape = shape.add(prop, None)
+            node.shape = shape
+            node.index = index
+            node.next_shape = next_shape
+
+        if next_shape is not None:
+            obj.shape = next_shape
+            obj.values.append(val)
+        elif op == "=":
+            obj.values[index] = val
+        else:
+            decl_env = shape.decl_envs[index]
+            if decl_env is not None and not self.env.descends_from(decl_env):
+                raise Exception(f"AccessError: Property '{prop}' is private")
+            current_val = obj.values[index]
+            if op == "+=":
+                obj.values[index] = current_val + val
+            elif op == "-=":
+                obj.values[index] = current_val - val
+            elif op == "*=":
+                obj.values[index] = current_val * val
+            elif op == "/=":
+                obj.values[index] = current_val / val
+            elif op == "%=":
+                obj.values[index] = current_val % val
+            else:
+                raise Exception(f"Unknown assignment operator '{op}'")
+
     def visit_VarSetExpr(self, node):
         val_entry = self.visit(node.value)
         val = self.unwrap(val_entry)
@@ -589,63 +927,27 @@ class Interpreter:
             name = target_node.name
             try:
                 if op == "=":
-                    self.env.assign(name, val)
+                    self.assign_resolved(target_node, val)
                 else:
-                    current_entry = self.env.get(name)
+                    current_entry = self.get_resolved(target_node)
                     current_val = self.unwrap(current_entry)
                     if op == "+=":
-                        self.env.assign(name, current_val + val)
+                        self.assign_resolved(target_node, current_val + val)
                     elif op == "-=":
-                        self.env.assign(name, current_val - val)
+                        self.assign_resolved(target_node, current_val - val)
                     elif op == "*=":
-                        self.env.assign(name, current_val * val)
+                        self.assign_resolved(target_node, current_val * val)
                     elif op == "/=":
-                        self.env.assign(name, current_val / val)
+                        self.assign_resolved(target_node, current_val / val)
                     elif op == "%=":
-                        self.env.assign(name, current_val % val)
+                        self.assign_resolved(target_node, current_val % val)
                     else:
                         raise Exception(f"Unknown assignment operator '{op}'")
             except Exception as e:
                 raise e
         elif isinstance(target_node, PropertyAccess):
             obj_entry = self.visit(target_node.obj)
-            obj = self.unwrap(obj_entry)
-            prop = target_node.property_name
-
-            if not isinstance(obj, ClassInstance):
-                raise Exception(f"Cannot assign property '{prop}' on non-class instance {obj}")
-
-            if op == "=":
-                existing = obj.fields.get(prop)
-                if existing and isinstance(existing, tuple) and len(existing) >= 3:
-                    _, is_priv, decl_env = existing
-                    obj.fields[prop] = (val, is_priv, decl_env)
-                else:
-                    obj.fields[prop] = (val, False, self.env)
-            else:
-                current_entry = obj.fields.get(prop, None)
-                if current_entry is None:
-                    raise Exception(f"Property '{prop}' is not set on the object for compound assignment")
-                if isinstance(current_entry, tuple) and len(current_entry) >= 3:
-                    current_val, is_priv, decl_env = current_entry
-                else:
-                    current_val, is_priv, decl_env = current_entry, False, self.env
-
-                if is_priv:
-                    if not self._is_env_descendant(self.env, decl_env):
-                        raise Exception(f"AccessError: Property '{prop}' is private")
-                if op == "+=":
-                    obj.fields[prop] = (current_val + val, is_priv, decl_env)
-                elif op == "-=":
-                    obj.fields[prop] = (current_val - val, is_priv, decl_env)
-                elif op == "*=":
-                    obj.fields[prop] = (current_val * val, is_priv, decl_env)
-                elif op == "/=":
-                    obj.fields[prop] = (current_val / val, is_priv, decl_env)
-                elif op == "%=":
-                    obj.fields[prop] = (current_val % val, is_priv, decl_env)
-                else:
-                    raise Exception(f"Unknown assignment operator '{op}'")
+            self.set_property(node, self.unwrap(obj_entry), val)
         elif isinstance(target_node, IndexAccess):
             container_entry = self.visit(target_node.collection)
             container = self.unwrap(container_entry)
@@ -677,10 +979,27 @@ class Interpreter:
         else:
             raise Exception(f"Unsupported assignment target type {type(target_node)}")
 
+    def get_resolved(self, node):
+        # node is a Var or VarSet; ScopeResolver sets slot when the name
+        # has a fixed place in an enclosing layout.
+        if node.slot is not None:
+            entry = self.env.get_slot(node.depth, node.slot, node.layout)
+            if entry is not None:
+                return entry
+        return self.env.get_key(node.name)
+
+    def assign_resolved(self, node, value):
+        if node.slot is None or not self.env.assign_slot(node.depth, node.slot, node.layout, value):
+            self.env.assign_key(node.name, value)
+
     def visit_Var(self, node):
+        if node.slot is not None:
+            entry = self.env.get_slot(node.depth, node.slot, node.layout)
+            if entry is not None:
+                return entry
         raw_val = None
         try:
-            raw_val = self.env.get(node.name, self.env)
+            raw_val = self.env.get_key(node.name, self.env)
         except Exception:
             raise Exception(f"{node.name} not found")
         return raw_val
@@ -689,11 +1008,27 @@ class Interpreter:
         return node.value
 
     def visit_BinaryOp(self, node):
-        left_entry = self.visit(node.left)
-        right_entry = self.visit(node.right)
-        left = self.unwrap(left_entry)
-        right = self.unwrap(right_entry)
-        op = node.op
+        left = self.unwrap(self.visit(node.left))
+        right = self.unwrap(self.visit(node.right))
+        node.hits += 1
+        if node.hits == QUICKEN_AFTER:
+            quicken(node, left, right)
+        return self.binary_op(node.op, left, right)
+
+    def visit_QuickBinaryOp(self, node):
+        kind = node.operand_type
+        left = self.visit(node.left)
+        if type(left) is not kind:
+            left = self.unwrap(left)
+        right = self.visit(node.right)
+        if type(right) is not kind:
+            right = self.unwrap(right)
+        if type(left) is kind and type(right) is kind:
+            return node.func(left, right)
+        deoptimize(node)
+        return self.binary_op(node.op, left, right)
+
+    def binary_op(self, op, left, right):
         if left is None or right is None:
             raise Exception(f"RuntimeError: Cannot perform '{op}' on null value")
         if op == '+':
@@ -753,49 +1088,44 @@ class Interpreter:
 
     def visit_IfBlock(self, node):
         if self.unwrap(self.visit(node.cond)):
-            for stmt in node.body:
-                if stmt is not None:
-                    self.visit(stmt)
-            return
+            return self.exec_block(node.body)
         for cond, body in node.elseif_blocks:
             if self.unwrap(self.visit(cond)):
-                for stmt in body:
-                    if stmt is not None:
-                        self.visit(stmt)
-                return
+                return self.exec_block(body)
         if node.else_block:
-            for stmt in node.else_block:
-                if stmt is not None:
-                    self.visit(stmt)
+            return self.exec_block(node.else_block)
 
     def visit_SwitchNode(self, node):
         switch_value = self.unwrap(self.visit(node.expr))
-        try:
-            for case_expr, body in node.cases:
-                case_value = self.unwrap(self.visit(case_expr))
-                if switch_value == case_value:
-                    for stmt in body:
-                        self.visit(stmt)
-                    break
-            else:
-                if node.default_case:
-                    for stmt in node.default_case:
-                        self.visit(stmt)
-        except BreakSignal:
-            pass
+        signal = None
+        for case_expr, body in node.cases:
+            case_value = self.unwrap(self.visit(case_expr))
+            if switch_value == case_value:
+                signal = self.exec_block(body)
+                break
+        else:
+            if node.default_case:
+                signal = self.exec_block(node.default_case)
+        if signal is BREAK:
+            return None
+        return signal
 
     def visit_Break(self, node):
-        raise BreakSignal()
+        return BREAK
     
     def visit_AwaitExpr(self, node):
-        fut = self.visit(node.expr)
+        # Async function bodies suspend at their awaits instead (see
+        # AsyncRunner), so this only runs outside of them and drives the
+        # event loop until fut is done.
+        fut = self.unwrap(self.visit(node.expr))
         if not isinstance(fut, async_runtime.Future):
             raise Exception("'await' can only be used on async values")
         if fut.done:
-            return fut.result
-        while not fut.done:
-            async_runtime.loop.run()
-        return fut.result
+            return fut.outcome()
+        return async_runtime.loop.run_until(fut)
+
+    def visit_AwaitedValue(self, node):
+        return self.awaited[node.index]
 
     def visit_FuncDef(self, node):
         valid_builtin_types = {"void", "int", "long", "float", "double", "str", "bool", "list", "tuple", "map", "any"}
@@ -821,9 +1151,10 @@ class Interpreter:
             node.body,
             self.env,
             rt_lower if rt_lower in valid_builtin_types else return_type,
-            is_async=node.is_async
+            is_async=node.is_async,
+            layout=node.layout
         )
-        self.env.define(node.name, func_val, "function", node.private)
+        self.env.define_key(node.name, func_val, "function", node.private)
 
     def visit_LambdaFunc(self, node):
         return FunctionValue(
@@ -831,47 +1162,54 @@ class Interpreter:
             node.body, 
             self.env, 
             "any",
-            is_async=getattr(node, 'is_async', False)
+            is_async=getattr(node, 'is_async', False),
+            layout=node.layout
         )
 
-    def collect_fields(self, class_val, instance):
+    def instance_template(self, class_val):
+        instance = ClassInstance(class_val)
+        fields = {}
+        self.collect_fields(class_val, fields)
+
+        class_vars = class_val.closure_env.vars
+        for k, v in class_vars.items():
+            value, vtype, is_priv = v
+            if vtype == "function":
+                continue
+            fields[k] = (value, bool(is_priv), class_val.closure_env)
+        instance.load_fields(fields)
+
+        init = class_vars.get("init", InstanceTemplate.LOOKUP)
+        class_val.template = InstanceTemplate(class_val, instance.shape, instance.values, init)
+        return class_val.template
+
+    def collect_fields(self, class_val, fields):
         if class_val.superclass:
-            self.collect_fields(class_val.superclass, instance)
+            self.collect_fields(class_val.superclass, fields)
 
         class_vars = getattr(class_val.closure_env, "vars", {})
         for k, v in class_vars.items():
             if isinstance(v, tuple) and v[1] == "function":
                 continue
-            if k not in instance.fields:
-                instance.fields[k] = (v[0], v[2], class_val.closure_env)
+            if k not in fields:
+                fields[k] = (v[0], v[2], class_val.closure_env)
 
     def visit_FuncCall(self, node):
         if node.name in self.classes:
             class_val = self.classes[node.name]
-            instance = ClassInstance(class_val.class_def)
-            self.collect_fields(class_val, instance)
-
-            try:
-                class_vars = getattr(class_val.closure_env, "vars", None)
-                if class_vars and isinstance(class_vars, dict):
-                    for k, v in class_vars.items():
-                        try:
-                            if isinstance(v, tuple) and len(v) == 3:
-                                value, vtype, is_priv = v
-                                if vtype == "function":
-                                    continue
-                                instance.fields[k] = (value, bool(is_priv), class_val.closure_env)
-                            else:
-                                instance.fields[k] = (v, False, class_val.closure_env)
-                        except Exception:
-                            instance.fields[k] = (v, False, class_val.closure_env)
-            except Exception:
-                pass
-
-            try:
-                init_func_val = class_val.closure_env.get("init", class_val.closure_env)
-            except Exception:
-                init_func_val = None
+            template = class_val.template
+            if template is None or not template.is_current():
+                template = self.instance_template(class_val)
+            instance = ClassInstance(class_val)
+            instance.shape = template.shape
+            instance.values = list(template.values)
+
+            init_func_val = template.init
+            if init_func_val is InstanceTemplate.LOOKUP:
+                # init is not defined by the class itself, so it comes from
+                # the global env and can change at any time.
+                closure_env = class_val.closure_env
+                init_func_val = closure_env.get_key("init", closure_env) if closure_env.has_key("init") else None
 
             if init_func_val:
                 if isinstance(init_func_val, tuple) and len(init_func_val) == 3 and init_func_val[1] == 'function':
@@ -880,16 +1218,15 @@ class Interpreter:
                     func_value = init_func_val
 
                 if isinstance(func_value, FunctionValue):
-                    bound_init = func_value.bind(instance)
                     args = [self.visit(arg) for arg in node.args]
-                    bound_init.call(self, args)
+                    func_value.call_method(self, instance, None, args)
                 elif callable(func_value):
                     args = [self.visit(arg) for arg in node.args]
                     func_value(*args)
 
             return instance
 
-        func_val = self.env.get(node.name, self.env)
+        func_val = self.env.get_key(node.name, self.env)
         if isinstance(func_val, tuple):
             func = func_val[0]
         else:
@@ -911,29 +1248,39 @@ class Interpreter:
         raise Exception(f"'{node.name}' is not a function")
 
     def visit_ReturnNode(self, node):
-        type_map = {
-            int: "int",
-            str: "str",
-            float: "float",
-            bool: "bool",
-            type(None): "null",
-            list: "list",
-            tuple: "tuple",
-            dict: "map",
-        }
         if node.value is None:
-            val = None
-            val_entry = (None, "null", False)
-            vtype = "null"
-        else:
-            val_entry = self.visit(node.value)
-            val = self.unwrap(val_entry)
-            vtype = val_entry[1] if self.is_entry(val_entry) else type_map.get(type(val), "unknown")
+            return self.signal_return((None, "null", False))
+        if node.tail:
+            signal = self.tail_call(node.value)
+            if signal is not None:
+                return signal
+        return self.signal_return(self.visit(node.value))
+
+    def tail_call(self, node):
+        # For `return f(...)` inside a synchronous function, where f is an
+        # Oryon function: evaluates the arguments and returns a 'tail'
+        # Completion, so FunctionValue.run calls f in the current frame.
+        # Returns None, having evaluated nothing, for any other call.
+        if self.current_return_type is None or self.in_async or node.name in self.classes:
+            return None
+        env = self.env
+        if not env.has_key(node.name):
+            return None
+        func = env.get_key(node.name, env)
+        if isinstance(func, tuple):
+            func = func[0]
+        if not isinstance(func, FunctionValue) or func.is_async:
+            return None
+        return Completion('tail', (func, [self.visit(arg) for arg in node.args]))
+
+    def signal_return(self, val_entry):
+        val = self.unwrap(val_entry)
+        vtype = val_entry[1] if self.is_entry(val_entry) else _RETURN_TYPES.get(type(val), "unknown")
 
         expected = self.current_return_type.lower() if self.current_return_type else "void"
 
         if expected == "any":
-            raise ReturnSignal(val_entry)
+            return Completion('return', val_entry)
 
         valid_types = {"void", "int", "float", "double", "long", "str", "bool", "null", "list", "tuple", "map"}
 
@@ -942,18 +1289,18 @@ class Interpreter:
                 class_def = self.classes[expected]
                 if not (hasattr(val, 'class_def') and val.class_def.name == expected and vtype == expected):
                     raise Exception(f"TypeError: Function expected to return instance of '{expected}' but returned {type(val).__name__} with type {vtype}")
-                raise ReturnSignal(val_entry)
+                return Completion('return', val_entry)
             else:
                 type_obj_entry = self.env.get(self.current_return_type)
                 type_obj = self.unwrap(type_obj_entry)
                 if type_obj is not None:
-                    raise ReturnSignal(val_entry)
+                    return Completion('return', val_entry)
                 raise Exception(f"TypeError: Unknown return type '{expected}' in function")
 
         if expected == "void":
             if val is not None:
                 raise Exception(f"TypeError: Function declared as void but returned a value")
-            raise ReturnSignal(val_entry)
+            return Completion('return', val_entry)
 
         def check_type(py_types, expected_name):
             if not isinstance(val, py_types) or vtype != expected_name:
@@ -984,7 +1331,7 @@ class Interpreter:
         elif expected == "map":
             check_type(dict, "map")
 
-        raise ReturnSignal(val_entry)
+        return Completion('return', val_entry)
 
     def visit_ListLiteral(self, node):
         return [self.unwrap(self.visit(item)) for item in node.items]
@@ -995,6 +1342,9 @@ class Interpreter:
     def visit_DictLiteral(self, node):
         return {self.unwrap(self.visit(k)): self.unwrap(self.visit(v)) for k, v in node.pairs}
 
+    def visit_ConstCollection(self, node):
+        return node.value.copy()
+
     def visit_IndexAccess(self, node):
         collection = self.unwrap(self.visit(node.collection))
         index = self.unwrap(self.visit(node.index))
@@ -1005,17 +1355,20 @@ class Interpreter:
             raise Exception(f"Indexing error: {e}")
 
     def visit_MethodCall(self, node):
+        receiver = self.visit(node.receiver)
+        if isinstance(receiver, tuple):
+            receiver = receiver[0]
+        args = [self.unwrap(self.visit(arg)) for arg in node.args]
+        return self.invoke_method(node, receiver, args)
+
+    def invoke_method(self, node, receiver, args):
+        # Calls the method of MethodCall node on an evaluated receiver.
         def unwrap_entry(entry):
             while isinstance(entry, tuple) and len(entry) == 3:
                 entry = entry[0]
             return entry
 
-        receiver = self.visit(node.receiver)
-        if isinstance(receiver, tuple):
-            receiver = receiver[0]
-
         method_name = node.method_name
-        args = [self.unwrap(self.visit(arg)) for arg in node.args]
 
         if isinstance(receiver, ModuleNamespace):
             try:
@@ -1026,8 +1379,7 @@ class Interpreter:
             value = unwrap_entry(entry)
 
             if isinstance(value, ClassValue):
-                class_def = value.class_def
-                instance = ClassInstance(class_def)
+                instance = ClassInstance(value)
 
                 init_entry = (
                     value.closure_env.get("init") or
@@ -1036,8 +1388,7 @@ class Interpreter:
 
                 if init_entry:
                     init_func = unwrap_entry(init_entry)
-                    bound = init_func.bind(instance, value)
-                    bound.call(self, args)
+                    init_func.call_method(self, instance, value, args)
 
                 return instance
 
@@ -1050,48 +1401,66 @@ class Interpreter:
             raise Exception(f"Attribute '{method_name}' of module is not callable")
         
         if isinstance(receiver, SuperProxy):
-            (entry, _) = self.find_method(receiver.superclass, method_name)
-            func = self.unwrap(entry)
+            method = receiver.superclass.methods.get(method_name)
+            if method is not None:
+                func = method[0]
+            else:
+                (entry, _) = self.find_method(receiver.superclass, method_name)
+                func = self.unwrap(entry)
 
             if not isinstance(func, FunctionValue):
                 raise Exception(f"Super method '{method_name}' is not callable")
 
-            bound = func.bind(receiver.instance, receiver.superclass)
-            return bound.call(self, args)
+            return func.call_method(self, receiver.instance, receiver.superclass, args)
 
         if isinstance(receiver, ClassValue):
-            (entry, declaring_class) = self.find_method(receiver, method_name)
-            func = unwrap_entry(entry)
+            method = receiver.methods.get(method_name)
+            if method is not None:
+                func, declaring_class = method[0], method[1]
+            else:
+                (entry, declaring_class) = self.find_method(receiver, method_name)
+                func = unwrap_entry(entry)
 
             if isinstance(func, FunctionValue):
-                this_entry = self.env.get("this", self.env)
+                this_entry = self.env.get_key("this", self.env)
                 this_obj = this_entry[0] if isinstance(this_entry, tuple) else this_entry
-                bound = func.bind(this_obj, declaring_class)
-                return bound.call(self, args)
+                return func.call_method(self, this_obj, declaring_class, args)
 
             raise Exception(f"Class method '{method_name}' is not callable")
 
         if isinstance(receiver, ClassInstance):
-            class_val = self.classes[receiver.class_def.name]
+            class_val = receiver.class_val
 
-            try:
-                (entry, declaring_class) = self.find_method(class_val, method_name)
-                func_obj = unwrap_entry(entry)
-                is_private = self.unwrap(entry, 2)
-            except Exception:
-                raise Exception(
-                    f"Method '{method_name}' not found in class {class_val.class_def.name}"
-                )
+            # Call-site cache of the method table entry for the last class
+            # seen here.
+            if node.cache_class is class_val:
+                method = node.cache_method
+            else:
+                method = class_val.methods.get(method_name)
+                if method is not None:
+                    node.cache_class = class_val
+                    node.cache_method = method
+
+            if method is not None:
+                func_obj, declaring_class, is_private = method
+            else:
+                try:
+                    (entry, declaring_class) = self.find_method(class_val, method_name)
+                    func_obj = unwrap_entry(entry)
+                    is_private = self.unwrap(entry, 2)
+                except Exception:
+                    raise Exception(
+                        f"Method '{method_name}' not found in class {class_val.class_def.name}"
+                    )
 
             if is_private:
                 call_env = self.env
                 declaring_env = declaring_class.closure_env
-                if not self._is_env_descendant(call_env, declaring_env):
+                if not call_env.descends_from(declaring_env):
                     raise Exception(f"AccessError: '{method_name}' is private")
 
             if isinstance(func_obj, FunctionValue):
-                bound = func_obj.bind(receiver, declaring_class)
-                return bound.call(self, args)
+                return func_obj.call_method(self, receiver, declaring_class, args)
 
             if callable(func_obj):
                 return func_obj(*args)
@@ -1214,7 +1583,7 @@ class Interpreter:
         return self.visit(node.expr)
     
     def visit_WhileNode(self, node):
-        native_loop.native_while_loop(self, node.cond, node.body, BreakSignal, ContinueSignal, self.visit)
+        return native_loop.native_while_loop(self, node.cond, node.body, Completion, BREAK, CONTINUE, self.visit)
             
     def visit_ForNode(self, node):
         iterable_entry = self.visit(node.iterable_expr)
@@ -1223,46 +1592,15 @@ class Interpreter:
         if not hasattr(iterable, "__iter__"):
             raise Exception(f"TypeError: '{type(iterable).__name__}' object is not iterable")
 
-        try:
-            for item in iterable:
-                self.env.define(node.var_name, item, self.get_type_name(item), False)
-
-                try:
-                    for stmt in node.body:
-                        self.visit(stmt)
-                except ContinueSignal:
-                    continue
-                except BreakSignal:
-                    break
-        except BreakSignal:
-            pass
+        return native_loop.native_for_loop(self, iterable, node.var_name, node.body, self.env, self.get_type_name,
+                                           Completion, BREAK, CONTINUE, self.visit)
 
     def visit_CStyleForNode(self, node):
-        self.push_scope()
+        self.push_scope(node.layout)
 
         try:
-            if node.init_stmt is not None:
-                self.visit(node.init_stmt)
-
-            while True:
-                if node.condition is not None:
-                    cond_entry = self.visit(node.condition)
-                    cond_value = self.unwrap(cond_entry)
-
-                    if not cond_value:
-                        break
-
-                try:
-                    for stmt in node.body:
-                        self.visit(stmt)
-                except ContinueSignal:
-                    pass
-                except BreakSignal:
-                    break
-
-                if node.increment is not None:
-                    self.visit(node.increment)
-
+            return native_loop.native_c_style_for_loop(self, self.env, node.init_stmt, node.condition, node.increment,
+                                                       node.body, node.counter, Completion, BREAK, CONTINUE, self.visit)
         finally:
             self.pop_scope()
 
@@ -1274,13 +1612,22 @@ class Interpreter:
         except Exception:
             pass
 
-        if class_val.superclass_val:
-            return self.find_method(class_val.superclass_val, method_name)
+        if class_val.superclass:
+            return self.find_method(class_val.superclass, method_name)
 
         raise Exception(f"Method '{method_name}' not found in class {class_val.class_def.name}")
 
+    def method_table(self, class_val):
+        methods = dict(class_val.superclass.methods) if class_val.superclass else {}
+        for name, entry in class_val.closure_env.vars.items():
+            value, vtype, is_priv = entry
+            if vtype == "function" and isinstance(value, FunctionValue):
+                methods[name] = (value, class_val, bool(is_priv))
+        return methods
+
     def visit_ClassDef(self, node):
-        class_env = native_env.Environment(parent=self.global_env)
+        class_env = self.global_env.child()
+        class_env.set_class_scope()
 
         prev_env = self.env
         self.env = class_env
@@ -1297,26 +1644,32 @@ class Interpreter:
             superclass_val = self.classes[node.superclass]
 
         class_val = ClassValue(node, class_env, superclass_val)
+        class_val.methods = self.method_table(class_val)
+        self.instance_template(class_val)
         self.classes[node.name] = class_val
         self.env.define(node.name, class_val, "class", node.private)
 
     def visit_PropertyAccess(self, node):
         obj_entry = self.visit(node.obj)
-        obj = self.unwrap(obj_entry)
+        return self.get_property(node, self.unwrap(obj_entry))
+
+    def get_property(self, node, obj):
         prop = node.property_name
 
         if isinstance(obj, ClassInstance):
-            if prop in obj.fields:
-                entry = obj.fields[prop]
-                if isinstance(entry, tuple) and len(entry) >= 3:
-                    val, is_priv, decl_env = entry[0], bool(entry[1]), entry[2]
-                    if is_priv:
-                        if not self._is_env_descendant(self.env, decl_env):
-                            raise Exception(f"AccessError: '{prop}' is private")
-                    return val
-                else:
-                    return entry
-            raise Exception(f"Property '{prop}' not found on instance of class '{obj.class_def.name}'")
+            shape = obj.shape
+            if node.shape is shape:
+                index = node.index
+            else:
+                index = shape.index.get(prop)
+                if index is None:
+                    raise Exception(f"Property '{prop}' not found on instance of class '{obj.class_def.name}'")
+                node.shape = shape
+                node.index = index
+            decl_env = shape.decl_envs[index]
+            if decl_env is not None and not self.env.descends_from(decl_env):
+                raise Exception(f"AccessError: '{prop}' is private")
+            return obj.values[index]
         elif isinstance(obj, dict):
             if prop in obj:
                 return obj[prop]
@@ -1349,150 +1702,107 @@ class Interpreter:
         raise ThrowSignal(value, exception_type)
     
     def visit_TryCatchNode(self, node):
+        if not node.finally_block:
+            return self.try_catch(node)
         try:
-            for stmt in node.try_block:
-                self.visit(stmt)
-        except ThrowSignal as err:
-            isCaught = False
-
-            if len(node.catchonly_block) > 0:
-                for block in node.catchonly_block:
-                    if block[2] is not None and not isCaught:
-                        expected_type = self.visit(block[2])
-                        actual_type = err.exception_type if err.exception_type else "Exception"
-
-                        if expected_type == actual_type:
-                            isCaught = True
-                            self.push_scope()
-
-                            if block[0] is not None:
-                                if isinstance(err.value, str):
-                                    error_msg = err.value
-                                elif hasattr(err.value, 'value'):
-                                    error_msg = err.value.value
-                                else:
-                                    error_msg = str(err.value)
-
-                                self.env.define(block[0], error_msg, "str", False)
-
-                            if block[1] is not None:
-                                self.env.define(block[1], actual_type, "str", False)
-
-                            try:
-                                for stmt in block[3]:
-                                    self.visit(stmt)
-                            finally:
-                                self.pop_scope()
-                            break
-
-            if len(node.catch_block) > 0 and not isCaught:
-                isCaught = True
-                self.push_scope()
-
-                if node.catch_error is not None:
-                    if isinstance(err.value, str):
-                        error_msg = err.value
-                    elif hasattr(err.value, 'value'):
-                        error_msg = err.value.value
-                    else:
-                        error_msg = str(err.value)
-
-                    self.env.define(node.catch_error, error_msg, "str", False)
-
-                if node.catch_type is not None:
-                    actual_type = err.exception_type if err.exception_type else "Exception"
-                    if (isinstance(actual_type, Var)):
-                        actual_type = self.unwrap(self.visit(actual_type))
-                    self.env.define(node.catch_type, actual_type, "str", False)
-
-                try:
-                    for stmt in node.catch_block:
-                        self.visit(stmt)
-                finally:
-                    self.pop_scope()
-
-            if not isCaught:
-                raise
-
+            signal = self.try_catch(node)
+        except BaseException:
+            # A break, continue or return in the finally block replaces the
+            # error, as it would if those were still raised.
+            final = self.exec_block(node.finally_block)
+            if final is not None:
+                return final
+            raise
+        final = self.exec_block(node.finally_block)
+        return signal if final is None else final
+
+    def try_catch(self, node):
+        try:
+            return self.exec_block(node.try_block)
         except Exception as err:
-            isCaught = False
-
-            if len(node.catchonly_block) > 0:
-                for block in node.catchonly_block:
-                    if block[2] is not None and not isCaught:
-                        expected_type = self.visit(block[2])
-                        actual_type = type(err).__name__
-
-                        if expected_type == actual_type or expected_type == "Exception":
-                            isCaught = True
-                            self.push_scope()
-
-                            if block[0] is not None:
-                                error_msg = str(err)
-                                self.env.define(block[0], error_msg, "str", False)
-
-                            if block[1] is not None:
-                                self.env.define(block[1], actual_type, "str", False)
-
-                            try:
-                                for stmt in block[3]:
-                                    self.visit(stmt)
-                            finally:
-                                self.pop_scope()
-                            break
-
-            if len(node.catch_block) > 0 and not isCaught:
-                isCaught = True
-                self.push_scope()
-
-                if node.catch_error is not None:
-                    error_msg = str(err)
-                    self.env.define(node.catch_error, error_msg, "str", False)
-
-                if node.catch_type is not None:
-                    actual_type = type(err).__name__
-                    self.env.define(node.catch_type, actual_type, "str", False)
-
-                try:
-                    for stmt in node.catch_block:
-                        self.visit(stmt)
-                finally:
-                    self.pop_scope()
-
-            if not isCaught:
+            handler = self.catch_handler(node, err)
+            if handler is None:
                 raise
+            block, names = handler
+            self.push_scope()
+            for name, value in names:
+                self.env.define(name, value, "str", False)
+            try:
+                return self.exec_block(block)
+            finally:
+                self.pop_scope()
+
+    def catch_handler(self, node, err):
+        # The catch block of node that handles err, with the names it binds
+        # the message and type to, or None if err is not caught.
+        if isinstance(err, ThrowSignal):
+            actual_type = err.exception_type if err.exception_type else "Exception"
+            if isinstance(err.value, str):
+                error_msg = err.value
+            elif hasattr(err.value, 'value'):
+                error_msg = err.value.value
+            else:
+                error_msg = str(err.value)
+        else:
+            actual_type = type(err).__name__
+            error_msg = str(err)
+
+        for block in node.catchonly_block:
+            if block[2] is not None:
+                expected_type = self.visit(block[2])
+                if expected_type == actual_type or (expected_type == "Exception" and not isinstance(err, ThrowSignal)):
+                    names = []
+                    if block[0] is not None:
+                        names.append((block[0], error_msg))
+                    if block[1] is not None:
+                        names.append((block[1], actual_type))
+                    return block[3], names
+
+        if len(node.catch_block) > 0:
+            names = []
+            if node.catch_error is not None:
+                names.append((node.catch_error, error_msg))
+            if node.catch_type is not None:
+                if isinstance(actual_type, Var):
+                    actual_type = self.unwrap(self.visit(actual_type))
+                names.append((node.catch_type, actual_type))
+            return node.catch_block, names
 
-        finally:
-            if node.finally_block:
-                for stmt in node.finally_block:
-                    self.visit(stmt)
+        return None
     
     def visit_ContinueNode(self, _):
-        raise ContinueSignal()
+        return CONTINUE
 
     def interpret_file(self, filepath):
         self.current_dir = os.path.dirname(os.path.abspath(filepath))
-        source_code = self.read_file(filepath)
-
-        lexer = oryon_lexer.Lexer(source_code)
-        tokens = lexer.tokenize()
-        parser = oryon_parser.Parser(tokens)
-        ast = parser.parse()
+        ast = self.load_ast(filepath)
+        if self.jobs > 1:
+            self.preload_imports(ast)
 
         prev_env = self.env
         self.env = native_env.Environment(parent=self.global_env)
 
         try:
-            self.visit(ast)
-        except ContinueSignal:
-            raise Exception("'continue' is only valid inside loop constructs")
-        except BreakSignal:
-            raise Exception("'break' is only valid inside loop constructs.")
-        except ReturnSignal:
-            raise Exception("Program ended by return statement")
+            self.run_module(ast)
+            # Tasks and timers nothing awaited still run before the program
+            # ends.
+            async_runtime.loop.run()
         finally:
             self.env = prev_env
 
+    def run_module(self, ast):
+        for stmt in ast.statements:
+            if stmt is not None:
+                signal = self.visit(stmt)
+                if type(signal) is Completion:
+                    self.visit_stray_completion(stmt, signal)
+
+    def visit_stray_completion(self, node, signal):
+        # Named visit_* so error_span reports the statement at node.
+        if signal.kind == 'return':
+            raise Exception("Program ended by return statement")
+        raise Exception(_OUTSIDE_LOOP[signal.kind])
+
     def _import_local_module(self, node, current_dir):
         if current_dir is None:
             current_dir = self.current_dir or os.getcwd()
@@ -1509,18 +1819,14 @@ class Interpreter:
         else:
             self.currently_importing.add(module_path)
             try:
-                source_code = self.read_file(module_path)
-                lexer = oryon_lexer.Lexer(source_code)
-                tokens = lexer.tokenize()
-                parser = oryon_parser.Parser(tokens)
-                ast = parser.parse()
+                ast = self.load_ast(module_path, lazy=True)
 
                 module_env = native_env.Environment(parent=self.global_env)
                 prev_env = self.env
                 self.env = module_env
 
                 try:
-                    self.visit(ast)
+                    self.run_module(ast)
                 except Exception as e:
                     self.env = prev_env
                     raise Exception(f"Error in imported module '{node.path}': {e}")
@@ -1533,11 +1839,21 @@ class Interpreter:
 
         return self._apply_import_symbols(node, module_env)
     
+    def import_collides(self, name):
+        # Imports may shadow the builtins in global_env, so only names
+        # declared by the program or module itself count.
+        env = self.env
+        while env is not None and env is not self.global_env:
+            if name in env.vars:
+                return True
+            env = env.parent
+        return False
+
     def _apply_import_symbols(self, node, module_env):
         if node.symbols:
             if '*' in node.symbols:
                 for sym in module_env.vars:
-                    if self.env.has(sym):
+                    if self.import_collides(sym):
                         raise Exception(f"ImportError: Symbol '{sym}' collides with existing declaration")
 
                     entry = module_env.get(sym)
@@ -1547,7 +1863,7 @@ class Interpreter:
                 for sym in node.symbols:
                     if not module_env.has(sym):
                         raise Exception(f"ImportError: Symbol '{sym}' not found in module '{node.path}'")
-                    if self.env.has(sym):
+                    if self.import_collides(sym):
                         raise Exception(f"ImportError: Symbol '{sym}' collides with existing declaration")
 
                     entry = module_env.get(sym)
@@ -1555,7 +1871,7 @@ class Interpreter:
                     self.env.define(sym, value, "auto", False)
         else:
             module_name = node.path.split("/")[-1]
-            if self.env.has(module_name):
+            if self.import_collides(module_name):
                 raise Exception(f"ImportError: Module name '{module_name}' collides with existing declaration")
 
             namespace = ModuleNamespace(module_env, module_name)
@@ -1594,6 +1910,112 @@ class Interpreter:
                 return full_path
         return None
 
+    def cache_tag(self, lazy):
+        tags = []
+        if self.optimizer is not None:
+            tags.append("opt")
+        if lazy:
+            tags.append("lazy")
+        return ".".join(tags)
+
+    def load_ast(self, path, lazy=False):
+        if lazy and path in self.preloaded_asts:
+            return self.preloaded_asts.pop(path)
+
+        source_code = self.read_file(path)
+        tag = self.cache_tag(lazy)
+
+        if self.ast_cache is not None:
+            ast = self.ast_cache.load(path, source_code, tag)
+            if ast is not None:
+                return ast
+
+        ast = parse_source(source_code, lazy, self.optimizer)
+
+        if self.ast_cache is not None:
+            self.ast_cache.store(path, source_code, ast, tag)
+        return ast
+
+    def module_imports(self, ast):
+        paths = []
+        for stmt in ast.statements:
+            if isinstance(stmt, ImportNode) and stmt.type == 0:
+                path = self.resolve_module_path(stmt.path, self.current_dir)
+                if path:
+                    paths.append(path)
+        return paths
+
+    def preload_imports(self, ast):
+        # Walks the graph of top-level local imports reachable from the entry
+        # file and parses every module that is not in the AST cache, in a
+        # process pool once there is enough work. The trees are only stored
+        # here; modules still execute in program order through
+        # _import_local_module, and a module that fails to parse is left for
+        # that path to report when it is actually imported.
+        tag = self.cache_tag(True)
+        queue = deque(self.module_imports(ast))
+        seen = set(queue)
+        pending = {}
+        pool = None
+
+        def discovered(path, tree):
+            self.preloaded_asts[path] = tree
+            for dep in self.module_imports(tree):
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+
+        try:
+            while queue or pending:
+                misses = []
+                while queue:
+                    path = queue.popleft()
+                    tree = None
+                    if self.ast_cache is not None and self.ast_cache.enabled:
+                        try:
+                            tree = self.ast_cache.load(path, self.read_file(path), tag)
+                        except OSError:
+                            continue
+                    if tree is not None:
+                        discovered(path, tree)
+                    else:
+                        misses.append(path)
+
+                if pool is None and len(misses) >= _PARALLEL_MIN_MODULES and \
+                   sum(os.path.getsize(path) for path in misses) >= _PARALLEL_MIN_BYTES:
+                    pool = ProcessPoolExecutor(max_workers=self.jobs)
+
+                for path in misses:
+                    if pool is not None:
+                        pending[pool.submit(parse_module, path, self.ast_cache, tag, self.optimizer is not None)] = path
+                        continue
+                    try:
+                        discovered(path, parse_module(path, self.ast_cache, tag, self.optimizer is not None))
+                    except Exception:
+                        pass
+
+                if pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        try:
+                            discovered(path, future.result())
+                        except Exception:
+                            pass
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    def materialize_body(self, lazy, params):
+        if lazy.statements is None:
+            body = oryon_parser.Parser(lazy.tokens).parse_lazy_body()
+            if self.optimizer is not None:
+                body = self.optimizer.visit_block(body)
+            lazy.layout = ScopeResolver().resolve_body(params, body)
+            lazy.statements = body
+            lazy.tokens = None
+        return lazy.statements
+
     def read_file(self, path):
         with open(path, 'r', encoding='utf-8') as f:
             return f.read()
\ No newline at end of file
@@ -1,4 +1,6 @@
 import re
+import sys
+from bisect import bisect_right
 from oryon_token import Token
 
 KEYWORDS = {
@@ -13,6 +15,8 @@ allowed_func_types = ("INT", "STR", "BOOL", "FLOAT", "DOUBLE", "LONG", "VOID", "
 allowed_var_types = {"int", "str", "bool", "float", "double", "long", "list", "tuple", "map"}
 
 TOKEN_SPEC = [
+    ('MULTILINE_COMMENT', r'/\*(?s:.*?)\*/'),
+    ('UNTERMINATED_COMMENT', r'/\*'),
     ('SINGLELINE_COMMENT', r'//.*'),
     ('NUMBER',    r'\d+(\.\d*)?'),
     ('STRING',    r'"([^"\\]|\\.)*"|\'([^\'\\]|\\.)*\''),
@@ -41,46 +45,74 @@ TOKEN_RE = re.compile(
     re.VERBOSE
 )
 
+_SKIPPED_KINDS = {'SINGLELINE_COMMENT', 'MULTILINE_COMMENT', 'SKIP'}
+_PLAIN_KINDS = {
+    'OP', 'RBRACKET', 'LBRACKET', 'LBRACE', 'RBRACE', 'ARROW', 'LPAREN',
+    'RPAREN', 'COMMA', 'COLON', 'SEMICOLON', 'DOT',
+}
+
 class Lexer:
     def __init__(self, text):
         self.original_text = text
-        self.text = self._remove_multiline_comments(text)
+        self.text = text
         self.tokens = []
         self.pos = 0
-        self.line_starts = [0]
-        for match in re.finditer(r'\n', self.text):
-            self.line_starts.append(match.end())
+        self._line_starts = None
 
-    def _remove_multiline_comments(self, text):
-        pattern = re.compile(r'/\*.*?\*/', re.DOTALL)
-        cleaned = re.sub(pattern, '', text)
+    @property
+    def line_starts(self):
+        if self._line_starts is None:
+            self._line_starts = [0]
+            for match in re.finditer(r'\n', self.text):
+                self._line_starts.append(match.end())
+        return self._line_starts
 
-        if "/*" in cleaned and "*/" not in cleaned:
-            raise Exception("Unterminated multi-line comment: missing closing '*/'")
-
-        return cleaned
-    
     def offset_to_line_col(self, offset):
-        line_num = 0
-        for i, start in enumerate(self.line_starts):
-            if start > offset:
-                break
-            line_num = i
+        line_num = bisect_right(self.line_starts, offset) - 1
         col_num = offset - self.line_starts[line_num] + 1
         return line_num + 1, col_num
-    
-    def tokenize(self):
-        for mo in TOKEN_RE.finditer(self.text):
+
+    def iter_tokens(self):
+        """Yield tokens one at a time in a single pass over the source.
+
+        Line and column are tracked incrementally while scanning, and block
+        comments are skipped by the scanner itself, so no cleaned copy of the
+        source or full token list is ever built.
+        """
+        text = self.text
+        line = 1
+        line_start = 0
+
+        for mo in TOKEN_RE.finditer(text):
             kind = mo.lastgroup
             value = mo.group()
             start = mo.start()
 
-            if kind == 'SINGLELINE_COMMENT' or kind == 'SKIP':
+            if kind == 'NEWLINE':
+                yield Token('NEWLINE', value, line=line, col=start - line_start + 1)
+                line += 1
+                line_start = mo.end()
                 continue
 
-            line, col = self.offset_to_line_col(start)
+            if kind in _SKIPPED_KINDS:
+                if kind == 'MULTILINE_COMMENT':
+                    newlines = value.count('\n')
+                    if newlines:
+                        line += newlines
+                        line_start = start + value.rfind('\n') + 1
+                continue
 
-            if kind == 'NUMBER':
+            col = start - line_start + 1
+
+            if kind in _PLAIN_KINDS:
+                tok = Token(kind, value, line=line, col=col)
+            elif kind == 'ID':
+                lowered = value.lower()
+                if lowered in KEYWORDS:
+                    tok = Token(value.upper(), lowered, line=line, col=col)
+                else:
+                    tok = Token('ID', sys.intern(value), line=line, col=col)
+            elif kind == 'NUMBER':
                 if '.' in value:
                     tok = Token('FLOAT', float(value), line=line, col=col)
                 else:
@@ -88,44 +120,21 @@ class Lexer:
             elif kind == 'STRING':
                 unescaped_str = bytes(value, "utf-8").decode("unicode_escape")
                 tok = Token('STRING', unescaped_str, line=line, col=col)
-            elif kind == 'ID':
-                if value.lower() in KEYWORDS:
-                    tok = Token(value.upper(), value.lower(), line=line, col=col)
-                else:
-                    tok = Token('ID', value, line=line, col=col)
-            elif kind == 'OP':
-                tok = Token('OP', value, line=line, col=col)
-            elif kind == 'RBRACKET':
-                tok = Token('RBRACKET', value, line=line, col=col)
-            elif kind == 'LBRACKET':
-                tok = Token('LBRACKET', value, line=line, col=col)
-            elif kind == 'LBRACE':
-                tok = Token('LBRACE', value, line=line, col=col)
-            elif kind == 'RBRACE':
-                tok = Token('RBRACE', value, line=line, col=col)
-            elif kind == 'ARROW':
-                tok = Token('ARROW', value, line=line, col=col)
-            elif kind == 'LPAREN':
-                tok = Token('LPAREN', value, line=line, col=col)
-            elif kind == 'RPAREN':
-                tok = Token('RPAREN', value, line=line, col=col)
-            elif kind == 'COMMA':
-                tok = Token('COMMA', value, line=line, col=col)
-            elif kind == 'COLON':
-                tok = Token('COLON', value, line=line, col=col)
-            elif kind == 'SEMICOLON':
-                tok = Token('SEMICOLON', value, line=line, col=col)
-            elif kind == 'DOT':
-                tok = Token('DOT', value, line=line, col=col)
-            elif kind == 'NEWLINE':
-                tok = Token('NEWLINE', value, line=line, col=col)
+                newlines = value.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = start + value.rfind('\n') + 1
+            elif kind == 'UNTERMINATED_COMMENT':
+                raise Exception("Unterminated multi-line comment: missing closing '*/'")
             elif kind == 'MISMATCH':
                 raise Exception(f"Unexpected character {value!r} at line {line} column {col}")
             else:
                 raise Exception(f"Unknown token kind {kind!r} at line {line} column {col}")
 
-            self.tokens.append(tok)
+            yield tok
+
+        yield Token('EOF', '', line=line, col=len(text) - line_start + 1)
 
-        eof_line, eof_col = self.offset_to_line_col(len(self.text))
-        self.tokens.append(Token('EOF', '', line=eof_line, col=eof_col))
-        return self.tokens
\ No newline at end of file
+    def tokenize(self):
+        self.tokens = list(self.iter_tokens())
+        return self.tokens
@@ -0,0 +1,235 @@
+from ast_nodes import *
+
+_SCALAR_TYPES = (bool, int, float, str, type(None))
+
+# Upper bound on the size of a folded string/tuple and on the exponent or
+# shift of a folded integer, so a constant like "x" * 10 ** 9 is left to the
+# runtime instead of being built at load time and pickled into the cache.
+_MAX_FOLDED_SIZE = 4096
+
+def _unwrap(v):
+    return v[0] if isinstance(v, tuple) and len(v) == 3 else v
+
+def _is_const(node):
+    return isinstance(node, Literal) and isinstance(node.value, _SCALAR_TYPES)
+
+def _too_large(op, left, right):
+    if op == '*':
+        if isinstance(left, (str, tuple)) and isinstance(right, int):
+            return len(left) * right > _MAX_FOLDED_SIZE
+        if isinstance(right, (str, tuple)) and isinstance(left, int):
+            return len(right) * left > _MAX_FOLDED_SIZE
+    elif op in ('**', '<<'):
+        if isinstance(left, int) and isinstance(right, int):
+            return right > _MAX_FOLDED_SIZE // max(left.bit_length(), 1) if op == '**' else right > _MAX_FOLDED_SIZE
+    return False
+
+def _eval_binary(op, left, right):
+    if op == '+':
+        if isinstance(left, str) or isinstance(right, str):
+            if isinstance(left, str) and isinstance(right, str):
+                return left + right
+            raise TypeError(op)
+        if isinstance(left, float) or isinstance(right, float):
+            return float(left + right)
+        return left + right
+    if op == '-': return left - right
+    if op == '*': return left * right
+    if op == '/': return left / right
+    if op == '==': return left == right
+    if op == '!=': return left != right
+    if op == '<': return left < right
+    if op == '>': return left > right
+    if op == '<=': return left <= right
+    if op == '>=': return left >= right
+    if op == '&&': return bool(left) and bool(right)
+    if op == '||': return bool(left) or bool(right)
+    if op == '**': return left ** right
+    if op == '//': return left // right
+    if op == '%': return left % right
+    if op == '&': return left & right
+    if op == '|': return left | right
+    if op == '^': return left ^ right
+    if op == '<<': return left << right
+    if op == '>>': return left >> right
+    if op == '===': return (left == right) and (type(left) == type(right))
+    if op == 'in': return left in right
+    raise ValueError(op)
+
+# With machine_ints, operators the LLVM backend gives C semantics (truncating
+# division and remainder) or does not implement yet (** compiles to a
+# multiply) are left alone, and so are folds whose int result would not fit
+# the backend's 32-bit ints.
+_MACHINE_UNFOLDED = frozenset(('/', '//', '%', '**'))
+_INT32_MIN = -2 ** 31
+_INT32_MAX = 2 ** 31 - 1
+
+def _eval_unary(op, value):
+    if op == '-': return -value
+    if op == '+': return +value
+    if op == '!': return not value
+    raise ValueError(op)
+
+class ASTOptimizer:
+    """Rewrites a parsed tree before it is run.
+
+    Folds BinaryOp/UnaryOp nodes whose operands are literals, removes
+    IfBlock branches and while loops whose condition is a literal, and turns
+    constant collection literals into precomputed values. Anything whose
+    evaluation would raise is left in place so the error still surfaces at
+    runtime, with the same message and position.
+
+    ``fold_collections`` controls the last step; the LLVM backend turns it
+    off because it has no representation for tuple or collection constants.
+    It also sets ``machine_ints``, so only folds that give the same result
+    with its fixed-width ints are made.
+    """
+
+    def __init__(self, fold_collections=True, machine_ints=False):
+        self.fold_collections = fold_collections
+        self.machine_ints = machine_ints
+
+    def optimize(self, tree):
+        return self.visit(tree)
+
+    def visit(self, node):
+        method = getattr(self, 'visit_' + type(node).__name__, None)
+        if method is not None:
+            return method(node)
+        return self.generic_visit(node)
+
+    def generic_visit(self, node):
+        for cls in type(node).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name in ('line', 'col'):
+                    continue
+                value = getattr(node, name, None)
+                if value is not None:
+                    setattr(node, name, self.transform(value))
+        return node
+
+    def transform(self, value):
+        if isinstance(value, Node):
+            return self.visit(value)
+        if isinstance(value, list):
+            return self.visit_block(value)
+        if isinstance(value, tuple):
+            return tuple(self.transform(v) for v in value)
+        return value
+
+    def visit_block(self, stmts):
+        out = []
+        for stmt in stmts:
+            if not isinstance(stmt, Node):
+                out.append(self.transform(stmt))
+                continue
+            stmt = self.visit(stmt)
+            if isinstance(stmt, IfBlock):
+                taken = self.taken_branch(stmt)
+                if taken is not None:
+                    out.extend(s for s in taken if s is not None)
+                    continue
+            elif isinstance(stmt, WhileNode):
+                if _is_const(stmt.cond) and not stmt.cond.value:
+                    continue
+            out.append(stmt)
+        return out
+
+    def taken_branch(self, node):
+        # Returns the statements to splice in place of the IfBlock when the
+        # branch that runs is known, otherwise prunes it in place and
+        # returns None.
+        kept = []
+        else_block = node.else_block
+        for cond, body in [(node.cond, node.body)] + list(node.elseif_blocks):
+            if _is_const(cond):
+                if not cond.value:
+                    continue
+                if not kept:
+                    return body
+                else_block = body
+                break
+            kept.append((cond, body))
+
+        if not kept:
+            return else_block or []
+
+        node.cond, node.body = kept[0]
+        node.elseif_blocks = kept[1:]
+        node.else_block = else_block
+        return None
+
+    def visit_Literal(self, node):
+        return node
+
+    def visit_LazyBody(self, node):
+        # Optimized by the interpreter once the body is actually parsed.
+        return node
+
+    def visit_BinaryOp(self, node):
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        if not (isinstance(node.left, Literal) and isinstance(node.right, Literal)):
+            return node
+
+        left = _unwrap(node.left.value)
+        right = _unwrap(node.right.value)
+        if left is None or right is None or _too_large(node.op, left, right):
+            return node
+        if self.machine_ints and node.op in _MACHINE_UNFOLDED:
+            return node
+        try:
+            value = _eval_binary(node.op, left, right)
+        except Exception:
+            return node
+        if not self.representable(value):
+            return node
+        return self.folded(value, node)
+
+    def visit_UnaryOp(self, node):
+        node.expr = self.visit(node.expr)
+        if not isinstance(node.expr, Literal):
+            return node
+        try:
+            value = _eval_unary(node.op, _unwrap(node.expr.value))
+        except Exception:
+            return node
+        if not self.representable(value):
+            return node
+        return self.folded(value, node)
+
+    def representable(self, value):
+        if not self.machine_ints or type(value) is not int:
+            return True
+        return _INT32_MIN <= value <= _INT32_MAX
+
+    def visit_TupleLiteral(self, node):
+        node.items = self.visit_block(node.items)
+        if not self.fold_collections or not all(isinstance(item, Literal) for item in node.items):
+            return node
+        return self.folded(tuple(_unwrap(item.value) for item in node.items), node)
+
+    def visit_ListLiteral(self, node):
+        node.items = self.visit_block(node.items)
+        if not self.fold_collections or not all(isinstance(item, Literal) for item in node.items):
+            return node
+        return self.folded([_unwrap(item.value) for item in node.items], node, ConstCollection)
+
+    def visit_DictLiteral(self, node):
+        node.pairs = [(self.visit(k), self.visit(v)) for k, v in node.pairs]
+        if not self.fold_collections:
+            return node
+        if not all(isinstance(k, Literal) and isinstance(v, Literal) for k, v in node.pairs):
+            return node
+        try:
+            value = {_unwrap(k.value): _unwrap(v.value) for k, v in node.pairs}
+        except Exception:
+            return node
+        return self.folded(value, node, ConstCollection)
+
+    def folded(self, value, node, cls=Literal):
+        new = cls(value)
+        new.line = getattr(node, 'line', None)
+        if new.line is not None:
+            new.col = node.col
+        return new
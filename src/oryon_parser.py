@@ -1,5 +1,6 @@
 from ast_nodes import *
 from oryon_lexer import allowed_func_types, allowed_var_types
+from oryon_token import Token
 
 class ParserError(Exception):
     def __init__(self, message, token=None):
@@ -9,13 +10,54 @@ class ParserError(Exception):
             msg = message
         super().__init__(msg)
 
+_STREAM_WINDOW = 4096
+
+# Tokens that open a block closed by a matching 'end'. Method definitions
+# inside a class have no keyword and are recognised by their '->' instead.
+_BLOCK_OPENERS = frozenset(("IF", "WHILE", "FOR", "SWITCH", "CLASS", "TRY", "FUNC"))
+
+# Binding power of every left-associative binary operator, loosest first.
+# Unary operators, 'await' and the right-associative '**' bind tighter than
+# all of these and are handled by Parser.factor.
+BINARY_PRECEDENCE = {
+    "||": 1,
+    "&&": 2,
+    "in": 3,
+    "==": 4, "!=": 4, "===": 4,
+    "<": 5, ">": 5, "<=": 5, ">=": 5,
+    "+": 6, "-": 6,
+    "&": 7, "|": 7, "^": 7, "<<": 7, ">>": 7,
+    "*": 8, "/": 8, "//": 8, "%": 8,
+}
+
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, lazy_bodies=False):
+        if isinstance(tokens, list):
+            self.tokens = tokens
+            self._stream = None
+        else:
+            # Streaming mode: ``self.tokens`` is only a sliding window over the
+            # token iterator, refilled on demand and trimmed as tokens are
+            # consumed, so the full token list never exists in memory.
+            self.tokens = []
+            self._stream = iter(tokens)
         self.i = 0
+        self.lazy_bodies = lazy_bodies
+
+    def _fill(self, pos):
+        stream = self._stream
+        tokens = self.tokens
+        while len(tokens) <= pos:
+            tok = next(stream, None)
+            if tok is None:
+                self._stream = None
+                return
+            tokens.append(tok)
 
     def peek(self, offset=0):
         pos = self.i + offset
+        if pos >= len(self.tokens) and self._stream is not None:
+            self._fill(pos)
         if 0 <= pos < len(self.tokens):
             return self.tokens[pos]
         return None
@@ -24,8 +66,13 @@ class Parser:
         return self.peek(0)
 
     def advance(self):
+        if self.i >= len(self.tokens) and self._stream is not None:
+            self._fill(self.i)
         if self.i < len(self.tokens):
             self.i += 1
+            if self.i >= _STREAM_WINDOW and self._stream is not None:
+                del self.tokens[:self.i]
+                self.i = 0
 
     def eat(self, type=None, value=None):
         tok = self.peek()
@@ -69,8 +116,20 @@ class Parser:
             return True
         return isinstance(node, (Var, PropertyAccess, IndexAccess))
 
+    def mark(self, node, tok):
+        node.line = tok.line
+        node.col = tok.col
+        return node
+
     def statement(self):
         self.skip_newlines()
+        tok = self.peek()
+        node = self._statement()
+        if node is not None and tok is not None:
+            self.mark(node, tok)
+        return node
+
+    def _statement(self):
         tok = self.peek()
         privacy = False
         if tok is None:
@@ -256,18 +315,21 @@ class Parser:
         body = []
         self.skip_newlines()
 
-        while True:
-            p = self.peek()
-            if p is None:
-                raise ParserError("Unexpected EOF in function body", name)
-            if p.type == "END":
-                break
+        if self.lazy_bodies:
+            body = self.lazy_body(name)
+        else:
+            while True:
+                p = self.peek()
+                if p is None:
+                    raise ParserError("Unexpected EOF in function body", name)
+                if p.type == "END":
+                    break
 
-            stmt = self.statement()
-            if stmt is None:
-                self.skip_newlines()
-                continue
-            body.append(stmt)
+                stmt = self.statement()
+                if stmt is None:
+                    self.skip_newlines()
+                    continue
+                body.append(stmt)
 
         self.eat("END")
         return FuncDef(name, params, body, return_type, private=privacy, is_async=is_async)
@@ -356,88 +418,48 @@ class Parser:
             return VarSet(name, BinaryOp(Var(name), "-", Literal(1)), "=")
 
     def expr(self):
-        return self.logical_or()
-
-    def logical_or(self):
-        left = self.logical_and()
-        while self.peek() and self.peek().type == "OP" and self.peek().value == "||":
-            op = self.eat("OP").value
-            right = self.logical_and()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def logical_and(self):
-        left = self.membership()
-        while self.peek() and self.peek().type == "OP" and self.peek().value == "&&":
-            op = self.eat("OP").value
-            right = self.membership()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def membership(self):
-        left = self.equality()
-        while self.peek() and self.peek().type == "IN":
-            self.eat("IN")
-            right = self.equality()
-            left = BinaryOp(left, "in", right)
-        return left
+        return self.binary_expr(1)
 
-    def equality(self):
-        left = self.comparison()
-        while self.peek() and self.peek().type == "OP" and self.peek().value in ("==", "!=", "==="):
-            op = self.eat("OP").value
-            right = self.comparison()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def comparison(self):
-        left = self.arith_expr()
-        while self.peek() and self.peek().type == "OP" and self.peek().value in ("<", ">", "<=", ">="):
-            op = self.eat("OP").value
-            right = self.arith_expr()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def bit_ops(self):
-        left = self.arith_term()
-        while self.peek() and self.peek().type == "OP" and self.peek().value in ("&", "|", "^", "<<", ">>"):
-            op = self.eat("OP").value
-            right = self.arith_term()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def arith_expr(self):
-        left = self.bit_ops()
-        while self.peek() and self.peek().type == "OP" and self.peek().value in ("+", "-"):
-            op = self.eat("OP").value
-            right = self.bit_ops()
-            left = BinaryOp(left, op, right)
-        return left
-
-    def arith_term(self):
+    def binary_expr(self, min_prec):
         left = self.factor()
-        while self.peek() and self.peek().type == "OP" and self.peek().value in ("*", "/", "//", "%"):
-            op = self.eat("OP").value
-            right = self.factor()
-            left = BinaryOp(left, op, right)
+        while True:
+            tok = self.peek()
+            if tok is None:
+                break
+            if tok.type == "OP":
+                op = tok.value
+            elif tok.type == "IN":
+                op = "in"
+            else:
+                break
+            prec = BINARY_PRECEDENCE.get(op)
+            if prec is None or prec < min_prec:
+                break
+            self.advance()
+            right = self.binary_expr(prec + 1)
+            left = self.mark(BinaryOp(left, op, right), tok)
         return left
 
     def factor(self):
         tok = self.peek()
-        if tok and tok.type == "AWAIT":
-            self.eat("AWAIT")
-            expr = self.factor()
-            return AwaitExpr(expr)
+        if tok is not None:
+            if tok.type == "AWAIT":
+                self.advance()
+                expr = self.factor()
+                return self.mark(AwaitExpr(expr), tok)
 
-        if tok and tok.type == "OP" and tok.value in ("+", "-", "!"):
-            op = self.eat("OP").value
-            return UnaryOp(op, self.factor())
+            if tok.type == "OP" and tok.value in ("+", "-", "!"):
+                self.advance()
+                return self.mark(UnaryOp(tok.value, self.factor()), tok)
 
         node = self.atom()
-        while self.peek() and self.peek().type == "OP" and self.peek().value == "**":
-            op = self.eat("OP").value
+        while True:
+            tok = self.peek()
+            if tok is None or tok.type != "OP" or tok.value != "**":
+                break
+            self.advance()
             right = self.factor()
-            node = BinaryOp(node, op, right)
+            node = self.mark(BinaryOp(node, "**", right), tok)
         return node
 
     def atom(self):
@@ -564,7 +586,7 @@ class Parser:
                 body.append(stmt)
             self.eat("END")
 
-            return LambdaFunc(params, body)
+            return self.mark(LambdaFunc(params, body), tok)
 
         elif tok.type == "ASYNC":
             self.eat("ASYNC")
@@ -607,7 +629,7 @@ class Parser:
 
             lambda_func = LambdaFunc(params, body)
             lambda_func.is_async = True
-            return lambda_func
+            return self.mark(lambda_func, tok)
         
         elif tok.type == "THIS":
             self.eat("THIS")
@@ -620,13 +642,16 @@ class Parser:
         else:
             raise ParserError(f"Invalid expression starting with {tok.type}({tok.value})", tok)
 
+        if tok.type != "LPAREN" or isinstance(node, TupleLiteral):
+            self.mark(node, tok)
+
         while True:
             p = self.peek()
             if p and p.type == "LBRACKET":
                 self.eat("LBRACKET")
                 index_expr = self.expr()
                 self.eat("RBRACKET")
-                node = IndexAccess(node, index_expr)
+                node = self.mark(IndexAccess(node, index_expr), p)
             elif p and p.type == "DOT":
                 self.eat("DOT")
                 attr_name_tok = self.peek()
@@ -661,9 +686,9 @@ class Parser:
                                 continue
                             break
                     self.eat("RPAREN")
-                    node = MethodCall(node, attr_name, args)
+                    node = self.mark(MethodCall(node, attr_name, args), p)
                 else:
-                    node = PropertyAccess(node, attr_name)
+                    node = self.mark(PropertyAccess(node, attr_name), p)
             else:
                 break
 
@@ -862,20 +887,23 @@ class Parser:
         if not self.peek() or self.peek().type != "ID":
             return False
         if self.peek(1) and self.peek(1).type == "LPAREN":
-            i = self.i + 2
+            offset = 2
             depth = 1
-            while i < len(self.tokens):
-                tok = self.tokens[i]
+            while True:
+                tok = self.peek(offset)
+                if tok is None:
+                    break
                 if tok.type == "LPAREN":
                     depth += 1
                 elif tok.type == "RPAREN":
                     depth -= 1
                     if depth == 0:
                         break
-                i += 1
+                offset += 1
             if depth != 0:
                 return False
-            return (i + 1 < len(self.tokens) and self.tokens[i + 1].type == "ARROW")
+            nxt = self.peek(offset + 1)
+            return nxt is not None and nxt.type == "ARROW"
         elif self.peek(1) and self.peek(1).type == "ARROW":
             return True
         return False
@@ -903,21 +931,74 @@ class Parser:
         self.skip_newlines()
 
         body = []
+        if self.lazy_bodies:
+            body = self.lazy_body(name)
+        else:
+            while True:
+                p = self.peek()
+                if p is None:
+                    raise ParserError("Unexpected EOF in method body", name)
+                if p.type == "END":
+                    break
+
+                stmt = self.statement()
+                if stmt is None:
+                    self.skip_newlines()
+                    continue
+                body.append(stmt)
+
+        self.eat("END")
+        return FuncDef(name, params, body, return_type=None, private=privacy)
+
+    def lazy_body(self, name):
+        # Collects the tokens of a function body up to (not including) its
+        # closing 'end' without building any nodes. Blocks are matched by
+        # counting openers against 'end'; a line that starts with an
+        # identifier and reaches '->' without an opener is a method header.
+        tokens = []
+        depth = 0
+        line_head = None
+        opened = False
+        while True:
+            tok = self.peek()
+            if tok is None or tok.type == "EOF":
+                raise ParserError("Unexpected EOF in function body", name)
+            if tok.type == "END":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif tok.type == "NEWLINE":
+                line_head = None
+                opened = False
+            elif tok.type in _BLOCK_OPENERS:
+                depth += 1
+                opened = True
+            elif tok.type == "ARROW" and line_head == "ID" and not opened:
+                depth += 1
+                opened = True
+
+            if line_head is None and tok.type not in ("NEWLINE", "PUBLIC", "PRIVATE"):
+                line_head = tok.type
+            tokens.append(tok)
+            self.advance()
+        tokens.append(Token("EOF", "", tok.line, tok.col))
+        return LazyBody(tokens)
+
+    def parse_lazy_body(self):
+        # Parses the statements of a body captured by lazy_body; the parser
+        # must have been created over exactly those tokens.
+        body = []
+        self.skip_newlines()
         while True:
             p = self.peek()
-            if p is None:
-                raise ParserError("Unexpected EOF in method body", name)
-            if p.type == "END":
+            if p is None or p.type == "EOF":
                 break
-
             stmt = self.statement()
             if stmt is None:
-                self.skip_newlines()
-                continue
+                raise ParserError(f"Unexpected token {p.value!r} in function body", p)
             body.append(stmt)
-
-        self.eat("END")
-        return FuncDef(name, params, body, return_type=None, private=privacy)
+            self.skip_newlines()
+        return body
 
     def class_def(self, privacy=False):
         self.eat("CLASS")
@@ -945,14 +1026,14 @@ class Parser:
                 priv_tok = self.eat(tok.type)
                 priv = (priv_tok.type == "PRIVATE")
     
-                m = self.method_def(privacy=priv)
+                m = self.mark(self.method_def(privacy=priv), tok)
                 m.is_class_method = True
                 body.append(m)
                 self.skip_newlines()
                 continue
             
             if self._looks_like_method():
-                m = self.method_def(privacy=False)
+                m = self.mark(self.method_def(privacy=False), tok)
                 m.is_class_method = True
                 body.append(m)
                 self.skip_newlines()
@@ -967,7 +1048,7 @@ class Parser:
                 priv_tok = self.eat(tok.type)
                 priv = (priv_tok.type == "PRIVATE")
     
-                field = self.var_decl(privacy=priv)
+                field = self.mark(self.var_decl(privacy=priv), tok)
                 field.is_class_field = True
                 body.append(field)
                 self.skip_newlines()
@@ -978,7 +1059,7 @@ class Parser:
                 "LIST", "TUPLE", "MAP"
             ):
     
-                field = self.var_decl(privacy=False)
+                field = self.mark(self.var_decl(privacy=False), tok)
                 field.is_class_field = True
                 body.append(field)
                 self.skip_newlines()
@@ -0,0 +1,61 @@
+import operator
+from ast_nodes import BinaryOp
+
+# A BinaryOp is specialized after this many generic executions, using the
+# operand types seen on the last one.
+QUICKEN_AFTER = 8
+# After a guard fails the node runs generically this many extra times before
+# it may be specialized again, so sites that keep changing type settle down.
+DEOPT_BACKOFF = 1024
+
+class QuickBinaryOp(BinaryOp):
+    # Specialized forms share BinaryOp's layout, so a node is rewritten in
+    # place by assigning its __class__. Both operands must be exactly
+    # operand_type for func to apply; anything else deoptimizes the node.
+    __slots__ = ()
+    operand_type = None
+    func = None
+
+SPECIALIZED = {}
+
+def _specialize(name, op, operand_type, func):
+    cls = type(name, (QuickBinaryOp,), {'__slots__': (), 'operand_type': operand_type, 'func': func})
+    SPECIALIZED[(op, operand_type)] = cls
+    return cls
+
+IntAdd = _specialize('IntAdd', '+', int, operator.add)
+IntSub = _specialize('IntSub', '-', int, operator.sub)
+IntMul = _specialize('IntMul', '*', int, operator.mul)
+IntDiv = _specialize('IntDiv', '/', int, operator.truediv)
+IntFloorDiv = _specialize('IntFloorDiv', '//', int, operator.floordiv)
+IntMod = _specialize('IntMod', '%', int, operator.mod)
+IntLess = _specialize('IntLess', '<', int, operator.lt)
+IntLessEq = _specialize('IntLessEq', '<=', int, operator.le)
+IntGreater = _specialize('IntGreater', '>', int, operator.gt)
+IntGreaterEq = _specialize('IntGreaterEq', '>=', int, operator.ge)
+IntEq = _specialize('IntEq', '==', int, operator.eq)
+IntNotEq = _specialize('IntNotEq', '!=', int, operator.ne)
+
+FloatAdd = _specialize('FloatAdd', '+', float, operator.add)
+FloatSub = _specialize('FloatSub', '-', float, operator.sub)
+FloatMul = _specialize('FloatMul', '*', float, operator.mul)
+FloatDiv = _specialize('FloatDiv', '/', float, operator.truediv)
+FloatLess = _specialize('FloatLess', '<', float, operator.lt)
+FloatLessEq = _specialize('FloatLessEq', '<=', float, operator.le)
+FloatGreater = _specialize('FloatGreater', '>', float, operator.gt)
+FloatGreaterEq = _specialize('FloatGreaterEq', '>=', float, operator.ge)
+
+StrConcat = _specialize('StrConcat', '+', str, operator.add)
+StrEq = _specialize('StrEq', '==', str, operator.eq)
+StrNotEq = _specialize('StrNotEq', '!=', str, operator.ne)
+
+def quicken(node, left, right):
+    kind = type(left)
+    if type(right) is kind:
+        cls = SPECIALIZED.get((node.op, kind))
+        if cls is not None:
+            node.__class__ = cls
+
+def deoptimize(node):
+    node.__class__ = BinaryOp
+    node.hits = -DEOPT_BACKOFF
@@ -0,0 +1,249 @@
+from ast_nodes import *
+
+class Scope:
+    __slots__ = ('parent', 'layout')
+
+    def __init__(self, parent, layout):
+        self.parent = parent
+        # None for scopes whose names are only known at runtime (the program
+        # and module level, class bodies, catch blocks, import *).
+        self.layout = layout
+
+def declared_names(stmts, names):
+    # Collects the names a block defines in the environment it runs in,
+    # including nested blocks that do not push a scope of their own. Returns
+    # False when the block imports '*', since those names are only known
+    # once the module has run.
+    for stmt in stmts:
+        if isinstance(stmt, (VarAssign, FuncDef, ClassDef)):
+            names.append(stmt.name)
+        elif isinstance(stmt, ForNode):
+            names.append(stmt.var_name)
+            if not declared_names(stmt.body, names):
+                return False
+        elif isinstance(stmt, WhileNode):
+            if not declared_names(stmt.body, names):
+                return False
+        elif isinstance(stmt, IfBlock):
+            blocks = [stmt.body] + [body for _, body in stmt.elseif_blocks] + [stmt.else_block or []]
+            for body in blocks:
+                if not declared_names(body, names):
+                    return False
+        elif isinstance(stmt, SwitchNode):
+            for _, body in stmt.cases:
+                if not declared_names(body, names):
+                    return False
+            if stmt.default_case and not declared_names(stmt.default_case, names):
+                return False
+        elif isinstance(stmt, TryCatchNode):
+            if not declared_names(stmt.try_block, names):
+                return False
+            if stmt.finally_block and not declared_names(stmt.finally_block, names):
+                return False
+        elif isinstance(stmt, ImportNode):
+            if stmt.symbols:
+                if '*' in stmt.symbols:
+                    return False
+                names.extend(stmt.symbols)
+            else:
+                names.append(stmt.path.split("/")[-1])
+    return True
+
+def mentions_name(value, name):
+    # True if a Var, VarSet or FuncCall anywhere under value refers to
+    # name. Bodies that have not been parsed yet are checked token by token.
+    if isinstance(value, LazyBody):
+        if value.statements is not None:
+            return mentions_name(value.statements, name)
+        return any(tok.value == name for tok in value.tokens)
+    if isinstance(value, Node):
+        if isinstance(value, (Var, VarSet, FuncCall)) and value.name == name:
+            return True
+        for cls in type(value).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if slot in ('line', 'col', 'layout'):
+                    continue
+                child = getattr(value, slot, None)
+                if child is not None and mentions_name(child, name):
+                    return True
+        return False
+    if isinstance(value, (list, tuple)):
+        return any(mentions_name(item, name) for item in value)
+    return False
+
+COUNTER_TESTS = ('<', '<=', '>', '>=', '!=')
+
+def counter_shape(node):
+    # Recognizes a C-style for of the form `int i = a; i < b; i++` (any of
+    # COUNTER_TESTS, ++ or --), which native_loop counts in C. Returns
+    # (name, op, bound, limit, step, reads): bound is the expression b, or
+    # None when b is the int literal limit, and reads says whether the body
+    # mentions i at all. None for any other shape.
+    init, cond, inc = node.init_stmt, node.condition, node.increment
+    if not isinstance(init, VarAssign) or init.vtype not in ('int', 'auto'):
+        return None
+    name = init.name
+    if not (isinstance(cond, BinaryOp) and cond.op in COUNTER_TESTS
+            and isinstance(cond.left, Var) and cond.left.name == name):
+        return None
+    if not (isinstance(inc, VarSet) and inc.name == name and inc.op == '='):
+        return None
+    step = inc.value
+    if not (isinstance(step, BinaryOp) and step.op == '+' and isinstance(step.left, Var)
+            and step.left.name == name and isinstance(step.right, Literal) and type(step.right.value) is int):
+        return None
+    bound = cond.right
+    if mentions_name(bound, name):
+        return None
+    reads = mentions_name(node.body, name)
+    if isinstance(bound, Literal) and type(bound.value) is int:
+        return (name, cond.op, None, bound.value, step.right.value, reads)
+    return (name, cond.op, bound, 0, step.right.value, reads)
+
+def make_layout(names):
+    layout = {}
+    for name in names:
+        layout.setdefault(name, len(layout))
+    return layout
+
+class ScopeResolver:
+    """Assigns every variable read or assignment a (depth, slot) pair.
+
+    Function bodies, lambdas and C-style for loops get a layout, a dict from
+    each name they define to a slot index, which the interpreter passes to
+    native_env.Environment so those names are stored in an array. Var and
+    VarSet nodes whose name is found in an enclosing layout get ``depth``
+    (environments to walk up), ``slot`` and ``layout``; the environment
+    checks the layout before using the slot, and the interpreter falls back
+    to a lookup by name whenever the slot cannot be used.
+
+    Names that resolve to the program or module level, a class body or a
+    catch block are left unresolved (``slot`` stays None), because those
+    environments can gain names at runtime.
+
+    C-style for loops also get ``counter``, set by counter_shape, and
+    returns of a call get ``tail`` unless a try statement of their function
+    encloses them.
+    """
+
+    def __init__(self):
+        self.try_depth = 0
+
+    def resolve(self, tree):
+        self.visit(tree, Scope(None, None))
+        return tree
+
+    def resolve_body(self, params, body):
+        # Lazily parsed bodies are resolved on their own, so names from
+        # enclosing functions are looked up by name.
+        layout = self.function_layout(params, body)
+        self.visit_block(body, Scope(None, layout))
+        return layout
+
+    def function_layout(self, params, body):
+        names = list(params) + ["this"]
+        if not declared_names(body, names):
+            return None
+        return make_layout(names)
+
+    def lookup(self, name, scope):
+        depth = 0
+        while scope is not None and scope.layout is not None:
+            slot = scope.layout.get(name)
+            if slot is not None:
+                return depth, slot, scope.layout
+            scope = scope.parent
+            depth += 1
+        return None
+
+    def bind(self, node, name, scope):
+        found = self.lookup(name, scope)
+        if found is not None:
+            node.depth, node.slot, node.layout = found
+
+    def visit(self, node, scope):
+        method = getattr(self, 'visit_' + type(node).__name__, None)
+        if method is not None:
+            return method(node, scope)
+        return self.generic_visit(node, scope)
+
+    def generic_visit(self, node, scope):
+        for cls in type(node).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name in ('line', 'col', 'layout'):
+                    continue
+                value = getattr(node, name, None)
+                if value is not None:
+                    self.walk(value, scope)
+
+    def walk(self, value, scope):
+        if isinstance(value, Node):
+            self.visit(value, scope)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self.walk(item, scope)
+
+    def visit_block(self, stmts, scope):
+        for stmt in stmts:
+            self.walk(stmt, scope)
+
+    def visit_Var(self, node, scope):
+        self.bind(node, node.name, scope)
+
+    def visit_VarSet(self, node, scope):
+        self.bind(node, node.name, scope)
+        self.walk(node.value, scope)
+
+    def visit_LazyBody(self, node, scope):
+        pass
+
+    def visit_FuncDef(self, node, scope):
+        if isinstance(node.body, LazyBody):
+            return
+        node.layout = self.function_layout(node.params, node.body)
+        self.visit_function(node.body, Scope(scope, node.layout))
+
+    def visit_LambdaFunc(self, node, scope):
+        node.layout = self.function_layout(node.params, node.body)
+        self.visit_function(node.body, Scope(scope, node.layout))
+
+    def visit_function(self, body, scope):
+        try_depth, self.try_depth = self.try_depth, 0
+        self.visit_block(body, scope)
+        self.try_depth = try_depth
+
+    def visit_ReturnNode(self, node, scope):
+        # A tail call would run the callee after the try statement is left,
+        # outside its catch and after its finally.
+        node.tail = node.value.__class__ is FuncCall and self.try_depth == 0
+        if node.value is not None:
+            self.visit(node.value, scope)
+
+    def visit_ClassDef(self, node, scope):
+        # Class bodies run in an environment whose parent is the global
+        # one, so nothing inside them can see the enclosing scopes' slots.
+        self.visit_block(node.body, Scope(None, None))
+
+    def visit_CStyleForNode(self, node, scope):
+        names = []
+        stmts = ([node.init_stmt] if node.init_stmt is not None else []) + node.body
+        node.layout = make_layout(names) if declared_names(stmts, names) else None
+        node.counter = counter_shape(node)
+        inner = Scope(scope, node.layout)
+        for part in (node.init_stmt, node.condition, node.increment):
+            if part is not None:
+                self.visit(part, inner)
+        self.visit_block(node.body, inner)
+
+    def visit_TryCatchNode(self, node, scope):
+        self.try_depth += 1
+        self.visit_block(node.try_block, scope)
+        catch_scope = Scope(scope, None)
+        for block in node.catchonly_block:
+            if block[2] is not None:
+                self.visit(block[2], scope)
+            self.visit_block(block[3], catch_scope)
+        self.visit_block(node.catch_block, catch_scope)
+        if node.finally_block:
+            self.visit_block(node.finally_block, scope)
+        self.try_depth -= 1
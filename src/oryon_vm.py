@@ -0,0 +1,680 @@
+import functools
+import operator
+from ast_nodes import *
+from native import native_loop
+from oryon_interpreter import Interpreter, FunctionValue
+from oryon_quicken import QuickBinaryOp
+
+# Opcodes. Every instruction is two slots in Code.ops: the opcode and one
+# integer argument (an index into Code.consts, a jump target or a count).
+LOAD_CONST = 0
+LOAD_COPY = 1
+LOAD_NAME = 2
+STORE_NAME = 3
+INPLACE_NAME = 4
+BINARY_ADD = 5
+BINARY_OP = 6
+UNARY_OP = 7
+JUMP = 8
+POP_JUMP_IF_FALSE = 9
+POP_TOP = 10
+UNWRAP = 11
+LOAD_FUNC = 12
+CALL = 13
+INDEX = 14
+CASE_EQ = 15
+EVAL = 16
+EXEC = 17
+RETURN = 18
+HALT = 19
+LOAD_SLOT = 20
+STORE_SLOT = 21
+INPLACE_SLOT = 22
+LOAD_SLOT_VALUE = 23
+TAIL_CALL = 24
+WHILE_LOOP = 25
+FOR_LOOP = 26
+C_FOR_LOOP = 27
+CALL_METHOD = 28
+LOAD_ATTR = 29
+STORE_ATTR = 30
+
+_BINARY_FUNCS = {
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '**': operator.pow,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '&': operator.and_,
+    '|': operator.or_,
+    '^': operator.xor,
+    '<<': operator.lshift,
+    '>>': operator.rshift,
+    '&&': lambda l, r: bool(l) and bool(r),
+    '||': lambda l, r: bool(l) or bool(r),
+    '===': lambda l, r: (l == r) and (type(l) == type(r)),
+    'in': lambda l, r: l in r,
+}
+
+_UNARY_FUNCS = {
+    '-': operator.neg,
+    '+': operator.pos,
+    '!': operator.not_,
+}
+
+_COMPOUND_FUNCS = {
+    '+=': operator.add,
+    '-=': operator.sub,
+    '*=': operator.mul,
+    '/=': operator.truediv,
+    '%=': operator.mod,
+}
+
+_NO_RESULT = (None, "null", False)
+
+def _node_name(node):
+    # Quickened BinaryOp subclasses compile like the generic node.
+    if isinstance(node, QuickBinaryOp):
+        return 'BinaryOp'
+    return node.__class__.__name__
+
+def _unwrap(v):
+    return v[0] if isinstance(v, tuple) and len(v) == 3 else v
+
+class Code:
+    __slots__ = ('ops', 'consts', 'nodes', 'handlers')
+
+    def __init__(self):
+        self.ops = []
+        self.consts = []
+        # nodes[pc // 2] is the innermost enclosing node with a span of the
+        # instruction at pc, for node_at.
+        self.nodes = []
+        # (start, end, break_pc, depth) for every switch body, innermost
+        # first, used to route a BREAK returned by a delegated node.
+        self.handlers = []
+
+    def node_at(self, pc):
+        # The node error_span reports for a failure in a visit_code frame
+        # stopped at pc: that of the instruction just fetched.
+        return self.nodes[(pc - 2) // 2]
+
+class BytecodeCompiler:
+    """Compiles statements and expressions into Code for VMInterpreter.
+
+    Control flow, operators, variable and property access, indexing and
+    calls become instructions. Every other node is emitted as EVAL/EXEC,
+    which hands the node back to the tree-walking visit_* methods. Loops
+    run in native_loop like in the closure engine: the body, increment and
+    so on are each compiled into a Code of their own, which the native
+    loop calls through VMInterpreter.visit_code.
+    """
+
+    STATEMENTS = ('Program', 'ExprStmt', 'IfBlock', 'WhileNode', 'CStyleForNode', 'ForNode',
+                  'SwitchNode', 'VarSet', 'VarSetExpr', 'ReturnNode', 'Break')
+    EXPRESSIONS = ('BinaryOp', 'UnaryOp', 'FuncCall', 'MethodCall', 'IndexAccess', 'PropertyAccess')
+
+    def __init__(self, interp):
+        self.interp = interp
+        self.code = Code()
+        self.span_nodes = []
+        self.switches = []
+        self.depth = 0
+
+    def compile_unit(self, node):
+        name = _node_name(node)
+        if name == 'ExprStmt':
+            self.expr(node.expr)
+        elif name in self.STATEMENTS:
+            self.stmt(node)
+        elif name in self.EXPRESSIONS:
+            self.expr(node)
+        else:
+            return None
+        self.emit(HALT, 0)
+        return self.code
+
+    def const(self, value):
+        self.code.consts.append(value)
+        return len(self.code.consts) - 1
+
+    def emit(self, op, arg):
+        self.code.ops.append(op)
+        self.code.ops.append(arg)
+        self.code.nodes.append(self.span_nodes[-1] if self.span_nodes else None)
+        return len(self.code.ops) - 2
+
+    def pc(self):
+        return len(self.code.ops)
+
+    def patch(self, at, target):
+        self.code.ops[at + 1] = target
+
+    def enter(self, node):
+        spanned = node_span(node) is not None
+        if spanned:
+            self.span_nodes.append(node)
+        return spanned
+
+    def leave(self, spanned):
+        if spanned:
+            self.span_nodes.pop()
+
+    def block(self, stmts, skip_none=False):
+        for stmt in stmts:
+            if stmt is None and skip_none:
+                continue
+            self.stmt(stmt)
+
+    def stmt(self, node):
+        spanned = self.enter(node)
+        method = getattr(self, 'stmt_' + node.__class__.__name__, None)
+        if method is not None:
+            method(node)
+        else:
+            self.emit(EXEC, self.const(node))
+        self.leave(spanned)
+
+    def expr(self, node):
+        spanned = self.enter(node)
+        method = getattr(self, 'expr_' + _node_name(node), None)
+        if method is not None:
+            method(node)
+        else:
+            self.emit(EVAL, self.const(node))
+        self.leave(spanned)
+
+    def unit(self, node, value=False):
+        # Compiles a statement or, with value, the value of an expression
+        # into a Code of its own, returned as a callable for a native loop
+        # to run. A bare variable is cheaper to read through visit_Var.
+        if value and isinstance(node, Var):
+            return functools.partial(self.interp.visit_Var, node)
+        compiler = BytecodeCompiler(self.interp)
+        compiler.span_nodes = list(self.span_nodes)
+        if value:
+            compiler.operand(node)
+        else:
+            compiler.stmt(node)
+        compiler.emit(HALT, 0)
+        return functools.partial(self.interp.visit_code, compiler.code)
+
+    def loop_unit(self, body, cond=None):
+        # Compiles a loop body into a Code of its own. A condition is tested
+        # first and the unit returns BREAK once it fails, which saves the
+        # loop a call per iteration.
+        compiler = BytecodeCompiler(self.interp)
+        compiler.span_nodes = list(self.span_nodes)
+        exit_jump = None
+        if cond is not None:
+            compiler.operand(cond)
+            exit_jump = compiler.emit(POP_JUMP_IF_FALSE, -1)
+        compiler.block(body, skip_none=True)
+        compiler.emit(HALT, 0)
+        if exit_jump is not None:
+            compiler.patch(exit_jump, compiler.pc())
+            compiler.emit(LOAD_CONST, compiler.const(BREAK))
+            compiler.emit(HALT, 0)
+        return functools.partial(self.interp.visit_code, compiler.code)
+
+    def stmt_Program(self, node):
+        self.block(node.statements, skip_none=True)
+
+    def stmt_ExprStmt(self, node):
+        self.expr(node.expr)
+        self.emit(POP_TOP, 0)
+
+    def stmt_VarSet(self, node):
+        self.operand(node.value)
+        self.store(node, node.op)
+
+    def stmt_VarSetExpr(self, node):
+        target = node.target_expr
+        if isinstance(target, PropertyAccess):
+            self.operand(node.value)
+            self.operand(target.obj)
+            self.emit(STORE_ATTR, self.const(node))
+            return
+        if not isinstance(target, Var):
+            self.emit(EXEC, self.const(node))
+            return
+        self.operand(node.value)
+        self.store(target, node.op)
+
+    def store(self, target, op):
+        name = target.name
+        if target.slot is not None:
+            ref = (target.depth, target.slot, target.layout, name)
+            if op == "=":
+                self.emit(STORE_SLOT, self.const(ref))
+            else:
+                self.emit(INPLACE_SLOT, self.const(ref + (op, _COMPOUND_FUNCS.get(op))))
+        elif op == "=":
+            self.emit(STORE_NAME, self.const(name))
+        else:
+            self.emit(INPLACE_NAME, self.const((name, op, _COMPOUND_FUNCS.get(op))))
+
+    def stmt_ReturnNode(self, node):
+        if node.value is None:
+            self.emit(LOAD_CONST, self.const(_NO_RESULT))
+        elif node.tail:
+            spanned = self.enter(node.value)
+            self.expr_FuncCall(node.value, TAIL_CALL)
+            self.leave(spanned)
+        else:
+            self.expr(node.value)
+        self.emit(RETURN, 0)
+
+    def stmt_Break(self, node):
+        if not self.switches:
+            self.emit(EXEC, self.const(node))
+            return
+        self.switches[-1].append(self.emit(JUMP, -1))
+
+    def stmt_IfBlock(self, node):
+        exits = []
+        branches = [(node.cond, node.body)] + [(cond, body) for cond, body in node.elseif_blocks]
+        for cond, body in branches:
+            self.operand(cond)
+            skip = self.emit(POP_JUMP_IF_FALSE, -1)
+            self.block(body, skip_none=True)
+            exits.append(self.emit(JUMP, -1))
+            self.patch(skip, self.pc())
+        if node.else_block:
+            self.block(node.else_block, skip_none=True)
+        for at in exits:
+            self.patch(at, self.pc())
+
+    def stmt_WhileNode(self, node):
+        self.emit(WHILE_LOOP, self.const([self.loop_unit(node.body, node.cond)]))
+
+    def stmt_ForNode(self, node):
+        self.operand(node.iterable_expr)
+        self.emit(FOR_LOOP, self.const((node.var_name, [self.loop_unit(node.body)])))
+
+    def stmt_CStyleForNode(self, node):
+        init = self.unit(node.init_stmt) if node.init_stmt is not None else None
+        increment = self.unit(node.increment) if node.increment is not None else None
+        counter = node.counter
+        if counter is None:
+            condition = None
+            body = self.loop_unit(node.body, node.condition)
+        else:
+            # A counted loop tests its counter natively and only needs the
+            # condition once the counter falls back to the generic path.
+            condition = self.unit(node.condition, value=True)
+            body = self.loop_unit(node.body)
+            if counter[2] is not None:
+                counter = counter[:2] + (self.unit(counter[2], value=True),) + counter[3:]
+        self.emit(C_FOR_LOOP, self.const((node.layout, init, condition, increment, [body], counter)))
+
+    def stmt_SwitchNode(self, node):
+        self.operand(node.expr)
+        self.emit(UNWRAP, 0)
+        breaks = []
+        self.switches.append(breaks)
+        self.depth += 1
+        start = self.pc()
+        exits = []
+        for case_expr, body in node.cases:
+            self.operand(case_expr)
+            self.emit(CASE_EQ, 0)
+            skip = self.emit(POP_JUMP_IF_FALSE, -1)
+            self.emit(POP_TOP, 0)
+            self.block(body)
+            exits.append(self.emit(JUMP, -1))
+            self.patch(skip, self.pc())
+        self.emit(POP_TOP, 0)
+        if node.default_case:
+            self.block(node.default_case)
+        self.depth -= 1
+        self.switches.pop()
+        done = self.pc()
+        for at in exits + breaks:
+            self.patch(at, done)
+        self.code.handlers.append((start, done, done, self.depth))
+
+    def expr_Literal(self, node):
+        self.emit(LOAD_CONST, self.const(node.value))
+
+    def expr_ConstCollection(self, node):
+        self.emit(LOAD_COPY, self.const(node.value))
+
+    def operand(self, node):
+        # For values the next instruction unwraps: a slotted Var then pushes
+        # the bare value and no entry tuple has to be built.
+        if isinstance(node, Var) and node.slot is not None:
+            self.emit(LOAD_SLOT_VALUE, self.const((node.depth, node.slot, node.layout, node.name)))
+        else:
+            self.expr(node)
+
+    def expr_Var(self, node):
+        if node.slot is not None:
+            self.emit(LOAD_SLOT, self.const((node.depth, node.slot, node.layout, node.name)))
+        else:
+            self.emit(LOAD_NAME, self.const(node.name))
+
+    def expr_BinaryOp(self, node):
+        self.operand(node.left)
+        self.operand(node.right)
+        if node.op == '+':
+            self.emit(BINARY_ADD, 0)
+        else:
+            self.emit(BINARY_OP, self.const((node.op, _BINARY_FUNCS.get(node.op))))
+
+    def expr_UnaryOp(self, node):
+        self.operand(node.expr)
+        self.emit(UNARY_OP, self.const((node.op, _UNARY_FUNCS.get(node.op))))
+
+    def expr_IndexAccess(self, node):
+        self.operand(node.collection)
+        self.operand(node.index)
+        self.emit(INDEX, 0)
+
+    def expr_FuncCall(self, node, call_op=CALL):
+        load = self.emit(LOAD_FUNC, -1)
+        for arg in node.args:
+            self.expr(arg)
+        self.emit(call_op, self.const((len(node.args), node.name)))
+        self.code.ops[load + 1] = self.const((node.name, node, self.pc()))
+
+    def expr_MethodCall(self, node):
+        self.expr(node.receiver)
+        for arg in node.args:
+            self.operand(arg)
+        self.emit(CALL_METHOD, self.const((node, len(node.args))))
+
+    def expr_PropertyAccess(self, node):
+        self.operand(node.obj)
+        self.emit(LOAD_ATTR, self.const(node))
+
+class VMInterpreter(Interpreter):
+    """Interpreter that runs statements as bytecode in a dispatch loop.
+
+    Each node handed to visit is compiled once into a Code object; nodes
+    the compiler does not cover are executed by the inherited visit_*
+    methods. Variables the resolver gave a slot are read and written with
+    LOAD_SLOT/STORE_SLOT/INPLACE_SLOT (LOAD_SLOT_VALUE when only the value
+    is needed), which go straight to the slot array of the environment
+    ``depth`` levels up and fall back to a lookup by name when the slot
+    cannot be used. Other variables use the *_NAME opcodes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.units = {}
+
+    def visit(self, node):
+        code = self.units.get(node, False)
+        if code is False:
+            code = self.units[node] = BytecodeCompiler(self).compile_unit(node)
+        if code is None:
+            return Interpreter.visit(self, node)
+        return self.visit_code(code)
+
+    def visit_code(self, code):
+        ops = code.ops
+        consts = code.consts
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+
+            if op == LOAD_NAME:
+                env = self.env
+                try:
+                    push(env.get_key(consts[arg], env))
+                except Exception:
+                    raise Exception(f"{consts[arg]} not found")
+            elif op == LOAD_SLOT_VALUE:
+                depth, slot, layout, name = consts[arg]
+                env = self.env
+                value = env.get_slot_value(depth, slot, layout)
+                if value is None:
+                    try:
+                        value = env.get_key(name, env)
+                    except Exception:
+                        raise Exception(f"{name} not found")
+                push(value)
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == BINARY_ADD:
+                r = pop()
+                if type(r) is tuple and len(r) == 3:
+                    r = r[0]
+                l = pop()
+                if type(l) is tuple and len(l) == 3:
+                    l = l[0]
+                if type(l) is int and type(r) is int:
+                    push(l + r)
+                elif l is None or r is None:
+                    raise Exception("RuntimeError: Cannot perform '+' on null value")
+                elif isinstance(l, str) or isinstance(r, str):
+                    if isinstance(l, str) and isinstance(r, str):
+                        push(l + r)
+                    else:
+                        raise Exception(f"TypeError: Cannot add {type(l).__name__} and {type(r).__name__}")
+                elif isinstance(l, float) or isinstance(r, float):
+                    push(float(l + r))
+                else:
+                    push(l + r)
+            elif op == STORE_NAME:
+                val = pop()
+                if type(val) is tuple and len(val) == 3:
+                    val = val[0]
+                self.env.assign_key(consts[arg], val)
+            elif op == STORE_SLOT:
+                depth, slot, layout, name = consts[arg]
+                val = pop()
+                if type(val) is tuple and len(val) == 3:
+                    val = val[0]
+                if not self.env.assign_slot(depth, slot, layout, val):
+                    self.env.assign_key(name, val)
+            elif op == HALT:
+                return stack[-1] if stack else None
+            elif op == BINARY_OP:
+                r = pop()
+                if type(r) is tuple and len(r) == 3:
+                    r = r[0]
+                l = pop()
+                if type(l) is tuple and len(l) == 3:
+                    l = l[0]
+                name, func = consts[arg]
+                if l is None or r is None:
+                    raise Exception(f"RuntimeError: Cannot perform '{name}' on null value")
+                if func is None:
+                    raise Exception(f"Unknown binary operator {name}")
+                push(func(l, r))
+            elif op == POP_JUMP_IF_FALSE:
+                value = pop()
+                if type(value) is tuple and len(value) == 3:
+                    value = value[0]
+                if not value:
+                    pc = arg
+            elif op == POP_TOP:
+                pop()
+            elif op == CALL_METHOD:
+                call_node, argc = consts[arg]
+                if argc == 1:
+                    value = pop()
+                    if type(value) is tuple and len(value) == 3:
+                        value = value[0]
+                    values = [value]
+                elif argc:
+                    values = [_unwrap(v) for v in stack[-argc:]]
+                    del stack[-argc:]
+                else:
+                    values = []
+                receiver = pop()
+                if isinstance(receiver, tuple):
+                    receiver = receiver[0]
+                push(self.invoke_method(call_node, receiver, values))
+            elif op == LOAD_ATTR:
+                obj = pop()
+                if type(obj) is tuple and len(obj) == 3:
+                    obj = obj[0]
+                push(self.get_property(consts[arg], obj))
+            elif op == STORE_ATTR:
+                obj = pop()
+                if type(obj) is tuple and len(obj) == 3:
+                    obj = obj[0]
+                value = pop()
+                if type(value) is tuple and len(value) == 3:
+                    value = value[0]
+                self.set_property(consts[arg], obj, value)
+            elif op == LOAD_SLOT:
+                depth, slot, layout, name = consts[arg]
+                env = self.env
+                entry = env.get_slot(depth, slot, layout)
+                if entry is None:
+                    try:
+                        entry = env.get_key(name, env)
+                    except Exception:
+                        raise Exception(f"{name} not found")
+                push(entry)
+            elif op == EVAL:
+                push(Interpreter.visit(self, consts[arg]))
+            elif op == EXEC:
+                signal = Interpreter.visit(self, consts[arg])
+                if type(signal) is Completion:
+                    pc = self.unwind(code, pc - 2, signal, stack)
+                    if pc is None:
+                        return signal
+            elif op == JUMP:
+                pc = arg
+            elif op == INPLACE_SLOT:
+                depth, slot, layout, name, opname, func = consts[arg]
+                val = _unwrap(pop())
+                env = self.env
+                current = env.get_slot(depth, slot, layout)
+                if current is None:
+                    current = env.get_key(name)
+                if func is None:
+                    raise Exception(f"Unknown assignment operator '{opname}'")
+                result = func(_unwrap(current), val)
+                if not env.assign_slot(depth, slot, layout, result):
+                    env.assign_key(name, result)
+            elif op == INPLACE_NAME:
+                name, opname, func = consts[arg]
+                val = _unwrap(pop())
+                env = self.env
+                current_val = _unwrap(env.get_key(name))
+                if func is None:
+                    raise Exception(f"Unknown assignment operator '{opname}'")
+                env.assign_key(name, func(current_val, val))
+            elif op == LOAD_FUNC:
+                name, call_node, skip = consts[arg]
+                if name in self.classes:
+                    push(self.visit_FuncCall(call_node))
+                    pc = skip
+                else:
+                    env = self.env
+                    func = env.get_key(name, env)
+                    if isinstance(func, tuple):
+                        func = func[0]
+                    push(func)
+            elif op == CALL:
+                argc, name = consts[arg]
+                if argc:
+                    values = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    values = []
+                func = pop()
+                if isinstance(func, FunctionValue):
+                    push(func.call(self, values))
+                elif callable(func):
+                    push(func(*[_unwrap(v) for v in values]))
+                else:
+                    raise Exception(f"'{name}' is not a function")
+            elif op == INDEX:
+                index = _unwrap(pop())
+                collection = _unwrap(pop())
+                try:
+                    push(collection[index])
+                except Exception as e:
+                    raise Exception(f"Indexing error: {e}")
+            elif op == RETURN:
+                return self.signal_return(pop())
+            elif op == TAIL_CALL:
+                argc, name = consts[arg]
+                if argc:
+                    values = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    values = []
+                func = pop()
+                if (isinstance(func, FunctionValue) and not func.is_async
+                        and self.current_return_type is not None and not self.in_async):
+                    return Completion('tail', (func, values))
+                if isinstance(func, FunctionValue):
+                    push(func.call(self, values))
+                elif callable(func):
+                    push(func(*[_unwrap(v) for v in values]))
+                else:
+                    raise Exception(f"'{name}' is not a function")
+            elif op == UNARY_OP:
+                name, func = consts[arg]
+                value = _unwrap(pop())
+                if func is None:
+                    raise Exception(f"Unknown unary operator {name}")
+                push(func(value))
+            elif op == LOAD_COPY:
+                push(consts[arg].copy())
+            elif op == UNWRAP:
+                stack[-1] = _unwrap(stack[-1])
+            elif op == CASE_EQ:
+                case_value = _unwrap(pop())
+                push(stack[-1] == case_value)
+            elif op == WHILE_LOOP:
+                # The body unit tests the condition itself, so the loop
+                # is a C-style one with nothing but a body.
+                signal = native_loop.native_c_style_for_loop(self, self.env, None, None, None, consts[arg],
+                                                             None, Completion, BREAK, CONTINUE, None)
+                if signal is not None:
+                    return signal
+            elif op == FOR_LOOP:
+                var_name, body = consts[arg]
+                iterable = _unwrap(pop())
+                if not hasattr(iterable, "__iter__"):
+                    raise Exception(f"TypeError: '{type(iterable).__name__}' object is not iterable")
+                signal = native_loop.native_for_loop(self, iterable, var_name, body, self.env,
+                                                     self.get_type_name, Completion, BREAK, CONTINUE, None)
+                if signal is not None:
+                    return signal
+            elif op == C_FOR_LOOP:
+                layout, init, condition, increment, body, counter = consts[arg]
+                self.push_scope(layout)
+                try:
+                    signal = native_loop.native_c_style_for_loop(self, self.env, init, condition, increment,
+                                                                 body, counter, Completion, BREAK, CONTINUE, None)
+                finally:
+                    self.pop_scope()
+                if signal is not None:
+                    return signal
+            else:
+                raise Exception(f"Unknown opcode {op}")
+
+    def unwind(self, code, fault, signal, stack):
+        # Routes a Completion produced by the instruction at fault. BREAK
+        # jumps past the innermost switch around it, dropping the stack
+        # entries pushed since. Anything else leaves the unit: None is
+        # returned.
+        if signal is BREAK:
+            for start, end, break_pc, depth in code.handlers:
+                if start <= fault < end:
+                    del stack[depth:]
+                    return break_pc
+        return None
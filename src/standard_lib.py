@@ -1,3 +1,32 @@
+import threading
+
+# While run_deep runs a program on its worker thread, the queue of calls the
+# main thread carries out for it.
+main_calls = None
+
+def on_main_thread(fn, *args):
+    # Calls fn(*args) on the main thread and returns its result, for calls
+    # such as signal.signal that fail on any other thread.
+    calls = main_calls
+    if calls is None or threading.current_thread() is threading.main_thread():
+        return fn(*args)
+    outcome = {}
+    done = threading.Event()
+
+    def call():
+        try:
+            outcome['value'] = fn(*args)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    calls.put(call)
+    done.wait()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
+
 class StdModule:
     registry = {}
 
@@ -135,4 +135,5 @@ def base(value, current_base, target_base):
 functions = [("length", lambda x: get_length(x), "function", False),
              ("cast", lambda v,t: castto(v,t), "function", False),
              ("tobase", lambda v,c,t: base(v,c,t), "function", False),
+             ("range", lambda *args: range(*args), "function", False),
 ]
\ No newline at end of file
@@ -1,5 +1,8 @@
-from standard_lib import StdModule
+from standard_lib import StdModule, on_main_thread
+import async_runtime
+import codecs
 import os
+import selectors
 import sys
 import signal
 import time
@@ -157,12 +160,16 @@ def fork():
 
 def wait():
     if hasattr(os, 'wait'):
-        return os.wait()
+        result = os.wait()
+        _release(*result)
+        return result
     raise OSError("wait not supported on this platform")
 
 def waitpid(pid, options=0):
     if hasattr(os, 'waitpid'):
-        return os.waitpid(pid, options)
+        result = os.waitpid(pid, options)
+        _release(*result)
+        return result
     raise OSError("waitpid not supported on this platform")
 
 def execv(path, args):
@@ -171,6 +178,19 @@ def execv(path, args):
 def execve(path, args, env):
     os.execve(path, args, env)
 
+# Processes started by spawn, by pid, until communicate collects them or
+# wait/waitpid reaps them.
+_spawned = {}
+
+def _release(pid, status):
+    # A spawned process reaped by wait or waitpid: its exit code is already
+    # taken, so the entry and its pipes go.
+    proc = _spawned.pop(pid, None)
+    if proc is not None:
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        proc.stdout.close()
+        proc.stderr.close()
+
 def spawn(command, args=None, shell=False):
     if args is None:
         args = []
@@ -178,8 +198,74 @@ def spawn(command, args=None, shell=False):
         proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     else:
         proc = subprocess.Popen([command] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _spawned[proc.pid] = proc
     return proc.pid
 
+def communicate(pid):
+    # Awaitable map of a spawned process's output and exit code. Both pipes
+    # are read through the event loop, so other tasks run meanwhile.
+    proc = _spawned.pop(pid, None)
+    if proc is None:
+        raise Exception(f"No spawned process with pid {pid}")
+    loop = async_runtime.loop
+    streams = async_runtime.gather([loop.read_all(proc.stdout.fileno()), loop.read_all(proc.stderr.fileno())])
+
+    def finished(outputs):
+        proc.stdout.close()
+        proc.stderr.close()
+        return {
+            'out': outputs[0].decode(errors='replace'),
+            'err': outputs[1].decode(errors='replace'),
+            'code': proc.wait()
+        }
+
+    return async_runtime.then(streams, finished)
+
+def readable(fd):
+    return async_runtime.loop.wait_fd(fd, selectors.EVENT_READ)
+
+def writable(fd):
+    return async_runtime.loop.wait_fd(fd, selectors.EVENT_WRITE)
+
+# Incremental UTF-8 decoders of the fds readfd reads, so a character split
+# across two reads still decodes. Dropped at the end of input or closefd.
+_decoders = {}
+
+def readfd(fd, size=65536):
+    # Awaitable text of the next bytes fd has; empty at the end of input. A
+    # read that ends inside a character reads on, so only the end of input
+    # gives an empty string.
+    loop = async_runtime.loop
+    decoder = _decoders.get(fd)
+    if decoder is None:
+        decoder = _decoders[fd] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    result = async_runtime.Future()
+
+    def received(chunk):
+        if chunk.error is not None:
+            result.set_exception(chunk.error)
+        elif not chunk.result:
+            _decoders.pop(fd, None)
+            result.set_result(decoder.decode(b"", final=True))
+        else:
+            text = decoder.decode(chunk.result)
+            if text:
+                result.set_result(text)
+            else:
+                loop.read(fd, size).add_waiter(received)
+
+    loop.read(fd, size).add_waiter(received)
+    return result
+
+def writefd(fd, data):
+    if isinstance(data, str):
+        data = data.encode()
+    return async_runtime.loop.write(fd, data)
+
+def closefd(fd):
+    _decoders.pop(fd, None)
+    os.close(fd)
+
 def tmpdir():
     return tempfile.gettempdir()
 
@@ -242,7 +328,7 @@ class Stderr:
         return sys.stderr.isatty()
 
 def signalhandler(sig, handler):
-    signal.signal(sig, handler)
+    on_main_thread(signal.signal, sig, handler)
 
 def sendsignal(pid, sig):
     os.kill(pid, sig)
@@ -306,7 +392,13 @@ def std_sys(interp):
     env.define("execv", execv)
     env.define("execve", execve)
     env.define("spawn", spawn)
+    env.define("communicate", communicate)
     env.define("pipe", pipe)
+    env.define("readable", readable)
+    env.define("writable", writable)
+    env.define("readfd", readfd)
+    env.define("writefd", writefd)
+    env.define("closefd", closefd)
     env.define("umask", umask)
     env.define("chdir", chdir)
     env.define("getcwd", getcwd)